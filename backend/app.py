@@ -1,13 +1,21 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
 import os
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from web3 import Web3
-import openai
-import tweepy
-from datetime import datetime
-from web3.contract_utils import ContractAnalyzer
-from textblob import TextBlob
+from backend.lazy import LazyClient, preload
+from backend.normalize import cache_key, is_contract_input
+from backend.verdict_cache import VerdictCache
+from backend.llm import LLMClient
+from backend.monitor import WatchlistMonitor
+from backend.storage import storage, WatchlistStore
+from backend.social import SocialAggregator
+from backend.url_triage import URLTriage
+from backend.scam_filter import ScamFilter
+from backend.metrics import metrics
 
 # Load environment variables
 load_dotenv()
@@ -16,70 +24,163 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-# Configure OpenAI
-openai.api_key = os.getenv('OPENAI_API_KEY')
+# Configure OpenAI (cached, deadline-bounded client)
+llm_client = LLMClient(model="gpt-4")
+
+# Local URL pre-filter: allow/blocklists and typosquat checks before the LLM
+url_triage = URLTriage()
+
+# Known-scam addresses and domains, memory-mapped and shared by all workers
+scam_filter = ScamFilter()
+
+# Heavy clients (web3, tweepy, textblob/numpy) are imported and built on first use
+def _build_krnl_web3():
+    from web3.transport import make_web3
+    return make_web3(os.getenv('KRNL_RPC_URL'))
+
+def _build_contract_analyzer():
+    from web3.contract_utils import ContractAnalyzer
+    return ContractAnalyzer()
 
 # Configure Web3 and ContractAnalyzer
-w3 = Web3(Web3.HTTPProvider(os.getenv('KRNL_RPC_URL')))
-contract_analyzer = ContractAnalyzer()
+w3 = LazyClient(_build_krnl_web3, 'krnl_web3')
+contract_analyzer = LazyClient(_build_contract_analyzer, 'contract_analyzer')
+
+# Shared /api/check result cache (TTL + LRU, single-flight across workers)
+verdict_cache = VerdictCache()
+
+# Batch checks run their items concurrently on this pool
+batch_pool = ThreadPoolExecutor(max_workers=int(os.getenv('BATCH_CONCURRENCY', 16)),
+                                thread_name_prefix='check-batch')
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 500))
+
+# Risk taken off the on-chain score when the code nearly copies a contract labelled benign
+BENIGN_CLONE_DISCOUNT = float(os.getenv('BENIGN_CLONE_DISCOUNT', 0.3))
+
+def malicious_clone(verification):
+    """The clone match when it copies a known malicious contract, else None."""
+    clone = verification.get('clone_match')
+    return clone if clone is not None and clone['label'] == 'malicious' else None
+
+def clone_verdict(clone, verification):
+    """Verdict for a contract that closely matches a known malicious contract."""
+    risk_score = max(0.7, clone['similarity'])
+    explanation = f"Bytecode is {clone['similarity']:.0%} similar to known malicious contract {clone['name']}."
+
+    verdict = 'Safe' if risk_score < 0.3 else 'Suspicious' if risk_score < 0.7 else 'Likely Scam'
+    return {
+        'verdict': verdict,
+        'risk_score': risk_score,
+        'explanation': explanation,
+        'details': {
+            'verification': verification
+        }
+    }
+
+def count_bucket(count):
+    """Coarse range for a count ("0", "1-9", "10-99", ...)."""
+    if not count:
+        return '0'
+    low = 10 ** (len(str(int(count))) - 1)
+    return f'{low}-{low * 10 - 1}' if low > 1 else '1-9'
+
+def transaction_summary(tx_patterns):
+    """Bucketed transaction facts for the prompt.
+
+    Exact counts and the deep history move with every block, which would give
+    each prompt (and so each LLM cache key) a short life and a growing size.
+    """
+    history = tx_patterns.get('history') or {}
+    return f"{count_bucket(tx_patterns.get('transaction_count', 0))} transactions from "\
+           f"{count_bucket(tx_patterns.get('unique_senders', 0))} senders in the last 100 blocks; "\
+           f"top sender share {round(history.get('top_sender_share', 0.0), 1)}, "\
+           f"sender Gini {round(history.get('sender_gini', 0.0), 1)}, "\
+           f"bursts {'yes' if history.get('burst_count') else 'no'}"
+
+def contract_messages(verification, tx_patterns):
+    """GPT-4 prompt for a contract that passed the on-chain checks."""
+    analysis_prompt = f"Analyze this smart contract for potential scam indicators:\n"\
+                     f"Bytecode length: {verification['bytecode_length']}\n"\
+                     f"Risky operations: {', '.join(verification['risky_operations'])}\n"\
+                     f"Recent transactions: {count_bucket(verification['recent_transactions'])}\n"\
+                     f"Transaction patterns: {transaction_summary(tx_patterns)}"
+    return [
+        {"role": "system", "content": "You are a blockchain security expert analyzing smart contracts for potential scams."},
+        {"role": "user", "content": analysis_prompt}
+    ]
+
+def invalid_contract_result(verification):
+    return {
+        'verdict': 'Suspicious',
+        'risk_score': 0.8,
+        'explanation': verification['error']
+    }
+
+def verdict_for(risk_score):
+    return 'Safe' if risk_score < 0.3 else 'Suspicious' if risk_score < 0.7 else 'Likely Scam'
 
-def analyze_contract(address):
+def contract_risk(verification, tx_patterns):
+    """Rule-based risk score from the on-chain checks available so far."""
+    risk_score = 0.5  # Default moderate risk
+    
+    # Adjust score based on risky operations
+    if verification['risky_operations']:
+        risk_score += 0.3
+    
+    # Adjust score based on transaction patterns
+    if tx_patterns.get('transaction_count', 0) > 0:
+        if tx_patterns.get('unique_senders', 0) / tx_patterns['transaction_count'] < 0.2:
+            risk_score += 0.2  # Few unique senders relative to transactions is suspicious
+
+    # Matching benign code lowers the score but never skips the checks above
+    clone = verification.get('clone_match')
+    if clone is not None and clone['label'] != 'malicious':
+        risk_score = max(0.0, risk_score - BENIGN_CLONE_DISCOUNT)
+
+    return risk_score
+
+def contract_result(verification, tx_patterns, analysis):
+    """Score a contract from its on-chain checks and the (optional) LLM analysis."""
+    risk_score = contract_risk(verification, tx_patterns)
+
+    # Fall back to the rule-based score when the LLM is slow, failing or over budget
+    if analysis is None:
+        analysis = 'AI analysis unavailable; verdict is based on on-chain checks only.'
+
+    return {
+        'verdict': verdict_for(risk_score),
+        'risk_score': risk_score,
+        'explanation': analysis[:200],  # Truncate to first 200 characters
+        'details': {
+            'verification': verification,
+            'transaction_patterns': tx_patterns
+        }
+    }
+
+def analyze_contract(address, code=None):
     """Analyze a smart contract address for potential scams."""
     try:
         # Use ContractAnalyzer for detailed analysis
-        verification = contract_analyzer.verify_contract(address)
+        with metrics.stage('contract.verify'):
+            verification = contract_analyzer.verify_contract(address, code=code)
         
         if not verification['is_valid']:
-            return {
-                'verdict': 'Suspicious',
-                'risk_score': 0.8,
-                'explanation': verification['error']
-            }
-        
+            return invalid_contract_result(verification)
+
+        # A near-copy of a known malicious contract takes that contract's verdict
+        clone = malicious_clone(verification)
+        if clone is not None:
+            return clone_verdict(clone, verification)
+
         # Analyze transaction patterns
-        tx_patterns = contract_analyzer.analyze_transaction_patterns(address)
-        
-        # Calculate risk score based on multiple factors
-        risk_score = 0.5  # Default moderate risk
-        
-        # Adjust score based on risky operations
-        if verification['risky_operations']:
-            risk_score += 0.3
-        
-        # Adjust score based on transaction patterns
-        if tx_patterns.get('transaction_count', 0) > 0:
-            if tx_patterns.get('unique_senders', 0) / tx_patterns['transaction_count'] < 0.2:
-                risk_score += 0.2  # Few unique senders relative to transactions is suspicious
+        with metrics.stage('contract.transactions'):
+            tx_patterns = contract_analyzer.analyze_transaction_patterns(address)
         
         # Use OpenAI for additional analysis
-        analysis_prompt = f"Analyze this smart contract for potential scam indicators:\n"\
-                         f"Bytecode length: {verification['bytecode_length']}\n"\
-                         f"Risky operations: {', '.join(verification['risky_operations'])}\n"\
-                         f"Recent transactions: {verification['recent_transactions']}\n"\
-                         f"Transaction patterns: {tx_patterns}"
-
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a blockchain security expert analyzing smart contracts for potential scams."},
-                {"role": "user", "content": analysis_prompt}
-            ]
-        )
-
-        analysis = response.choices[0].message.content
-        
-        # Determine verdict based on risk score
-        verdict = 'Safe' if risk_score < 0.3 else 'Suspicious' if risk_score < 0.7 else 'Likely Scam'
+        with metrics.stage('contract.llm'):
+            analysis = llm_client.complete(contract_messages(verification, tx_patterns))
 
-        return {
-            'verdict': verdict,
-            'risk_score': risk_score,
-            'explanation': analysis[:200],  # Truncate to first 200 characters
-            'details': {
-                'verification': verification,
-                'transaction_patterns': tx_patterns
-            }
-        }
+        return contract_result(verification, tx_patterns, analysis)
 
     except Exception as e:
         return {
@@ -88,41 +189,52 @@ def analyze_contract(address):
             'explanation': f'Error analyzing contract: {str(e)}'
         }
 
+def url_messages(url):
+    """GPT-4 prompt for a URL the local triage could not decide."""
+    analysis_prompt = f"Analyze this URL {url} for potential scam/phishing indicators. Consider:"\
+                     f"1. Domain reputation and age"\
+                     f"2. Similar legitimate domains"\
+                     f"3. Common phishing patterns"
+    return [
+        {"role": "system", "content": "You are a cybersecurity expert analyzing URLs for potential scams and phishing attempts."},
+        {"role": "user", "content": analysis_prompt}
+    ]
+
+def url_result(analysis):
+    """Score a URL from the (optional) LLM analysis."""
+    # Without the LLM there is no signal, so keep the default moderate risk
+    if analysis is None:
+        analysis = 'AI analysis unavailable; unable to assess this URL right now.'
+    
+    # Simple scoring based on keywords
+    risk_score = 0.5  # Default moderate risk
+    if 'legitimate' in analysis.lower():
+        risk_score -= 0.3
+    if 'suspicious' in analysis.lower() or 'phishing' in analysis.lower():
+        risk_score += 0.3
+
+    # Determine verdict based on risk score
+    verdict = 'Safe' if risk_score < 0.3 else 'Suspicious' if risk_score < 0.7 else 'Likely Scam'
+
+    return {
+        'verdict': verdict,
+        'risk_score': risk_score,
+        'explanation': analysis[:200]  # Truncate to first 200 characters
+    }
+
 def analyze_url(url):
     """Analyze a URL for potential phishing or scam indicators."""
     try:
-        # Use OpenAI to analyze the URL
-        analysis_prompt = f"Analyze this URL {url} for potential scam/phishing indicators. Consider:"\
-                         f"1. Domain reputation and age"\
-                         f"2. Similar legitimate domains"\
-                         f"3. Common phishing patterns"
-
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a cybersecurity expert analyzing URLs for potential scams and phishing attempts."},
-                {"role": "user", "content": analysis_prompt}
-            ]
-        )
-
-        # Process OpenAI's analysis
-        analysis = response.choices[0].message.content
-        
-        # Simple scoring based on keywords
-        risk_score = 0.5  # Default moderate risk
-        if 'legitimate' in analysis.lower():
-            risk_score -= 0.3
-        if 'suspicious' in analysis.lower() or 'phishing' in analysis.lower():
-            risk_score += 0.3
-
-        # Determine verdict based on risk score
-        verdict = 'Safe' if risk_score < 0.3 else 'Suspicious' if risk_score < 0.7 else 'Likely Scam'
+        # Allowlisted, blocklisted and look-alike domains are decided locally
+        with metrics.stage('url.triage'):
+            triaged = url_triage.classify(url)
+        if triaged is not None:
+            return triaged
 
-        return {
-            'verdict': verdict,
-            'risk_score': risk_score,
-            'explanation': analysis[:200]  # Truncate to first 200 characters
-        }
+        # Use OpenAI to analyze the URL
+        with metrics.stage('url.llm'):
+            analysis = llm_client.complete(url_messages(url))
+        return url_result(analysis)
 
     except Exception as e:
         return {
@@ -131,24 +243,109 @@ def analyze_url(url):
             'explanation': f'Error analyzing URL: {str(e)}'
         }
 
+def _build_twitter_api():
+    import tweepy
+    twitter_auth = tweepy.OAuth1UserHandler(
+        os.getenv('TWITTER_API_KEY'),
+        os.getenv('TWITTER_API_SECRET'),
+        os.getenv('TWITTER_ACCESS_TOKEN'),
+        os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
+    )
+    return tweepy.API(twitter_auth)
+
+def _build_sentiment_engine():
+    from backend.sentiment import SentimentEngine, load_lexicon
+    load_lexicon()
+    return SentimentEngine()
+
 # Initialize Twitter API
-twitter_auth = tweepy.OAuth1UserHandler(
-    os.getenv('TWITTER_API_KEY'),
-    os.getenv('TWITTER_API_SECRET'),
-    os.getenv('TWITTER_ACCESS_TOKEN'),
-    os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
-)
-twitter_api = tweepy.API(twitter_auth)
+twitter_api = LazyClient(_build_twitter_api, 'twitter_api')
+
+# Batch tweet scorer (pure-Python port of TextBlob's pattern rules, cached per tweet id)
+sentiment_engine = LazyClient(_build_sentiment_engine, 'sentiment_engine')
+SOCIAL_MAX_LIMIT = int(os.getenv('SOCIAL_MAX_LIMIT', 1000))
+
+# Rolling per-query aggregates, refreshed with tweets newer than since_id
+social_aggregator = SocialAggregator(storage, twitter_api, sentiment_engine)
+
+# Initialize watchlist storage (shared by all workers)
+watchlist = WatchlistStore(storage)
+
+# Follow new Base blocks and record alerts for watched addresses
+watchlist_monitor = WatchlistMonitor(contract_analyzer, watchlist)
+MONITOR_ENABLED = os.getenv('MONITOR_ENABLED', 'true').lower() == 'true'
 
-# Initialize watchlist storage
-watchlist = {}
+def start_monitor():
+    """Start this process's watchlist monitor (no-op when disabled or already running).
+
+    Never called at import: backend.asgi imports this module too, and a
+    thread started in a preloading parent doesn't survive the fork.
+    """
+    if MONITOR_ENABLED:
+        watchlist_monitor.start()
+
+def _collect_counters():
+    """Counters kept by the clients themselves, reported at each metrics flush."""
+    counters = [
+        ('cache_hits_total', {'cache': 'verdict'}, verdict_cache.hits),
+        ('cache_misses_total', {'cache': 'verdict'}, verdict_cache.misses),
+    ]
+    llm = llm_client.stats()
+    counters += [
+        ('llm_calls_total', {}, llm['calls']),
+        ('cache_hits_total', {'cache': 'llm'}, llm['cache_hits']),
+        ('llm_timeouts_total', {}, llm['timeouts']),
+        ('llm_errors_total', {}, llm['errors']),
+        ('llm_budget_exhausted_total', {}, llm['budget_exhausted']),
+        ('llm_tokens_total', {'kind': 'prompt'}, llm['prompt_tokens']),
+        ('llm_tokens_total', {'kind': 'completion'}, llm['completion_tokens']),
+        ('llm_latency_seconds_total', {}, llm['latency_seconds_total']),
+    ]
+    # Chain clients are lazy; only report them once something has loaded them
+    if 'web3.transport' in sys.modules:
+        rpc_calls = dict(sys.modules['web3.transport'].rpc_calls)
+        counters += [('rpc_calls_total', {'method': method}, count) for method, count in rpc_calls.items()]
+    if 'web3.bytecode' in sys.modules:
+        bytecode_cache = sys.modules['web3.bytecode'].bytecode_cache
+        counters += [
+            ('cache_hits_total', {'cache': 'bytecode'}, bytecode_cache.hits),
+            ('cache_misses_total', {'cache': 'bytecode'}, bytecode_cache.misses),
+        ]
+    return counters
+
+metrics.register(_collect_counters)
+
+@app.before_request
+def ensure_monitor():
+    start_monitor()
+
+@app.before_request
+def start_request_metrics():
+    g.started_at = time.perf_counter()
+    # Opt-in per-request stage breakdown, returned as a Server-Timing header
+    if request.headers.get('X-Safebase-Trace'):
+        metrics.start_trace()
+
+@app.after_request
+def finish_request_metrics(response):
+    metrics.observe('request_seconds', time.perf_counter() - g.started_at,
+                    endpoint=request.endpoint or 'unknown', status=response.status_code)
+    stages = metrics.finish_trace()
+    if stages is not None:
+        response.headers['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.1f}' for name, seconds in stages)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/monitor/list', methods=['GET'])
 def get_watchlist():
     try:
         return jsonify({
             'status': 'success',
-            'data': watchlist
+            'data': watchlist.all()
         })
     except Exception as e:
         return jsonify({
@@ -164,11 +361,8 @@ def add_to_watchlist():
     if not address:
         return jsonify({'status': 'error', 'message': 'No address provided'}), 400
         
-    watchlist[address] = {
-        'added_at': str(datetime.now()),
-        'notifications': True,
-        'alerts': []
-    }
+    watchlist.add(address)
+    watchlist_monitor.watch(address)
     
     return jsonify({'status': 'success'})
 
@@ -180,11 +374,37 @@ def remove_from_watchlist():
     if not address:
         return jsonify({'status': 'error', 'message': 'No address provided'}), 400
         
-    if address in watchlist:
-        del watchlist[address]
+    watchlist.remove(address)
+    watchlist_monitor.unwatch(address)
         
     return jsonify({'status': 'success'})
 
+def known_scam_result(input_value):
+    return {
+        'verdict': 'Likely Scam',
+        'risk_score': 1.0,
+        'explanation': f'{input_value} is on the known scam list.'
+    }
+
+def check_input(input_value, code=None):
+    """Analyze one /api/check input through the shared verdict cache."""
+    # Determine if input is a contract address or URL
+    if is_contract_input(input_value):
+        if scam_filter.is_known_scam_address(input_value):
+            return known_scam_result(input_value)
+        analyze = lambda: analyze_contract(input_value, code=code)
+    else:
+        if scam_filter.is_known_scam_url(input_value):
+            return known_scam_result(input_value)
+        analyze = lambda: analyze_url(input_value)
+
+    # Errors are not cached so the next request retries the analysis
+    return verdict_cache.get_or_compute(
+        cache_key(input_value),
+        analyze,
+        cacheable=lambda r: r.get('verdict') != 'Error'
+    )
+
 @app.route('/api/check', methods=['POST'])
 def check():
     data = request.get_json()
@@ -195,60 +415,190 @@ def check():
             'error': 'No input provided'
         }), 400
 
-    # Determine if input is a contract address or URL
-    if input_value.startswith('0x'):
-        result = analyze_contract(input_value)
+    result = check_input(input_value)
+    metrics.inc('checks_total', verdict=result.get('verdict'))
+    return jsonify(result)
+
+@app.route('/api/check/batch', methods=['POST'])
+def check_batch():
+    data = request.get_json() or {}
+    inputs = data.get('inputs')
+
+    if not isinstance(inputs, list) or not inputs:
+        return jsonify({'error': 'No inputs provided'}), 400
+    if len(inputs) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'At most {BATCH_MAX_ITEMS} inputs per batch'}), 400
+
+    # De-duplicate by normalized key, keeping the first spelling of each input
+    unique = {}
+    for value in inputs:
+        value = str(value).strip()
+        if value:
+            unique.setdefault(cache_key(value), value)
+
+    # One shared block sync and one batched get_code for every uncached contract
+    uncached_contracts = [value for key, value in unique.items()
+                          if is_contract_input(value) and verdict_cache.get(key) is None]
+    codes = contract_analyzer.prefetch(uncached_contracts)
+
+    # LLM calls for all items run concurrently on the batch pool
+    futures = {batch_pool.submit(check_input, value, codes.get(value)): value
+               for value in unique.values()}
+
+    if data.get('stream'):
+        def generate():
+            for future in as_completed(futures):
+                yield json.dumps({'input': futures[future], 'result': future.result()}, default=str) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    results = {futures[future]: future.result() for future in futures}
+    return jsonify({
+        'count': len(results),
+        'results': [{'input': value, 'result': results[value]} for value in unique.values()]
+    })
+
+def stage_event(stage, risk_score, details):
+    """One provisional /api/check/stream event."""
+    return {
+        'stage': stage,
+        'risk_score': risk_score,
+        'verdict': verdict_for(risk_score),
+        'details': details
+    }
+
+def contract_stages(address):
+    """Yield (stage, payload) as each step of a contract analysis finishes.
+
+    Stages are validation, bytecode, transactions, creation_block and finally
+    result, whose payload is the /api/check body. A decisive early stage
+    (invalid address, no code, malicious clone) skips straight to result.
+    Closing the generator skips the remaining stages.
+    """
+    try:
+        is_valid = contract_analyzer.w3.is_address(address)
+        yield 'validation', stage_event('validation', 0.5 if is_valid else 0.8, {'is_valid': is_valid})
+
+        verification = contract_analyzer.inspect_bytecode(address)
+        if not verification['is_valid']:
+            yield 'result', invalid_contract_result(verification)
+            return
+        clone = malicious_clone(verification)
+        if clone is not None:
+            yield 'result', clone_verdict(clone, verification)
+            return
+        yield 'bytecode', stage_event('bytecode', contract_risk(verification, {}), {
+            'bytecode_length': verification['bytecode_length'],
+            'risky_operations': verification['risky_operations'],
+            'bytecode_analysis': verification['bytecode_analysis'],
+            'similar_contracts': verification['similar_contracts']
+        })
+
+        # Search for the creation block while the transaction stages run
+        creation_block = contract_analyzer.fetcher.submit(contract_analyzer.get_contract_creation_block, address)
+        try:
+            verification['recent_transactions'] = contract_analyzer.recent_transaction_count(address)
+            tx_patterns = contract_analyzer.analyze_transaction_patterns(address)
+            risk_score = contract_risk(verification, tx_patterns)
+            yield 'transactions', stage_event('transactions', risk_score, {
+                'recent_transactions': verification['recent_transactions'],
+                'transaction_patterns': tx_patterns
+            })
+
+            verification['creation_block'] = creation_block.result()
+            yield 'creation_block', stage_event('creation_block', risk_score, {
+                'creation_block': verification['creation_block']
+            })
+        finally:
+            creation_block.cancel()
+
+        analysis = llm_client.complete(contract_messages(verification, tx_patterns))
+        yield 'result', contract_result(verification, tx_patterns, analysis)
+
+    except Exception as e:
+        yield 'result', {
+            'verdict': 'Error',
+            'risk_score': 0.5,
+            'explanation': f'Error analyzing contract: {str(e)}'
+        }
+
+def url_stages(url):
+    """Yield (stage, payload) for a URL: validation, then result."""
+    try:
+        triaged = url_triage.classify(url)
+        if triaged is not None:
+            yield 'result', triaged
+            return
+        yield 'validation', stage_event('validation', 0.5, {'triage': 'undecided'})
+
+        analysis = llm_client.complete(url_messages(url))
+        yield 'result', url_result(analysis)
+
+    except Exception as e:
+        yield 'result', {
+            'verdict': 'Error',
+            'risk_score': 0.5,
+            'explanation': f'Error analyzing URL: {str(e)}'
+        }
+
+def check_stages(input_value):
+    """Staged check_input(): cached and known-scam answers come back as one result event."""
+    key = cache_key(input_value)
+    cached = verdict_cache.get(key)
+    if cached is not None:
+        yield 'result', cached
+        return
+
+    if is_contract_input(input_value):
+        known_scam = scam_filter.is_known_scam_address(input_value)
+        stages = contract_stages(input_value)
     else:
-        result = analyze_url(input_value)
+        known_scam = scam_filter.is_known_scam_url(input_value)
+        stages = url_stages(input_value)
+    if known_scam:
+        yield 'result', known_scam_result(input_value)
+        return
 
-    return jsonify(result)
+    try:
+        for stage, payload in stages:
+            yield stage, payload
+            if stage == 'result' and payload.get('verdict') != 'Error':
+                verdict_cache.set(key, payload)
+    finally:
+        # Client went away: don't run the remaining stages
+        stages.close()
+
+@app.route('/api/check/stream', methods=['GET', 'POST'])
+def check_stream():
+    """/api/check as Server-Sent Events, one event per finished stage."""
+    if request.method == 'POST':
+        input_value = (request.get_json() or {}).get('input', '')
+    else:
+        # EventSource can only send GET requests
+        input_value = request.args.get('input', '')
+    input_value = input_value.strip()
+
+    if not input_value:
+        return jsonify({
+            'error': 'No input provided'
+        }), 400
+
+    def generate():
+        for stage, payload in check_stages(input_value):
+            yield f"event: {stage}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 def analyze_twitter_sentiment(query, limit=50):
     """Analyze Twitter sentiment about a project."""
     try:
-        tweets = twitter_api.search_tweets(q=query, count=limit)
-        
-        positive = 0
-        negative = 0
-        neutral = 0
-        links = set()
-        
-        for tweet in tweets:
-            analysis = TextBlob(tweet.text)
-            
-            # Extract safe links
-            for url in tweet.entities.get('urls', []):
-                if url.get('expanded_url'):
-                    links.add(url['expanded_url'])
-            
-            if analysis.sentiment.polarity > 0.1:
-                positive += 1
-            elif analysis.sentiment.polarity < -0.1:
-                negative += 1
-            else:
-                neutral += 1
-        
-        return {
-            'positive': positive,
-            'negative': negative,
-            'neutral': neutral,
-            'links': list(links),
-            'total': len(tweets)
-        }
+        with metrics.stage('social.analyze'):
+            return social_aggregator.analyze(query, limit)
     except Exception as e:
         return {'error': str(e)}
 
-@app.route('/api/social', methods=['POST'])
-def social_analysis():
-    data = request.get_json()
-    query = data.get('query', '')
-    
-    if not query:
-        return jsonify({'error': 'No query provided'}), 400
-    
-    twitter_data = analyze_twitter_sentiment(query)
-    
-    # Generate investment recommendation
+def social_recommendation(twitter_data):
+    """Investment recommendation text for an /api/social result."""
     if 'error' in twitter_data:
         recommendation = 'Unable to analyze social sentiment'
     elif twitter_data['total'] == 0:
@@ -256,7 +606,7 @@ def social_analysis():
     else:
         positive_ratio = twitter_data['positive'] / twitter_data['total']
         negative_ratio = twitter_data['negative'] / twitter_data['total']
-        
+    
         if positive_ratio > 0.7 and negative_ratio < 0.1:
             recommendation = 'Strong positive sentiment - Good investment'
         elif positive_ratio > negative_ratio:
@@ -266,11 +616,36 @@ def social_analysis():
         else:
             recommendation = 'Neutral sentiment - Do more research'
     
+        if twitter_data['trend'] in ('improving', 'declining'):
+            recommendation += f" (sentiment {twitter_data['trend']})"
+
+    return recommendation
+
+@app.route('/api/social', methods=['POST'])
+def social_analysis():
+    data = request.get_json()
+    query = data.get('query', '')
+    
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+    
+    try:
+        limit = min(int(data.get('limit', 50)), SOCIAL_MAX_LIMIT)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    twitter_data = analyze_twitter_sentiment(query, limit=max(limit, 1))
+    recommendation = social_recommendation(twitter_data)
+    
     return jsonify({
         'twitter': twitter_data,
         'recommendation': recommendation
     })
 
+# Build clients at boot instead of on the first request (e.g. with gunicorn --preload)
+if os.getenv('PRELOAD_CLIENTS', 'false').lower() == 'true':
+    preload()
+
 if __name__ == '__main__':
     app.run(host=os.getenv('HOST', '0.0.0.0'),
             port=int(os.getenv('PORT', 5000)),
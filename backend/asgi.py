@@ -0,0 +1,311 @@
+from quart import Quart, Response, g, request, jsonify
+from quart_cors import cors
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from backend.normalize import cache_key, is_contract_input
+from backend.metrics import metrics
+from backend.app import (
+    BATCH_MAX_ITEMS, SOCIAL_MAX_LIMIT, analyze_twitter_sentiment, check_stages, clone_verdict,
+    contract_analyzer, contract_messages, contract_result, invalid_contract_result,
+    known_scam_result, llm_client, malicious_clone, scam_filter, social_recommendation,
+    start_monitor, url_messages, url_result, url_triage, verdict_cache, watchlist, watchlist_monitor
+)
+
+# asyncio serving mode: same routes and responses as backend.app, but a
+# request waiting on the chain, OpenAI or Twitter doesn't hold a worker.
+# Run with e.g. `hypercorn backend.asgi:app --workers 4`.
+app = cors(Quart(__name__))
+
+# web3, tweepy and SQLite calls are blocking; they run on this pool while the
+# event loop serves other requests. OpenAI calls are natively async.
+ASYNC_BLOCKING_THREADS = int(os.getenv('ASYNC_BLOCKING_THREADS', 64))
+blocking_pool = ThreadPoolExecutor(max_workers=ASYNC_BLOCKING_THREADS, thread_name_prefix='async-blocking')
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 16))
+
+async def run_blocking(fn, *args, **kwargs):
+    # Carry the request's context along so stages timed on the pool join its trace
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        blocking_pool, partial(context.run, fn, *args, **kwargs))
+
+async def run_stage(name, fn, *args, **kwargs):
+    with metrics.stage(name):
+        return await run_blocking(fn, *args, **kwargs)
+
+async def analyze_contract(address, code=None):
+    """Async analyze_contract(): chain reads off the loop, GPT-4 awaited directly."""
+    try:
+        # The two chain reads don't depend on each other, so they overlap
+        verification, tx_patterns = await asyncio.gather(
+            run_stage('contract.verify', contract_analyzer.verify_contract, address, code=code),
+            run_stage('contract.transactions', contract_analyzer.analyze_transaction_patterns, address))
+
+        if not verification['is_valid']:
+            return invalid_contract_result(verification)
+
+        clone = malicious_clone(verification)
+        if clone is not None:
+            return clone_verdict(clone, verification)
+
+        with metrics.stage('contract.llm'):
+            analysis = await llm_client.acomplete(contract_messages(verification, tx_patterns))
+
+        return contract_result(verification, tx_patterns, analysis)
+
+    except Exception as e:
+        return {
+            'verdict': 'Error',
+            'risk_score': 0.5,
+            'explanation': f'Error analyzing contract: {str(e)}'
+        }
+
+async def analyze_url(url):
+    """Async analyze_url()."""
+    try:
+        with metrics.stage('url.triage'):
+            triaged = url_triage.classify(url)
+        if triaged is not None:
+            return triaged
+
+        with metrics.stage('url.llm'):
+            analysis = await llm_client.acomplete(url_messages(url))
+        return url_result(analysis)
+
+    except Exception as e:
+        return {
+            'verdict': 'Error',
+            'risk_score': 0.5,
+            'explanation': f'Error analyzing URL: {str(e)}'
+        }
+
+async def check_input(input_value, code=None):
+    """Async check_input(): shared verdict cache, single-flight across all workers."""
+    if is_contract_input(input_value):
+        if scam_filter.is_known_scam_address(input_value):
+            return known_scam_result(input_value)
+        analyze = lambda: analyze_contract(input_value, code=code)
+    else:
+        if scam_filter.is_known_scam_url(input_value):
+            return known_scam_result(input_value)
+        analyze = lambda: analyze_url(input_value)
+
+    key = cache_key(input_value)
+    cached = await run_blocking(verdict_cache.get, key)
+    if cached is not None:
+        return cached
+
+    loop = asyncio.get_running_loop()
+
+    def compute():
+        # Called on a worker thread by the lease holder; the analysis runs on
+        # the loop as its own task, so a client disconnecting doesn't cancel it
+        return asyncio.run_coroutine_threadsafe(analyze(), loop).result()
+
+    # Lease waits block a thread, so they use the default executor rather than
+    # blocking_pool, which the analysis itself needs
+    return await asyncio.to_thread(
+        verdict_cache.get_or_compute, key, compute,
+        cacheable=lambda r: r.get('verdict') != 'Error')
+
+@app.route('/api/check', methods=['POST'])
+async def check():
+    data = await request.get_json()
+    input_value = data.get('input', '').strip()
+
+    if not input_value:
+        return jsonify({
+            'error': 'No input provided'
+        }), 400
+
+    result = await check_input(input_value)
+    await run_blocking(metrics.inc, 'checks_total', verdict=result.get('verdict'))
+    return jsonify(result)
+
+@app.route('/api/check/batch', methods=['POST'])
+async def check_batch():
+    data = await request.get_json() or {}
+    inputs = data.get('inputs')
+
+    if not isinstance(inputs, list) or not inputs:
+        return jsonify({'error': 'No inputs provided'}), 400
+    if len(inputs) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'At most {BATCH_MAX_ITEMS} inputs per batch'}), 400
+
+    unique = {}
+    for value in inputs:
+        value = str(value).strip()
+        if value:
+            unique.setdefault(cache_key(value), value)
+
+    def prefetch():
+        uncached_contracts = [value for key, value in unique.items()
+                              if is_contract_input(value) and verdict_cache.get(key) is None]
+        return contract_analyzer.prefetch(uncached_contracts)
+
+    codes = await run_blocking(prefetch)
+
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def check_one(value):
+        async with limit:
+            return value, await check_input(value, codes.get(value))
+
+    tasks = [asyncio.ensure_future(check_one(value)) for value in unique.values()]
+
+    if data.get('stream'):
+        async def generate():
+            for finished in asyncio.as_completed(tasks):
+                value, result = await finished
+                yield (json.dumps({'input': value, 'result': result}, default=str) + '\n').encode()
+        return generate(), 200, {'Content-Type': 'application/x-ndjson'}
+
+    results = dict(await asyncio.gather(*tasks))
+    return jsonify({
+        'count': len(results),
+        'results': [{'input': value, 'result': results[value]} for value in unique.values()]
+    })
+
+@app.route('/api/check/stream', methods=['GET', 'POST'])
+async def check_stream():
+    """/api/check/stream: the staged check runs on the blocking pool, each stage sent as it finishes."""
+    if request.method == 'POST':
+        input_value = ((await request.get_json()) or {}).get('input', '')
+    else:
+        # EventSource can only send GET requests
+        input_value = request.args.get('input', '')
+    input_value = input_value.strip()
+
+    if not input_value:
+        return jsonify({
+            'error': 'No input provided'
+        }), 400
+
+    async def generate():
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            stages = check_stages(input_value)
+            try:
+                for event in stages:
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+                    if stop.is_set():
+                        break
+            finally:
+                # Client went away: don't run the remaining stages
+                stages.close()
+                loop.call_soon_threadsafe(events.put_nowait, None)
+
+        asyncio.ensure_future(run_blocking(produce))
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                stage, payload = event
+                yield f"event: {stage}\ndata: {json.dumps(payload, default=str)}\n\n".encode()
+        finally:
+            stop.set()
+
+    return generate(), 200, {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache',
+                             'X-Accel-Buffering': 'no'}
+
+@app.route('/api/social', methods=['POST'])
+async def social_analysis():
+    data = await request.get_json()
+    query = data.get('query', '')
+
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+
+    try:
+        limit = min(int(data.get('limit', 50)), SOCIAL_MAX_LIMIT)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid limit'}), 400
+
+    # analyze_twitter_sentiment times itself as the social.analyze stage
+    twitter_data = await run_blocking(analyze_twitter_sentiment, query, limit=max(limit, 1))
+
+    return jsonify({
+        'twitter': twitter_data,
+        'recommendation': social_recommendation(twitter_data)
+    })
+
+@app.route('/api/monitor/list', methods=['GET'])
+async def get_watchlist():
+    try:
+        return jsonify({
+            'status': 'success',
+            'data': await run_blocking(watchlist.all)
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Error retrieving watchlist: {str(e)}'
+        }), 500
+
+@app.route('/api/monitor/add', methods=['POST'])
+async def add_to_watchlist():
+    data = await request.get_json()
+    address = data.get('address')
+
+    if not address:
+        return jsonify({'status': 'error', 'message': 'No address provided'}), 400
+
+    await run_blocking(watchlist.add, address)
+    watchlist_monitor.watch(address)
+
+    return jsonify({'status': 'success'})
+
+@app.route('/api/monitor/remove', methods=['POST'])
+async def remove_from_watchlist():
+    data = await request.get_json()
+    address = data.get('address')
+
+    if not address:
+        return jsonify({'status': 'error', 'message': 'No address provided'}), 400
+
+    await run_blocking(watchlist.remove, address)
+    watchlist_monitor.unwatch(address)
+
+    return jsonify({'status': 'success'})
+
+@app.before_serving
+async def start_background():
+    # check_input holds a to_thread thread per analysis; size the pool like blocking_pool
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=ASYNC_BLOCKING_THREADS, thread_name_prefix='async-lease'))
+    # Here rather than at import, so only serving processes run the monitor
+    start_monitor()
+
+@app.after_serving
+async def stop_background():
+    await run_blocking(watchlist_monitor.stop)
+
+@app.before_request
+async def start_request_metrics():
+    g.started_at = time.perf_counter()
+    # Opt-in per-request stage breakdown, returned as a Server-Timing header
+    if request.headers.get('X-Safebase-Trace'):
+        metrics.start_trace()
+
+@app.after_request
+async def finish_request_metrics(response):
+    metrics.observe('request_seconds', time.perf_counter() - g.started_at,
+                    endpoint=request.endpoint or 'unknown', status=response.status_code)
+    stages = metrics.finish_trace()
+    if stages is not None:
+        response.headers['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.1f}' for name, seconds in stages)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+async def prometheus_metrics():
+    return Response(await run_blocking(metrics.render), mimetype='text/plain; version=0.0.4')
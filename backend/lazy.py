@@ -0,0 +1,49 @@
+import threading
+import time
+
+
+class LazyClient:
+    """Stand-in for a module-level client that is built on first use.
+
+    Attribute access is forwarded to the real object, which is created by
+    `factory` the first time it is needed. Heavy imports belong inside the
+    factory so importing the app stays cheap.
+    """
+
+    registry = []
+
+    def __init__(self, factory, name):
+        self._factory = factory
+        self._name = name
+        self._instance = None
+        self._lock = threading.Lock()
+        LazyClient.registry.append(self)
+
+    def resolve(self):
+        """Return the wrapped object, building it if necessary."""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def is_loaded(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f'<LazyClient {self._name} ({state})>'
+
+
+def preload(clients=None):
+    """Build every lazy client now; returns seconds spent per client."""
+    timings = {}
+    for client in clients or LazyClient.registry:
+        started = time.perf_counter()
+        client.resolve()
+        timings[client._name] = time.perf_counter() - started
+    return timings
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from backend.verdict_cache import VerdictCache
+
+
+class LLMClient:
+    """Chat completion client with response caching, deadlines and a token budget.
+
+    `complete()` returns None instead of raising when the call times out, fails
+    or the token budget for the current window is spent; callers fall back to
+    their rule-based scoring in that case.
+    """
+
+    def __init__(self, model='gpt-4', timeout=None, token_budget=None, budget_window=None):
+        self.model = model
+        self.timeout = timeout or float(os.getenv('LLM_TIMEOUT', 15))
+        # Tokens allowed per budget window; 0 disables the budget
+        self.token_budget = token_budget if token_budget is not None else int(os.getenv('LLM_TOKEN_BUDGET', 0))
+        self.budget_window = budget_window or float(os.getenv('LLM_BUDGET_WINDOW', 3600))
+        self.cache = VerdictCache(
+            path=os.getenv('LLM_CACHE_DB', 'llm_cache.sqlite3'),
+            ttl=float(os.getenv('LLM_CACHE_TTL', 86400)),
+            max_entries=int(os.getenv('LLM_CACHE_SIZE', 50000))
+        )
+        self._client = None
+        self._async_client = None
+        # Completions being computed by the async path, for in-process single-flight
+        self._inflight = {}
+        self._pool = ThreadPoolExecutor(max_workers=int(os.getenv('LLM_MAX_CONCURRENCY', 8)),
+                                        thread_name_prefix='llm')
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_tokens = 0
+        self.counters = {
+            'calls': 0,
+            'cache_hits': 0,
+            'timeouts': 0,
+            'errors': 0,
+            'budget_exhausted': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'latency_seconds_total': 0.0,
+        }
+
+    @property
+    def client(self):
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'),
+                                         timeout=self.timeout, max_retries=0)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            import openai
+            self._async_client = openai.AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'),
+                                                    timeout=self.timeout, max_retries=0)
+        return self._async_client
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _budget_available(self):
+        if not self.token_budget:
+            return True
+        with self._lock:
+            if time.time() - self._window_start >= self.budget_window:
+                self._window_start = time.time()
+                self._window_tokens = 0
+            return self._window_tokens < self.token_budget
+
+    def _spend(self, usage):
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        with self._lock:
+            self.counters['prompt_tokens'] += prompt_tokens
+            self.counters['completion_tokens'] += completion_tokens
+            self._window_tokens += prompt_tokens + completion_tokens
+
+    def cache_key(self, messages):
+        """Hash of the model and messages identifying one completion."""
+        payload = json.dumps({'model': self.model, 'messages': messages}, sort_keys=True)
+        return 'llm:' + hashlib.sha256(payload.encode()).hexdigest()
+
+    def _call(self, messages, timeout=None):
+        if not self._budget_available():
+            self._count('budget_exhausted')
+            return None
+
+        self._count('calls')
+        started = time.time()
+        future = self._pool.submit(self.client.chat.completions.create,
+                                   model=self.model, messages=messages)
+        try:
+            response = future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count('timeouts')
+            return None
+        except Exception as e:
+            print(f"Error calling {self.model}: {e}")
+            self._count('errors')
+            return None
+        finally:
+            self._count('latency_seconds_total', time.time() - started)
+
+        self._spend(response.usage)
+        return response.choices[0].message.content
+
+    def complete(self, messages):
+        """Return the completion text for `messages`, or None on timeout/budget/error."""
+        computed = []
+        deadline = time.time() + self.timeout
+
+        def compute():
+            computed.append(True)
+            # Waiting on another worker's call counts against our deadline too
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self._count('timeouts')
+                return {'content': None}
+            return {'content': self._call(messages, remaining)}
+
+        # get_or_compute looks the key up first; anything it didn't compute was cached
+        result = self.cache.get_or_compute(
+            self.cache_key(messages), compute,
+            cacheable=lambda r: r['content'] is not None,
+            wait_timeout=self.timeout
+        )
+        if not computed:
+            self._count('cache_hits')
+        return result['content']
+
+    async def _acall(self, messages):
+        if not self._budget_available():
+            self._count('budget_exhausted')
+            return None
+
+        self._count('calls')
+        started = time.time()
+        try:
+            response = await asyncio.wait_for(
+                self.async_client.chat.completions.create(model=self.model, messages=messages),
+                timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._count('timeouts')
+            return None
+        except Exception as e:
+            print(f"Error calling {self.model}: {e}")
+            self._count('errors')
+            return None
+        finally:
+            self._count('latency_seconds_total', time.time() - started)
+
+        self._spend(response.usage)
+        return response.choices[0].message.content
+
+    async def acomplete(self, messages):
+        """Async complete() for the asyncio server; no thread is held while waiting.
+
+        The SQLite cache is read and written on a worker thread, so a busy
+        write lock never stalls the event loop.
+        """
+        key = self.cache_key(messages)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            self._count('cache_hits')
+            return cached['content']
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                return await self.acomplete(messages)
+
+        pending = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            content = await self._acall(messages)
+            if content is not None:
+                await asyncio.to_thread(self.cache.set, key, {'content': content})
+            pending.set_result(content)
+            return content
+        except asyncio.CancelledError:
+            # The leader's request went away; followers retry on their own
+            pending.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self):
+        """Snapshot of token, latency and cache counters."""
+        with self._lock:
+            return dict(self.counters)
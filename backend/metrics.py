@@ -0,0 +1,192 @@
+import asyncio
+import bisect
+import contextvars
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from backend.storage import storage
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (stage, seconds) list of the current request while a trace is requested
+_trace = contextvars.ContextVar('metrics_trace', default=None)
+
+
+def series(name, labels):
+    """Prometheus series name, e.g. stage_seconds{stage="contract.verify"}."""
+    if not labels:
+        return name
+    pairs = ','.join('{}="{}"'.format(key, str(value).replace('\\', r'\\').replace('"', r'\"'))
+                     for key, value in sorted(labels.items()))
+    return f'{name}{{{pairs}}}'
+
+
+class Metrics:
+    """Counters and latency histograms for Prometheus, summed across workers.
+
+    Recording only updates this worker's in-memory totals. Every worker writes
+    its totals to shared storage at most once per METRICS_FLUSH_INTERVAL and
+    whenever it serves /metrics; render() adds up the latest totals of every
+    worker. Collectors registered with register() report counters that other
+    objects already keep (LLM usage, cache hits, RPC calls) at flush time.
+    """
+
+    def __init__(self, storage, prefix='safebase', flush_interval=None, retention=None):
+        self.storage = storage
+        self.prefix = prefix
+        self.flush_interval = flush_interval if flush_interval is not None else \
+            float(os.getenv('METRICS_FLUSH_INTERVAL', 10))
+        # Workers that stopped reporting this long ago drop out of the totals
+        self.retention = retention or float(os.getenv('METRICS_RETENTION', 86400))
+        self.collectors = []
+        self._lock = threading.Lock()
+        self._reset()
+
+        with self.storage.transaction() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS metrics_workers ('
+                'worker TEXT PRIMARY KEY, totals TEXT NOT NULL, updated_at REAL NOT NULL)'
+            )
+
+    def _reset(self):
+        # Keyed per process so workers forked from a preloading master report apart
+        self._pid = os.getpid()
+        self.worker = f'{socket.gethostname()}:{self._pid}:{time.time():.0f}'
+        self.counters = {}
+        # series -> [count per bucket..., count above the last bucket, sum]
+        self.histograms = {}
+        self._flushed_at = time.monotonic()
+
+    def register(self, collector):
+        """Add a callable returning [(name, labels, value)] counters."""
+        self.collectors.append(collector)
+
+    def inc(self, name, amount=1, **labels):
+        key = series(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, seconds, **labels):
+        key = series(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            histogram[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram[-1] += seconds
+        self._maybe_flush()
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block as stage `name`, and add it to the request trace if one is on."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe('stage_seconds', elapsed, stage=name)
+            trace = _trace.get()
+            if trace is not None:
+                trace.append((name, elapsed))
+
+    def start_trace(self):
+        _trace.set([])
+
+    def finish_trace(self):
+        """Stages timed since start_trace(), or None when no trace was started."""
+        trace = _trace.get()
+        _trace.set(None)
+        return trace
+
+    def _maybe_flush(self):
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._reset()
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+                return
+            # On the asyncio server the SQLite write must not block the event loop
+            self._flushed_at = time.monotonic()
+            loop.run_in_executor(None, self.flush)
+
+    def _totals(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: list(values) for key, values in self.histograms.items()}
+        for collector in self.collectors:
+            try:
+                for name, labels, value in collector():
+                    key = series(name, labels)
+                    counters[key] = counters.get(key, 0) + value
+            except Exception:
+                # A broken collector must not break requests or the scrape
+                continue
+        return {'counters': counters, 'histograms': histograms}
+
+    def flush(self):
+        """Publish this worker's totals to shared storage."""
+        self._flushed_at = time.monotonic()
+        with self.storage.transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO metrics_workers (worker, totals, updated_at) VALUES (?, ?, ?)',
+                (self.worker, json.dumps(self._totals()), time.time())
+            )
+
+    def render(self):
+        """Prometheus text exposition of the totals of every live worker."""
+        self.flush()
+        conn = self.storage.connect()
+        cutoff = time.time() - self.retention
+        with self.storage.transaction() as write:
+            write.execute('DELETE FROM metrics_workers WHERE updated_at < ?', (cutoff,))
+        rows = conn.execute('SELECT totals FROM metrics_workers').fetchall()
+
+        counters, histograms = {}, {}
+        for (totals,) in rows:
+            totals = json.loads(totals)
+            for key, value in totals['counters'].items():
+                counters[key] = counters.get(key, 0) + value
+            for key, values in totals['histograms'].items():
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+
+        lines = [f'# TYPE {self.prefix}_workers gauge', f'{self.prefix}_workers {len(rows)}']
+        typed = set()
+        for key in sorted(counters):
+            name = key.split('{')[0]
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {self.prefix}_{name} counter')
+            lines.append(f'{self.prefix}_{key} {counters[key]}')
+
+        for key in sorted(histograms):
+            name, _, labels = key.partition('{')
+            labels = labels.rstrip('}')
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {self.prefix}_{name} histogram')
+            values = histograms[key]
+            cumulative = 0
+            for bound, count in zip(list(LATENCY_BUCKETS) + ['+Inf'], values[:-1]):
+                cumulative += count
+                le = ','.join(filter(None, [labels, f'le="{bound}"']))
+                lines.append(f'{self.prefix}_{name}_bucket{{{le}}} {cumulative}')
+            suffix = f'{{{labels}}}' if labels else ''
+            lines.append(f'{self.prefix}_{name}_sum{suffix} {values[-1]}')
+            lines.append(f'{self.prefix}_{name}_count{suffix} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# Shared by the app, the subscription checks and the asyncio server
+metrics = Metrics(storage)
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+class WatchlistMonitor:
+    """Background block follower that raises alerts for watched addresses.
+
+    Each new block is fetched exactly once and every transaction is matched
+    against one set of lowercased watched addresses, so the cost per block is
+    O(transactions) no matter how many addresses are watched. Fetched blocks
+    are also handed to the shared block cache for contract analysis.
+
+    Every worker runs a monitor, but only the one holding the shared lease
+    follows blocks, so alerts are recorded once.
+    """
+
+    LEASE_NAME = 'watchlist-monitor'
+
+    def __init__(self, analyzer, watchlist, poll_interval=None, max_catchup=None):
+        # The analyzer supplies the Base client, batch fetcher and block cache;
+        # it is only touched once polling starts.
+        self.analyzer = analyzer
+        self.watchlist = watchlist
+        self.poll_interval = poll_interval or float(os.getenv('MONITOR_POLL_INTERVAL', 1.0))
+        self.max_catchup = max_catchup or int(os.getenv('MONITOR_MAX_CATCHUP', 300))
+        # Long enough to outlast a slow poll; renewed while blocks are processed
+        self.lease_ttl = max(float(os.getenv('MONITOR_LEASE_TTL', 30)), self.poll_interval * 5)
+        self._lease_renewed_at = 0.0
+        self.owner = uuid.uuid4().hex
+        # Lowercased address -> watchlist key as the user entered it
+        self.watched = {}
+        self._watched_version = None
+        self.last_block = None
+        self._pending_alerts = []
+        # Lowercased address -> (block, tx, direction) for the stored histories
+        self._pending_history = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Request threads may all call start() at once
+        self._start_lock = threading.Lock()
+
+    def watch(self, address):
+        with self._lock:
+            self.watched[address.lower()] = address
+
+    def unwatch(self, address):
+        with self._lock:
+            self.watched.pop(address.lower(), None)
+
+    def refresh(self):
+        """Reload the watched set when another worker changed the watchlist."""
+        version = self.watchlist.version()
+        if version == self._watched_version:
+            return
+        addresses = self.watchlist.addresses()
+        with self._lock:
+            self.watched = {address.lower(): address for address in addresses}
+            self._watched_version = version
+
+    def _alert(self, key, number, tx, direction):
+        self._pending_alerts.append((key, {
+            'block': number,
+            'tx_hash': tx['hash'].hex() if hasattr(tx['hash'], 'hex') else tx['hash'],
+            'direction': direction,
+            'from': tx['from'],
+            'to': tx['to'],
+            'value_wei': tx['value'],
+            'detected_at': str(datetime.now())
+        }))
+
+    def process_block(self, number, block):
+        """Match every transaction in `block` against the watched set."""
+        with self._lock:
+            watched = self.watched
+            if not watched:
+                return
+            for tx in block.transactions:
+                sender = tx['from'].lower() if tx['from'] else None
+                recipient = tx['to'].lower() if tx['to'] else None
+                if recipient in watched:
+                    self._alert(watched[recipient], number, tx, 'in')
+                    self._pending_history.setdefault(recipient, []).append((number, tx, 'in'))
+                if sender in watched and sender != recipient:
+                    self._alert(watched[sender], number, tx, 'out')
+                    self._pending_history.setdefault(sender, []).append((number, tx, 'out'))
+
+    def poll_once(self):
+        """Fetch and process every block produced since the last poll."""
+        self.refresh()
+        if not self.watched:
+            # Nothing to match; don't build the chain client or fetch blocks
+            self.last_block = None
+            return 0
+
+        w3 = self.analyzer.w3
+        head = w3.eth.block_number
+        if self.last_block is None:
+            self.last_block = head - 1
+        if head <= self.last_block:
+            return 0
+
+        # Don't try to replay a long outage block by block
+        start = max(self.last_block + 1, head - self.max_catchup + 1)
+        numbers = list(range(start, head + 1))
+
+        fetched = self.analyzer.fetcher.get_blocks(numbers, True)
+
+        blocks = {}
+        for number in numbers:
+            block = fetched.get(number)
+            if block is None:
+                # Not available from the node yet; retried on the next poll
+                break
+            if not self._renew_lease():
+                # Another worker took over; it follows from here
+                break
+            self.analyzer.block_cache.add_block(number, block)
+            self.process_block(number, block)
+            blocks[number] = block
+            self.last_block = number
+
+        # Extend watched contracts' deep history from the matches found above;
+        # only addresses seen in these blocks are touched
+        history, self._pending_history = self._pending_history, {}
+        if blocks:
+            self.analyzer.tx_store.record_blocks(history, min(blocks), max(blocks))
+
+        # One write transaction for every alert found in this poll
+        alerts, self._pending_alerts = self._pending_alerts, []
+        self.watchlist.add_alerts(alerts)
+
+        return len(blocks)
+
+    def _acquire_lease(self):
+        if not self.watchlist.storage.try_lease(self.LEASE_NAME, self.owner, self.lease_ttl):
+            return False
+        self._lease_renewed_at = time.monotonic()
+        return True
+
+    def _renew_lease(self):
+        """Extend the lease during a long poll; False once another worker holds it."""
+        if time.monotonic() - self._lease_renewed_at < self.lease_ttl / 3:
+            return True
+        return self._acquire_lease()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self._acquire_lease():
+                    self.poll_once()
+                else:
+                    # Another worker is following; start from the head if we take over
+                    self.last_block = None
+            except Exception as e:
+                print(f"Error following blocks: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='watchlist-monitor', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,49 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def is_contract_input(value):
+    """Same split check() uses: anything starting with 0x is a contract."""
+    return value.startswith('0x')
+
+
+def normalize_address(address):
+    """Checksum an address, leaving malformed input untouched."""
+    from web3 import Web3
+    if Web3.is_address(address):
+        return Web3.to_checksum_address(address)
+    return address
+
+
+def canonicalize_url(url):
+    """Reduce equivalent spellings of a URL to one form.
+
+    Lowercases scheme and host, assumes http:// when no scheme is given, drops
+    default ports, fragments and trailing slashes, and sorts query parameters.
+    """
+    url = url.strip()
+    if '://' not in url:
+        url = 'http://' + url
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f'{host}:{port}'
+
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def cache_key(value):
+    """Normalized key identifying one /api/check input."""
+    value = value.strip()
+    if is_contract_input(value):
+        return 'contract:' + normalize_address(value)
+    return 'url:' + canonicalize_url(value)
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class _WindowState:
+    """Sliding-window counter state for one key: three integers."""
+
+    __slots__ = ('window', 'prev', 'curr')
+
+    def __init__(self, window, prev=0, curr=0):
+        self.window = window
+        self.prev = prev
+        self.curr = curr
+
+    def advance(self, window):
+        """Roll the counters forward to `window`."""
+        if window == self.window:
+            return
+        self.prev = self.curr if window == self.window + 1 else 0
+        self.curr = 0
+        self.window = window
+
+    def try_consume(self, now, limit, period):
+        """Count one request if the sliding-window estimate is under `limit`.
+
+        The estimate weights the previous fixed window by how much of it still
+        overlaps the sliding window, which keeps the state O(1) per key.
+        """
+        window = int(now // period)
+        self.advance(window)
+        overlap = 1.0 - (now - window * period) / period
+        if self.prev * overlap + self.curr >= limit:
+            return False
+        self.curr += 1
+        return True
+
+
+class MemoryRateStore:
+    """In-process state for one tier, bounded in size and expiring idle keys.
+
+    Keys are kept in last-use order, so expired keys are always at the front
+    and are dropped a few at a time on each call.
+    """
+
+    def __init__(self, period, max_keys):
+        self.period = period
+        self.max_keys = max_keys
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, limit, now):
+        window = int(now // self.period)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = _WindowState(window)
+                self._states[key] = state
+            else:
+                self._states.move_to_end(key)
+            allowed = state.try_consume(now, limit, self.period)
+            self._expire(window)
+            return allowed
+
+    def _expire(self, window, budget=8):
+        # A key idle for two full windows has nothing left to count
+        while budget and self._states:
+            oldest_key, oldest = next(iter(self._states.items()))
+            if oldest.window >= window - 1 and len(self._states) <= self.max_keys:
+                break
+            del self._states[oldest_key]
+            budget -= 1
+
+    def __len__(self):
+        return len(self._states)
+
+
+class SQLiteRateStore:
+    """Rate limit state for one tier in shared storage, seen by every worker."""
+
+    def __init__(self, storage, tier, period):
+        self.storage = storage
+        self.tier = tier
+        self.period = period
+        self._calls = 0
+
+    def consume(self, key, limit, now):
+        window = int(now // self.period)
+        with self.storage.transaction() as conn:
+            row = conn.execute(
+                'SELECT window_index, prev, curr FROM rate_limits WHERE tier = ? AND key = ?',
+                (self.tier, key)
+            ).fetchone()
+            state = _WindowState(*row) if row else _WindowState(window)
+            allowed = state.try_consume(now, limit, self.period)
+            if allowed or row is None or state.window != row[0]:
+                conn.execute(
+                    'INSERT OR REPLACE INTO rate_limits (tier, key, window_index, prev, curr) VALUES (?, ?, ?, ?, ?)',
+                    (self.tier, key, state.window, state.prev, state.curr)
+                )
+
+        # Expire idle keys now and then
+        self._calls += 1
+        if self._calls % 1000 == 0:
+            with self.storage.transaction() as conn:
+                conn.execute('DELETE FROM rate_limits WHERE tier = ? AND window_index < ?',
+                             (self.tier, window - 1))
+        return allowed
+
+
+def default_limits():
+    """Per-tier (limit, period seconds) from RATE_LIMIT_<TIER>[_PERIOD]; 0 means unlimited."""
+    defaults = {'free': (3, 86400), 'pro': (0, 3600), 'elite': (0, 3600)}
+    limits = {}
+    for tier, (limit, period) in defaults.items():
+        limit = int(os.getenv(f'RATE_LIMIT_{tier.upper()}', limit))
+        period = float(os.getenv(f'RATE_LIMIT_{tier.upper()}_PERIOD', period))
+        if limit:
+            limits[tier] = (limit, period)
+    return limits
+
+
+class RateLimiter:
+    """Sliding-window request limiter with per-tier limits.
+
+    Uses shared storage by default so limits hold across gunicorn workers;
+    RATE_LIMIT_BACKEND=memory keeps state in-process instead.
+    """
+
+    def __init__(self, limits=None, storage=None, backend=None, max_keys=None):
+        self.limits = limits if limits is not None else default_limits()
+        backend = backend or os.getenv('RATE_LIMIT_BACKEND', 'sqlite')
+        max_keys = max_keys or int(os.getenv('RATE_LIMIT_MAX_KEYS', 1000000))
+        self.stores = {}
+        for tier, (limit, period) in self.limits.items():
+            if backend == 'memory' or storage is None:
+                self.stores[tier] = MemoryRateStore(period, max_keys)
+            else:
+                self.stores[tier] = SQLiteRateStore(storage, tier, period)
+
+    def allow(self, tier, key, now=None):
+        """Count one request from `key` on `tier`; False if it is over the limit."""
+        if tier not in self.limits:
+            return True
+        limit, _ = self.limits[tier]
+        return self.stores[tier].consume(key, limit, time.time() if now is None else now)
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from ..subscription import subscription_service, require_subscription, subscription_contract
+from ..subscription import subscription_service, require_subscription, subscription_contract, w3
 import os
 
 subscription_bp = Blueprint('subscription', __name__)
@@ -30,10 +30,17 @@ def cancel_subscription():
             return jsonify({'error': 'User address is required'}), 400
 
         try:
-            subscription_contract.functions.cancelSubscription().transact({
+            tx_hash = subscription_contract.functions.cancelSubscription().transact({
                 'from': user_address
             })
-            return jsonify({'status': 'success'})
+            # Invalidating before the tx is mined would just re-cache the old status
+            receipt = w3.eth.wait_for_transaction_receipt(
+                tx_hash, timeout=float(os.getenv('SUBSCRIPTION_RECEIPT_TIMEOUT', 120)))
+            if receipt['status'] != 1:
+                return jsonify({'error': 'Cancellation transaction failed',
+                                'tx_hash': tx_hash.hex()}), 500
+            subscription_service.invalidate_subscription_status(user_address)
+            return jsonify({'status': 'success', 'tx_hash': tx_hash.hex()})
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,191 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from backend.url_triage import URLTriage
+
+# File layout, all integers little-endian:
+#   header   MAGIC, version, hash count k, bucket bits, bloom bit count m, entry count n
+#   bloom    m bits
+#   buckets  (2**bucket_bits + 1) uint64 entry offsets into the digest table
+#   digests  n sorted 16-byte blake2b digests, one per normalized key
+MAGIC = b'SBSF'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQQ')
+DIGEST_SIZE = 16
+OFFSET = struct.Struct('<Q')
+
+
+def digest(key):
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+def bloom_positions(key_digest, k, m):
+    """k bit positions from one digest (Kirsch-Mitzenmacher double hashing)."""
+    h1 = int.from_bytes(key_digest[:8], 'little')
+    h2 = int.from_bytes(key_digest[8:], 'little') | 1
+    return [(h1 + i * h2) % m for i in range(k)]
+
+
+def address_key(address):
+    return 'address:' + address.strip().lower()
+
+
+def domain_key(host):
+    return 'domain:' + host
+
+
+def domain_keys(url):
+    """Keys for the URL's host and every parent domain, so listing a domain covers its subdomains."""
+    labels = URLTriage.host_of(url).split('.')
+    return [domain_key('.'.join(labels[i:])) for i in range(len(labels) - 1)]
+
+
+def build_filter(keys, path, fp_rate=0.001):
+    """Write a filter holding `keys` to `path`, replacing any existing file atomically."""
+    digests = sorted({digest(key) for key in keys})
+    n = len(digests)
+    m = max(64, int(-n * math.log(fp_rate) / (math.log(2) ** 2)))
+    k = max(1, round(m / max(n, 1) * math.log(2)))
+    # About four entries per bucket keeps each exact lookup to a couple of probes
+    bucket_bits = max(0, min(32, (max(n, 1) // 4).bit_length()))
+
+    bloom = bytearray((m + 7) // 8)
+    for d in digests:
+        for position in bloom_positions(d, k, m):
+            bloom[position >> 3] |= 1 << (position & 7)
+
+    buckets = [0] * ((1 << bucket_bits) + 1)
+    for d in digests:
+        buckets[(int.from_bytes(d[:4], 'big') >> (32 - bucket_bits)) + 1] += 1
+    for i in range(1, len(buckets)):
+        buckets[i] += buckets[i - 1]
+
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, k, bucket_bits, m, n))
+        f.write(bloom)
+        f.write(struct.pack(f'<{len(buckets)}Q', *buckets))
+        for d in digests:
+            f.write(d)
+    os.replace(tmp_path, path)
+    return {'entries': n, 'bits': m, 'hashes': k, 'bytes': os.path.getsize(path)}
+
+
+class ScamFilter:
+    """Membership test for known scam addresses and phishing domains.
+
+    The filter file is memory-mapped read-only, so every worker shares the
+    same page-cache copy and opening it costs nothing up front. A Bloom
+    filter rejects most clean inputs with k bit probes; hits are confirmed
+    against the exact digest table through a bucket index. Rebuilt files are
+    picked up within `reload_interval` seconds. A missing or corrupt file
+    leaves the filter unavailable, so every lookup answers False.
+    """
+
+    def __init__(self, path=None, reload_interval=None):
+        self.path = path or os.getenv('SCAM_FILTER_PATH', 'scam_filter.bin')
+        self.reload_interval = reload_interval if reload_interval is not None else \
+            float(os.getenv('SCAM_FILTER_RELOAD', 60))
+        self._map = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.error = None
+
+    def _load(self):
+        """Map the file and check its header and layout against its size."""
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(mapped) < HEADER.size:
+                raise ValueError(f'truncated header ({len(mapped)} bytes)')
+            magic, version, k, bucket_bits, m, n = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f'not a version {VERSION} scam filter file')
+            if k < 1 or m < 1 or bucket_bits > 32:
+                raise ValueError(f'bad parameters k={k} m={m} bucket_bits={bucket_bits}')
+            bloom_start = HEADER.size
+            buckets_start = bloom_start + (m + 7) // 8
+            digests_start = buckets_start + ((1 << bucket_bits) + 1) * OFFSET.size
+            expected = digests_start + n * DIGEST_SIZE
+            if len(mapped) != expected:
+                raise ValueError(f'{len(mapped)} bytes, expected {expected} for {n} entries')
+            first = OFFSET.unpack_from(mapped, buckets_start)[0]
+            last = OFFSET.unpack_from(mapped, digests_start - OFFSET.size)[0]
+            if first != 0 or last != n:
+                raise ValueError('bucket index does not cover the digest table')
+        except ValueError:
+            mapped.close()
+            raise
+        # Readers holding the old map keep a valid view; it is freed once unused
+        return (mapped, k, bucket_bits, m, n, bloom_start, buckets_start, digests_start)
+
+    def _open(self):
+        """Map the current file, remapping it when it was replaced since the last check."""
+        now = time.monotonic()
+        if self._checked_at and now - self._checked_at < self.reload_interval:
+            return self._map
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                self._map, self._stamp = None, None
+                return None
+            stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if stamp != self._stamp:
+                # A bad file is reported once and left unused until it is replaced
+                self._stamp = stamp
+                try:
+                    self._map = self._load()
+                    self.error = None
+                except (OSError, ValueError) as e:
+                    print(f"Error loading scam filter {self.path}, filter unavailable: {e}")
+                    self._map = None
+                    self.error = str(e)
+            return self._map
+
+    def __contains__(self, key):
+        mapped = self._open()
+        if mapped is None:
+            return False
+        data, k, bucket_bits, m, n, bloom_start, buckets_start, digests_start = mapped
+
+        key_digest = digest(key)
+        for position in bloom_positions(key_digest, k, m):
+            if not data[bloom_start + (position >> 3)] & (1 << (position & 7)):
+                return False
+
+        # Exact check inside the digest's bucket
+        bucket = int.from_bytes(key_digest[:4], 'big') >> (32 - bucket_bits)
+        lo = OFFSET.unpack_from(data, buckets_start + bucket * OFFSET.size)[0]
+        hi = OFFSET.unpack_from(data, buckets_start + (bucket + 1) * OFFSET.size)[0]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = digests_start + mid * DIGEST_SIZE
+            candidate = data[start:start + DIGEST_SIZE]
+            if candidate == key_digest:
+                return True
+            if candidate < key_digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    def is_known_scam_address(self, address):
+        return address_key(address) in self
+
+    def is_known_scam_url(self, url):
+        return any(key in self for key in domain_keys(url))
+
+    def stats(self):
+        mapped = self._open()
+        if mapped is None:
+            return {'path': self.path, 'loaded': False, 'error': self.error}
+        _, k, _, m, n, _, _, _ = mapped
+        return {'path': self.path, 'loaded': True, 'entries': n, 'bits': m, 'hashes': k}
@@ -0,0 +1,181 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Same thresholds analyze_twitter_sentiment has always used
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+NEGATIONS = ('no', 'not', "n't", 'never')
+NEGATION_FACTOR = -0.5
+EXCLAMATION_BOOST = 1.25
+SARCASM = '(!)'
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def load_lexicon():
+    """Load TextBlob's pattern lexicon into plain lookups (once per process).
+
+    Returns (tokenize, words, emoticons): tokenize is pattern's own tokenizer,
+    words maps a word to (polarity, subjectivity, intensity, is_modifier) and
+    emoticons maps a lowercased emoticon to its polarity.
+    """
+    global _lexicon
+    if _lexicon is not None:
+        return _lexicon
+
+    with _lexicon_lock:
+        if _lexicon is not None:
+            return _lexicon
+
+        from textblob._text import EMOTICONS, PUNCTUATION
+        from textblob.en import sentiment as pattern_sentiment
+        pattern_sentiment.load()
+
+        words = {}
+        for word, senses in dict.items(pattern_sentiment):
+            if None in senses:
+                polarity, subjectivity, intensity = senses[None]
+                words[word] = (polarity, subjectivity, intensity, 'RB' in senses)
+
+        # Same eligibility test and first-match order as pattern's emoticon scan
+        emoticons = {}
+        for (_, polarity), faces in EMOTICONS.items():
+            for face in faces:
+                face = face.lower()
+                if not face.isalpha() and len(face) <= 5 and face not in PUNCTUATION:
+                    emoticons.setdefault(face, polarity)
+
+        _lexicon = (pattern_sentiment.tokenizer, words, emoticons)
+        return _lexicon
+
+
+def assess(tokens, words, emoticons):
+    """Polarity of one tokenized text, following pattern's assessments().
+
+    A known word starts a chunk; a preceding modifier ("very good") multiplies
+    it by the modifier's intensity and a negation ("not very good"), which
+    carries across short words and modifiers, scales the chunk by -0.5. "!"
+    boosts the previous chunk and emoticons count as chunks of their own.
+    """
+    chunks = []  # [polarity, intensity, negated]
+    modifier = None
+    negation = None
+    for word in tokens:
+        known = words.get(word)
+        if known is not None:
+            polarity, _, intensity, is_modifier = known
+            if modifier is None:
+                chunks.append([polarity, intensity, False])
+            else:
+                chunk = chunks[-1]
+                chunk[0] = max(-1.0, min(polarity * chunk[1], 1.0))
+                chunk[1] = intensity
+            if negation is not None:
+                chunks[-1][1] = 1.0 / chunks[-1][1]
+                chunks[-1][2] = True
+            modifier = word if is_modifier else None
+            negation = word if word in NEGATIONS else None
+            continue
+
+        if word in NEGATIONS:
+            negation = word
+        elif negation and len(word.strip("'")) > 1:
+            negation = None
+        # "really not good": the negation joins the modifier's chunk
+        if negation is not None and modifier is not None and modifier.endswith('ly'):
+            chunks[-1][2] = True
+            negation = None
+        elif modifier and len(word) > 2:
+            modifier = None
+        if word == '!' and chunks:
+            chunks[-1][0] = max(-1.0, min(chunks[-1][0] * EXCLAMATION_BOOST, 1.0))
+        if word == SARCASM:
+            chunks.append([0.0, 1.0, False])
+        polarity = emoticons.get(word)
+        if polarity is not None:
+            chunks.append([polarity, 1.0, False])
+
+    total = 0.0
+    for polarity, _, negated in chunks:
+        total += polarity * NEGATION_FACTOR if negated else polarity
+    return total / float(len(chunks) or 1)
+
+
+def score_texts(texts):
+    """Polarity in [-1, 1] for each text, matching TextBlob's PatternAnalyzer.
+
+    A plain per-text loop: pattern's negation and modifier state carries
+    from token to token, so it is not expressed as array operations.
+    Repeated texts (retweets, copy-paste spam) are scored once.
+    """
+    tokenize, words, emoticons = load_lexicon()
+    scored = {}
+    scores = np.zeros(len(texts))
+    for i, text in enumerate(texts):
+        score = scored.get(text)
+        if score is None:
+            tokens = ' '.join(tokenize(text)).lower().split()
+            score = scored[text] = assess(tokens, words, emoticons)
+        scores[i] = score
+    return scores
+
+
+class SentimentEngine:
+    """Batch tweet scorer with a per-tweet-id cache and optional process pool."""
+
+    def __init__(self, cache_size=None, processes=None, pool_threshold=None):
+        self.cache_size = cache_size or int(os.getenv('SENTIMENT_CACHE_SIZE', 100000))
+        self.processes = processes if processes is not None else int(os.getenv('SENTIMENT_PROCESSES', 0))
+        self.pool_threshold = pool_threshold or int(os.getenv('SENTIMENT_POOL_THRESHOLD', 5000))
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _score(self, texts):
+        if self.processes > 1 and len(texts) >= self.pool_threshold:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes)
+            size = -(-len(texts) // self.processes)
+            chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+            return np.concatenate(list(self._pool.map(score_texts, chunks)))
+        return score_texts(texts)
+
+    def score_tweets(self, tweets):
+        """Polarity for each tweet, reusing scores of tweets seen before."""
+        scores = np.zeros(len(tweets))
+        missing = []
+        with self._lock:
+            for i, tweet in enumerate(tweets):
+                cached = self._cache.get(tweet.id)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(tweet.id)
+                    scores[i] = cached
+
+        if missing:
+            fresh = self._score([tweets[i].text for i in missing])
+            scores[missing] = fresh
+            with self._lock:
+                for i, score in zip(missing, fresh):
+                    self._cache[tweets[i].id] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def classify(self, tweets):
+        """Positive/negative/neutral counts using the usual ±0.1 thresholds."""
+        scores = self.score_tweets(tweets)
+        positive = int((scores > POSITIVE_THRESHOLD).sum())
+        negative = int((scores < NEGATIVE_THRESHOLD).sum())
+        return {
+            'positive': positive,
+            'negative': negative,
+            'neutral': len(scores) - positive - negative
+        }
@@ -0,0 +1,261 @@
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+
+class SocialAggregator:
+    """Rolling per-query sentiment aggregates kept in shared storage.
+
+    Each refresh asks Twitter only for tweets newer than the stored since_id,
+    scores them, and adds them to hourly buckets. Buckets and links older than
+    the window roll off, so totals always describe the last SOCIAL_WINDOW_SECONDS.
+
+    A refresh fetches at most `limit` tweets. When more than that arrived since
+    the last one, the unfetched id range is kept as a gap and filled by later
+    refreshes, so no tweet in the window is skipped or counted twice. Queries
+    nobody has asked about for a whole window are dropped.
+    """
+
+    def __init__(self, storage, twitter_api, sentiment_engine, bucket_seconds=None,
+                 window_seconds=None, refresh_seconds=None):
+        self.storage = storage
+        self.twitter_api = twitter_api
+        self.sentiment_engine = sentiment_engine
+        self.bucket_seconds = bucket_seconds or int(os.getenv('SOCIAL_BUCKET_SECONDS', 3600))
+        self.window_seconds = window_seconds or int(os.getenv('SOCIAL_WINDOW_SECONDS', 7 * 86400))
+        # Requests within this interval reuse the stored aggregate without an API call
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else \
+            float(os.getenv('SOCIAL_REFRESH_SECONDS', 30))
+        self.owner = uuid.uuid4().hex
+        self._pruned_at = 0.0
+
+        with self.storage.transaction() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS social_queries ('
+                'query TEXT PRIMARY KEY, since_id INTEGER, refreshed_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS social_buckets ('
+                'query TEXT NOT NULL, bucket INTEGER NOT NULL, positive INTEGER NOT NULL, '
+                'negative INTEGER NOT NULL, neutral INTEGER NOT NULL, PRIMARY KEY (query, bucket))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS social_links ('
+                'query TEXT NOT NULL, link TEXT NOT NULL, bucket INTEGER NOT NULL, PRIMARY KEY (query, link))'
+            )
+            # Tweets with since_id < id <= max_id not fetched yet, all older than newer_than
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS social_gaps ('
+                'query TEXT NOT NULL, since_id INTEGER NOT NULL, max_id INTEGER NOT NULL, '
+                'newer_than REAL NOT NULL, PRIMARY KEY (query, max_id))'
+            )
+
+    def _bucket(self, timestamp):
+        return int(timestamp // self.bucket_seconds)
+
+    def _oldest_bucket(self, now):
+        return self._bucket(now) - self.window_seconds // self.bucket_seconds + 1
+
+    def fetch_new(self, query, since_id, limit, max_id=None):
+        """Fetch up to `limit` tweets with since_id < id <= max_id, newest first.
+
+        Returns (tweets, complete); complete is False when `limit` ran out
+        before paging reached since_id.
+        """
+        tweets = []
+        while len(tweets) < limit:
+            kwargs = {'q': query, 'count': min(limit - len(tweets), 100)}
+            if since_id:
+                kwargs['since_id'] = since_id
+            if max_id:
+                kwargs['max_id'] = max_id
+            page = list(self.twitter_api.search_tweets(**kwargs))
+            if not page:
+                return tweets, True
+            tweets.extend(page)
+            max_id = min(tweet.id for tweet in page) - 1
+            if len(page) < kwargs['count']:
+                return tweets, True
+        return tweets, False
+
+    def refresh(self, query, limit):
+        """Pull new tweets for `query` into the rolling aggregate."""
+        now = time.time()
+        conn = self.storage.connect()
+        row = conn.execute(
+            'SELECT since_id, refreshed_at FROM social_queries WHERE query = ?', (query,)
+        ).fetchone()
+        since_id, refreshed_at = row if row else (None, 0)
+        if now - refreshed_at < self.refresh_seconds:
+            return 0
+
+        # Only one worker refreshes a query at a time; the rest read the aggregate
+        lease = f'social:{query}'
+        if not self.storage.try_lease(lease, self.owner, 60):
+            return 0
+        try:
+            return self._refresh(query, since_id, limit, now)
+        finally:
+            self.storage.release_lease(lease, self.owner)
+
+    def _created_at(self, tweet, now):
+        created_at = getattr(tweet, 'created_at', None)
+        return created_at.timestamp() if created_at else now
+
+    def _add_gap(self, gaps, since_id, fetched, now):
+        # Ids between since_id and the oldest tweet fetched are still missing
+        max_id = min(tweet.id for tweet in fetched) - 1
+        if max_id > since_id:
+            gaps[max_id] = (since_id, min(self._created_at(tweet, now) for tweet in fetched))
+
+    def _refresh(self, query, since_id, limit, now):
+        from backend.sentiment import POSITIVE_THRESHOLD, NEGATIVE_THRESHOLD
+
+        oldest = self._oldest_bucket(now)
+        window_start = oldest * self.bucket_seconds
+
+        # Newest tweets first, then whatever budget is left goes to older gaps
+        tweets, complete = self.fetch_new(query, since_id, limit)
+        gaps = {}
+        if since_id and not complete:
+            self._add_gap(gaps, since_id, tweets, now)
+        filled = []
+        conn = self.storage.connect()
+        for gap_since, gap_max, newer_than in conn.execute(
+                'SELECT since_id, max_id, newer_than FROM social_gaps WHERE query = ? ORDER BY max_id DESC',
+                (query,)).fetchall():
+            filled.append(gap_max)
+            # Everything in the gap is older than newer_than; past the window it can go
+            if newer_than < window_start:
+                continue
+            if len(tweets) >= limit:
+                gaps[gap_max] = (gap_since, newer_than)
+                continue
+            found, complete = self.fetch_new(query, gap_since, limit - len(tweets), max_id=gap_max)
+            tweets.extend(found)
+            if found and not complete:
+                self._add_gap(gaps, gap_since, found, now)
+
+        scores = self.sentiment_engine.score_tweets(tweets) if tweets else []
+
+        buckets = {}
+        links = {}
+        for tweet, score in zip(tweets, scores):
+            bucket = self._bucket(self._created_at(tweet, now))
+            counts = buckets.setdefault(bucket, [0, 0, 0])
+            if score > POSITIVE_THRESHOLD:
+                counts[0] += 1
+            elif score < NEGATIVE_THRESHOLD:
+                counts[1] += 1
+            else:
+                counts[2] += 1
+
+            # Extract safe links
+            for url in tweet.entities.get('urls', []):
+                if url.get('expanded_url'):
+                    links[url['expanded_url']] = max(bucket, links.get(url['expanded_url'], bucket))
+
+        newest_id = max([tweet.id for tweet in tweets] + [since_id or 0]) or None
+
+        with self.storage.transaction() as conn:
+            conn.executemany(
+                'INSERT INTO social_buckets (query, bucket, positive, negative, neutral) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(query, bucket) DO UPDATE SET positive = positive + excluded.positive, '
+                'negative = negative + excluded.negative, neutral = neutral + excluded.neutral',
+                [(query, bucket, *counts) for bucket, counts in buckets.items() if bucket >= oldest]
+            )
+            conn.executemany(
+                'INSERT INTO social_links (query, link, bucket) VALUES (?, ?, ?) '
+                'ON CONFLICT(query, link) DO UPDATE SET bucket = MAX(bucket, excluded.bucket)',
+                [(query, link, bucket) for link, bucket in links.items() if bucket >= oldest]
+            )
+            conn.executemany('DELETE FROM social_gaps WHERE query = ? AND max_id = ?',
+                             [(query, gap_max) for gap_max in filled])
+            conn.executemany(
+                'INSERT OR REPLACE INTO social_gaps (query, since_id, max_id, newer_than) VALUES (?, ?, ?, ?)',
+                [(query, gap_since, gap_max, newer_than) for gap_max, (gap_since, newer_than) in gaps.items()
+                 if newer_than >= window_start]
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO social_queries (query, since_id, refreshed_at) VALUES (?, ?, ?)',
+                (query, newest_id, now)
+            )
+            # Roll old buckets off the window
+            conn.execute('DELETE FROM social_buckets WHERE query = ? AND bucket < ?', (query, oldest))
+            conn.execute('DELETE FROM social_links WHERE query = ? AND bucket < ?', (query, oldest))
+
+        self.prune(now)
+        return len(tweets)
+
+    def prune(self, now=None):
+        """Drop queries not refreshed for a whole window, with their buckets, links and gaps.
+
+        Runs at most once per bucket per process; everything it removes has
+        already rolled out of the window.
+        """
+        now = now or time.time()
+        if now - self._pruned_at < self.bucket_seconds:
+            return
+        self._pruned_at = now
+        cutoff = now - self.window_seconds
+        with self.storage.transaction() as conn:
+            stale = [(query,) for (query,) in conn.execute(
+                'SELECT query FROM social_queries WHERE refreshed_at < ?', (cutoff,))]
+            for table in ('social_buckets', 'social_links', 'social_gaps', 'social_queries'):
+                conn.executemany(f'DELETE FROM {table} WHERE query = ?', stale)
+
+    def snapshot(self, query):
+        """Totals, links, per-bucket counts and trend for the current window."""
+        oldest = self._oldest_bucket(time.time())
+        conn = self.storage.connect()
+        rows = conn.execute(
+            'SELECT bucket, positive, negative, neutral FROM social_buckets '
+            'WHERE query = ? AND bucket >= ? ORDER BY bucket',
+            (query, oldest)
+        ).fetchall()
+        links = [link for (link,) in conn.execute(
+            'SELECT link FROM social_links WHERE query = ? AND bucket >= ? ORDER BY bucket DESC',
+            (query, oldest))]
+
+        positive = sum(row[1] for row in rows)
+        negative = sum(row[2] for row in rows)
+        neutral = sum(row[3] for row in rows)
+
+        return {
+            'positive': positive,
+            'negative': negative,
+            'neutral': neutral,
+            'links': links,
+            'total': positive + negative + neutral,
+            'buckets': [{
+                'start': datetime.fromtimestamp(bucket * self.bucket_seconds, timezone.utc).isoformat(),
+                'positive': pos,
+                'negative': neg,
+                'neutral': neu
+            } for bucket, pos, neg, neu in rows],
+            'trend': self.trend(rows)
+        }
+
+    @staticmethod
+    def trend(rows):
+        """Compare net sentiment of the newer half of the buckets with the older half."""
+        if len(rows) < 2:
+            return 'insufficient data'
+
+        def net(half):
+            total = sum(row[1] + row[2] + row[3] for row in half)
+            return (sum(row[1] for row in half) - sum(row[2] for row in half)) / total if total else 0.0
+
+        middle = len(rows) // 2
+        change = net(rows[middle:]) - net(rows[:middle])
+        if change > 0.1:
+            return 'improving'
+        if change < -0.1:
+            return 'declining'
+        return 'stable'
+
+    def analyze(self, query, limit):
+        """Refresh `query` with new tweets and return the rolling aggregate."""
+        self.refresh(query, limit)
+        return self.snapshot(query)
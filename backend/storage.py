@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+class Storage:
+    """SQLite database in WAL mode shared by every gunicorn worker.
+
+    Each thread gets its own connection. WAL lets readers run alongside the
+    single writer, so reads from the request path never wait on alert writes.
+    """
+
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS meta ('
+        'key TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS watchlist ('
+        'address TEXT PRIMARY KEY, added_at TEXT NOT NULL, notifications INTEGER NOT NULL)',
+        'CREATE TABLE IF NOT EXISTS watchlist_alerts ('
+        'id INTEGER PRIMARY KEY AUTOINCREMENT, address TEXT NOT NULL, alert TEXT NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS watchlist_alerts_address ON watchlist_alerts (address, id)',
+        'CREATE TABLE IF NOT EXISTS rate_limits ('
+        'tier TEXT NOT NULL, key TEXT NOT NULL, window_index INTEGER NOT NULL, '
+        'prev INTEGER NOT NULL, curr INTEGER NOT NULL, PRIMARY KEY (tier, key))',
+        'CREATE INDEX IF NOT EXISTS rate_limits_window ON rate_limits (tier, window_index)',
+        'CREATE TABLE IF NOT EXISTS leases ('
+        'name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)',
+    ]
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('SAFEBASE_DB', 'safebase.sqlite3')
+        self._local = threading.local()
+        conn = self.connect()
+        with conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def transaction(self):
+        """Open a write transaction that takes the lock up front."""
+        return _Transaction(self.connect())
+
+    def bump_version(self, conn, key):
+        conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, 1) '
+            'ON CONFLICT(key) DO UPDATE SET value = value + 1',
+            (key,)
+        )
+
+    def version(self, key):
+        row = self.connect().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def try_lease(self, name, owner, ttl):
+        """Acquire or renew a named lease; True while `owner` holds it."""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.owner = excluded.owner OR leases.expires_at <= ?',
+                (name, owner, now + ttl, now)
+            )
+            row = conn.execute('SELECT owner FROM leases WHERE name = ?', (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def release_lease(self, name, owner):
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM leases WHERE name = ? AND owner = ?', (name, owner))
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+class WatchlistStore:
+    """Watchlist entries and their alerts, with an in-process read-through cache.
+
+    Membership changes and new alerts bump separate version counters; readers
+    rebuild their snapshot only when a counter they depend on has moved, so
+    /api/monitor/list is one indexed lookup in the common case and alerts
+    never make the monitor reload the address set.
+    """
+
+    VERSION_KEY = 'watchlist'
+    ALERTS_VERSION_KEY = 'watchlist_alerts'
+
+    def __init__(self, storage, max_alerts=None):
+        self.storage = storage
+        self.max_alerts = max_alerts or int(os.getenv('MONITOR_MAX_ALERTS', 100))
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._snapshot_version = None
+        self._addresses = None
+        self._addresses_version = None
+
+    def add(self, address):
+        with self.storage.transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO watchlist (address, added_at, notifications) VALUES (?, ?, 1)',
+                (address, str(datetime.now()))
+            )
+            conn.execute('DELETE FROM watchlist_alerts WHERE address = ?', (address,))
+            self.storage.bump_version(conn, self.VERSION_KEY)
+            self.storage.bump_version(conn, self.ALERTS_VERSION_KEY)
+
+    def remove(self, address):
+        with self.storage.transaction() as conn:
+            conn.execute('DELETE FROM watchlist WHERE address = ?', (address,))
+            conn.execute('DELETE FROM watchlist_alerts WHERE address = ?', (address,))
+            self.storage.bump_version(conn, self.VERSION_KEY)
+            self.storage.bump_version(conn, self.ALERTS_VERSION_KEY)
+
+    def add_alerts(self, alerts):
+        """Write a batch of (address, alert) pairs in one transaction."""
+        if not alerts:
+            return
+        touched = {address for address, _ in alerts}
+        with self.storage.transaction() as conn:
+            conn.executemany(
+                'INSERT INTO watchlist_alerts (address, alert) '
+                'SELECT ?, ? WHERE EXISTS (SELECT 1 FROM watchlist WHERE address = ? AND notifications = 1)',
+                [(address, json.dumps(alert, default=str), address) for address, alert in alerts]
+            )
+            # Keep only the newest max_alerts per address
+            conn.executemany(
+                'DELETE FROM watchlist_alerts WHERE address = ? AND id NOT IN ('
+                'SELECT id FROM watchlist_alerts WHERE address = ? ORDER BY id DESC LIMIT ?)',
+                [(address, address, self.max_alerts) for address in touched]
+            )
+            self.storage.bump_version(conn, self.ALERTS_VERSION_KEY)
+
+    def version(self):
+        """Version of the set of watched addresses; alerts don't change it."""
+        return self.storage.version(self.VERSION_KEY)
+
+    def all(self):
+        """Return {address: {'added_at', 'notifications', 'alerts'}} for every entry."""
+        version = (self.version(), self.storage.version(self.ALERTS_VERSION_KEY))
+        with self._lock:
+            if self._snapshot is not None and self._snapshot_version == version:
+                return self._snapshot
+
+        conn = self.storage.connect()
+        entries = {
+            address: {'added_at': added_at, 'notifications': bool(notifications), 'alerts': []}
+            for address, added_at, notifications in conn.execute(
+                'SELECT address, added_at, notifications FROM watchlist')
+        }
+        for address, alert in conn.execute('SELECT address, alert FROM watchlist_alerts ORDER BY id'):
+            if address in entries:
+                entries[address]['alerts'].append(json.loads(alert))
+
+        with self._lock:
+            self._snapshot = entries
+            self._snapshot_version = version
+        return entries
+
+    def addresses(self):
+        """Watched addresses only, without loading entries or alerts."""
+        version = self.version()
+        with self._lock:
+            if self._addresses is not None and self._addresses_version == version:
+                return self._addresses
+
+        addresses = [address for (address,) in self.storage.connect().execute('SELECT address FROM watchlist')]
+
+        with self._lock:
+            self._addresses = addresses
+            self._addresses_version = version
+        return addresses
+
+
+# Shared by the app and the subscription service
+storage = Storage()
@@ -1,107 +1,268 @@
+from collections import OrderedDict
 from functools import wraps
-from datetime import datetime, timedelta
 from flask import request, jsonify
 import jwt
-from web3 import Web3
 import os
-from collections import defaultdict
+import threading
+import time
+from backend.storage import storage
+from backend.rate_limit import RateLimiter
+from backend.lazy import LazyClient
+from backend.metrics import metrics
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(os.getenv('BASE_RPC_URL')))
-subscription_contract = w3.eth.contract(
+def _build_web3():
+    from web3.transport import make_web3
+    return make_web3(os.getenv('BASE_RPC_URL'))
+
+# Initialize Web3 (built on first use)
+w3 = LazyClient(_build_web3, 'subscription_web3')
+subscription_contract = LazyClient(lambda: w3.eth.contract(
     address=os.getenv('SUBSCRIPTION_CONTRACT_ADDRESS'),
     abi=os.getenv('SUBSCRIPTION_CONTRACT_ABI')
-)
+), 'subscription_contract')
+
+# Multicall3 is deployed at the same address on Base and most EVM chains
+MULTICALL3_ADDRESS = os.getenv('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')
+MULTICALL3_ABI = [{
+    'name': 'aggregate3',
+    'type': 'function',
+    'stateMutability': 'payable',
+    'inputs': [{'name': 'calls', 'type': 'tuple[]', 'components': [
+        {'name': 'target', 'type': 'address'},
+        {'name': 'allowFailure', 'type': 'bool'},
+        {'name': 'callData', 'type': 'bytes'}
+    ]}],
+    'outputs': [{'name': 'returnData', 'type': 'tuple[]', 'components': [
+        {'name': 'success', 'type': 'bool'},
+        {'name': 'returnData', 'type': 'bytes'}
+    ]}]
+}]
+multicall_contract = LazyClient(lambda: w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI),
+                                'multicall_contract')
 
 class SubscriptionService:
     def __init__(self):
-        self.free_tier_limits = defaultdict(lambda: {'count': 0, 'reset_time': None})
-        self.rate_limit_duration = timedelta(days=1)
-        self.free_tier_daily_limit = 3
+        # Sliding-window limits per tier, shared by every worker
+        self.rate_limiter = RateLimiter(storage=storage)
+
+        # Lowercased address -> (status, valid_until), least recently used first
+        self.status_cache = OrderedDict()
+        self.status_cache_ttl = float(os.getenv('SUBSCRIPTION_CACHE_TTL', 60))
+        self.status_cache_size = int(os.getenv('SUBSCRIPTION_CACHE_SIZE', 10000))
+        self._cache_lock = threading.Lock()
+        # Misses arriving within this window share one multicall
+        self.batch_window = float(os.getenv('SUBSCRIPTION_BATCH_WINDOW', 0.005))
+        self._status_lock = threading.Lock()
+        self._pending_batch = None
+        # Lookups currently in _fetch_batched; a lone one doesn't wait for company
+        self._lookups = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Invalidations are shared through storage so every worker drops the entry
+        with storage.transaction() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS subscription_invalidations ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, address TEXT NOT NULL, invalidated_at REAL NOT NULL)'
+            )
+            row = conn.execute('SELECT MAX(id) FROM subscription_invalidations').fetchone()
+        self._invalidation_id = row[0] or 0
+        # Other workers' invalidations are polled at most this often
+        self.invalidation_poll_interval = float(os.getenv('SUBSCRIPTION_INVALIDATION_POLL', 1))
+        self._invalidations_checked_at = 0.0
 
     def check_subscription_status(self, user_address):
         """Check subscription status from the smart contract"""
+        key = user_address.lower()
+        self._apply_invalidations()
+        now = time.time()
+        with self._cache_lock:
+            cached = self.status_cache.get(key)
+            if cached is not None:
+                if cached[1] > now:
+                    self.status_cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return cached[0]
+                del self.status_cache[key]
+            self.cache_misses += 1
+
         try:
-            is_valid, tier, expiry = subscription_contract.functions.hasValidSubscription(user_address).call()
-            return {
-                'is_valid': is_valid,
-                'tier': tier,
-                'expiry': expiry
-            }
+            return self._fetch_batched(user_address)
         except Exception as e:
             print(f"Error checking subscription: {e}")
             return None
 
-    def check_free_tier_limit(self, user_address):
-        """Check if free tier user has exceeded daily limit"""
-        user_limit = self.free_tier_limits[user_address]
-        now = datetime.now()
+    def invalidate_subscription_status(self, user_address):
+        """Forget the cached status in every worker, e.g. after the subscription changed."""
+        now = time.time()
+        with storage.transaction() as conn:
+            conn.execute(
+                'INSERT INTO subscription_invalidations (address, invalidated_at) VALUES (?, ?)',
+                (user_address.lower(), now)
+            )
+            # Entries cached before an older invalidation have expired by now
+            conn.execute('DELETE FROM subscription_invalidations WHERE invalidated_at < ?',
+                         (now - self.status_cache_ttl,))
+        self._apply_invalidations(force=True)
+
+    def _apply_invalidations(self, force=False):
+        """Drop entries other workers (or this one) invalidated since the last check."""
+        now = time.monotonic()
+        if not force and now - self._invalidations_checked_at < self.invalidation_poll_interval:
+            return
+        self._invalidations_checked_at = now
+        rows = storage.connect().execute(
+            'SELECT id, address FROM subscription_invalidations WHERE id > ? ORDER BY id',
+            (self._invalidation_id,)
+        ).fetchall()
+        if not rows:
+            return
+        with self._cache_lock:
+            for _, address in rows:
+                self.status_cache.pop(address, None)
+            self._invalidation_id = max(self._invalidation_id, rows[-1][0])
 
-        # Reset counter if it's a new day
-        if not user_limit['reset_time'] or now - user_limit['reset_time'] >= self.rate_limit_duration:
-            user_limit['count'] = 0
-            user_limit['reset_time'] = now
+    def _remember(self, user_address, status):
+        # Valid until the subscription expires or the TTL passes, whichever is first
+        now = time.time()
+        valid_until = now + self.status_cache_ttl
+        if status['is_valid']:
+            valid_until = min(valid_until, status['expiry'])
+        if valid_until <= now:
+            return
+        key = user_address.lower()
+        with self._cache_lock:
+            self.status_cache[key] = (status, valid_until)
+            self.status_cache.move_to_end(key)
+            while len(self.status_cache) > self.status_cache_size:
+                self.status_cache.popitem(last=False)
 
-        # Check if user has exceeded limit
-        if user_limit['count'] >= self.free_tier_daily_limit:
-            return False
+    def _fetch_batched(self, user_address):
+        """Join (or start) the batch of lookups going out in the next few ms."""
+        with self._status_lock:
+            self._lookups += 1
+            batch = self._pending_batch
+            leader = batch is None
+            if leader:
+                batch = {'users': set(), 'done': threading.Event(), 'results': {}, 'error': None}
+                self._pending_batch = batch
+                # Only wait for others to join when lookups are already overlapping
+                wait = self._lookups > 1
+            batch['users'].add(user_address)
 
-        user_limit['count'] += 1
-        return True
+        try:
+            if leader:
+                if wait:
+                    time.sleep(self.batch_window)
+                with self._status_lock:
+                    self._pending_batch = None
+                try:
+                    batch['results'] = self.check_subscription_statuses(batch['users'])
+                except Exception as e:
+                    batch['error'] = e
+                finally:
+                    batch['done'].set()
+            else:
+                batch['done'].wait()
+        finally:
+            with self._status_lock:
+                self._lookups -= 1
+
+        if batch['error'] is not None:
+            raise batch['error']
+        return batch['results'].get(user_address)
+
+    def check_subscription_statuses(self, user_addresses):
+        """Look up many users with one Multicall3 eth_call; returns {address: status}."""
+        user_addresses = list(user_addresses)
+        if len(user_addresses) == 1:
+            is_valid, tier, expiry = subscription_contract.functions.hasValidSubscription(user_addresses[0]).call()
+            results = {user_addresses[0]: {'is_valid': is_valid, 'tier': tier, 'expiry': expiry}}
+        else:
+            calls = [(subscription_contract.address, True,
+                      subscription_contract.encode_abi('hasValidSubscription', args=[user]))
+                     for user in user_addresses]
+            results = {}
+            for user, (success, data) in zip(user_addresses, multicall_contract.functions.aggregate3(calls).call()):
+                if not success:
+                    continue
+                is_valid, tier, expiry = w3.codec.decode(['bool', 'uint8', 'uint256'], data)
+                results[user] = {'is_valid': is_valid, 'tier': tier, 'expiry': expiry}
+
+        for user, status in results.items():
+            self._remember(user, status)
+        return results
+
+    def check_free_tier_limit(self, user_address):
+        """Check if free tier user has exceeded daily limit"""
+        return self.rate_limiter.allow('free', user_address)
 
 
 
 # Initialize subscription service
 subscription_service = SubscriptionService()
+metrics.register(lambda: [
+    ('cache_hits_total', {'cache': 'subscription_status'}, subscription_service.cache_hits),
+    ('cache_misses_total', {'cache': 'subscription_status'}, subscription_service.cache_misses),
+])
+
+def _check_access(min_tier):
+    """Return an error response when the caller may not use a `min_tier` endpoint, else None."""
+    # Get user address from auth header
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        return jsonify({'error': 'No authorization header'}), 401
+
+    try:
+        # Verify JWT and get user address
+        token = auth_header.split(' ')[1]
+        payload = jwt.decode(token, os.getenv('JWT_SECRET'), algorithms=['HS256'])
+        user_address = payload['address']
+
+        # For free tier, check rate limit
+        if min_tier == 'free':
+            if not subscription_service.check_free_tier_limit(user_address):
+                return jsonify({
+                    'error': 'Free tier daily limit exceeded',
+                    'upgrade_url': '/pricing'
+                }), 429
+            return None
+
+        # Check crypto subscription
+        crypto_sub = subscription_service.check_subscription_status(user_address)
+        if crypto_sub and crypto_sub['is_valid']:
+            if (min_tier == 'pro' and crypto_sub['tier'] in ['pro', 'elite']) or \
+                    (min_tier == 'elite' and crypto_sub['tier'] == 'elite'):
+                # Paid tiers only hit a limit when one is configured
+                if not subscription_service.rate_limiter.allow(crypto_sub['tier'], user_address):
+                    return jsonify({'error': 'Rate limit exceeded'}), 429
+                return None
+
+        # No valid subscription found
+        return jsonify({
+            'error': f'This endpoint requires {min_tier} subscription',
+            'upgrade_url': '/pricing'
+        }), 403
+
+    except jwt.InvalidTokenError:
+        return jsonify({'error': 'Invalid token'}), 401
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 def require_subscription(min_tier='free'):
     """Decorator to validate subscription status"""
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Get user address from auth header
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return jsonify({'error': 'No authorization header'}), 401
+            with metrics.stage('subscription.check'):
+                denied = _check_access(min_tier)
+            if denied is not None:
+                return denied
 
             try:
-                # Verify JWT and get user address
-                token = auth_header.split(' ')[1]
-                payload = jwt.decode(token, os.getenv('JWT_SECRET'), algorithms=['HS256'])
-                user_address = payload['address']
-
-                # For free tier, check rate limit
-                if min_tier == 'free':
-                    if not subscription_service.check_free_tier_limit(user_address):
-                        return jsonify({
-                            'error': 'Free tier daily limit exceeded',
-                            'upgrade_url': '/pricing'
-                        }), 429
-                    return f(*args, **kwargs)
-
-                # Check crypto subscription
-                crypto_sub = subscription_service.check_subscription_status(user_address)
-                if crypto_sub and crypto_sub['is_valid']:
-                    if min_tier == 'pro' and crypto_sub['tier'] in ['pro', 'elite']:
-                        return f(*args, **kwargs)
-                    if min_tier == 'elite' and crypto_sub['tier'] == 'elite':
-                        return f(*args, **kwargs)
-
-                # No valid subscription found
-                return jsonify({
-                    'error': f'This endpoint requires {min_tier} subscription',
-                    'upgrade_url': '/pricing'
-                }), 403
-
-                return jsonify({
-                    'error': f'This endpoint requires {min_tier} subscription',
-                    'upgrade_url': '/pricing'
-                }), 403
-
-            except jwt.InvalidTokenError:
-                return jsonify({'error': 'Invalid token'}), 401
+                return f(*args, **kwargs)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
 
         return decorated_function
-    return decorator
\ No newline at end of file
+    return decorator
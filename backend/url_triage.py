@@ -0,0 +1,196 @@
+import os
+import unicodedata
+from urllib.parse import urlsplit
+
+from backend.normalize import canonicalize_url
+
+# Domains users most often get phished for; extended with URL_PROTECTED_DOMAINS_FILE
+PROTECTED_DOMAINS = [
+    'base.org', 'coinbase.com', 'metamask.io', 'uniswap.org', 'opensea.io',
+    'etherscan.io', 'basescan.org', 'aerodrome.finance', 'aave.com', 'curve.fi',
+    'lido.fi', 'compound.finance', 'sushi.com', 'pancakeswap.finance', '1inch.io',
+    'binance.com', 'kraken.com', 'ledger.com', 'trezor.io', 'phantom.app',
+    'rainbow.me', 'zora.co', 'farcaster.xyz', 'warpcast.com', 'safe.global',
+    'ethereum.org', 'arbitrum.io', 'optimism.io', 'polygon.technology', 'chainlink.com',
+]
+
+# Look-alike characters folded to the ASCII letter they imitate
+HOMOGLYPHS = str.maketrans({
+    'а': 'a', 'е': 'e', 'о': 'o', 'р': 'p', 'с': 'c', 'у': 'y', 'х': 'x', 'і': 'i',
+    'ј': 'j', 'ѕ': 's', 'ԁ': 'd', 'ɡ': 'g', 'һ': 'h', 'ӏ': 'l', 'ո': 'n', 'ս': 'u',
+    'α': 'a', 'ο': 'o', 'ν': 'v', 'τ': 't', 'κ': 'k', 'ι': 'i', 'ρ': 'p',
+    '0': 'o', '1': 'l', '3': 'e', '5': 's', '$': 's', '@': 'a',
+})
+MULTI_CHAR_HOMOGLYPHS = [('rn', 'm'), ('vv', 'w'), ('cl', 'd')]
+
+SECOND_LEVEL_SUFFIXES = {'co', 'com', 'org', 'net', 'gov', 'ac', 'edu'}
+
+
+def edit_distance(a, b, limit=None):
+    """Optimal string alignment distance (adjacent swaps count as one edit)."""
+    if a == b:
+        return 0
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class BKTree:
+    """Metric tree over brand labels for bounded edit-distance lookups."""
+
+    def __init__(self, words=()):
+        self.root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word, max_distance):
+        """Return [(distance, word)] within `max_distance`, closest first."""
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            candidate, children = stack.pop()
+            distance = edit_distance(word, candidate)
+            if distance <= max_distance:
+                matches.append((distance, candidate))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(matches)
+
+
+def read_domains(path):
+    """One domain per line; blank lines and # comments are skipped."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [line.strip().lower() for line in f if line.strip() and not line.startswith('#')]
+
+
+def registrable_domain(host):
+    """Best-effort eTLD+1, e.g. app.uniswap.org -> uniswap.org, x.co.uk -> x.co.uk."""
+    labels = host.split('.')
+    if len(labels) >= 3 and labels[-2] in SECOND_LEVEL_SUFFIXES and len(labels[-1]) == 2:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def fold_homoglyphs(label):
+    """Map look-alike characters onto the ASCII letters they imitate."""
+    label = label.translate(HOMOGLYPHS)
+    label = unicodedata.normalize('NFKD', label).encode('ascii', 'ignore').decode()
+    for lookalike, letter in MULTI_CHAR_HOMOGLYPHS:
+        label = label.replace(lookalike, letter)
+    return label
+
+
+class URLTriage:
+    """Decide obvious URL verdicts locally, before any LLM call.
+
+    Returns an analyze_url-shaped result for allowlisted, blocklisted,
+    homoglyph and typosquat cases, or None when the URL needs a closer look.
+    """
+
+    def __init__(self, protected=None, allowlist=None, blocklist=None, min_length=None):
+        self.min_length = min_length or int(os.getenv('URL_TYPOSQUAT_MIN_LENGTH', 6))
+        protected = list(protected if protected is not None else PROTECTED_DOMAINS)
+        protected += read_domains(os.getenv('URL_PROTECTED_DOMAINS_FILE'))
+        self.allowlist = set(protected) | set(allowlist if allowlist is not None else
+                                              read_domains(os.getenv('URL_ALLOWLIST_FILE')))
+        self.blocklist = set(blocklist if blocklist is not None else
+                             read_domains(os.getenv('URL_BLOCKLIST_FILE')))
+        # Brand label ("uniswap") -> protected domain ("uniswap.org")
+        self.brands = {}
+        for domain in protected:
+            self.brands.setdefault(registrable_domain(domain).split('.')[0], domain)
+        self.index = BKTree(b for b in self.brands if len(b) >= self.min_length)
+
+    @staticmethod
+    def host_of(url):
+        host = urlsplit(canonicalize_url(url)).hostname or ''
+        try:
+            # Show internationalized (xn--) labels as the characters they render as
+            host = host.encode('ascii').decode('idna')
+        except (UnicodeError, ValueError):
+            pass
+        return host.lower()
+
+    @staticmethod
+    def _result(verdict, risk_score, explanation, reason, matched=None):
+        return {
+            'verdict': verdict,
+            'risk_score': risk_score,
+            'explanation': explanation,
+            'triage': {'reason': reason, 'matched': matched}
+        }
+
+    def classify(self, url):
+        host = self.host_of(url)
+        if not host or '.' not in host:
+            return None
+        domain = registrable_domain(host)
+
+        if host in self.blocklist or domain in self.blocklist:
+            return self._result('Likely Scam', 0.95, f'{domain} is on the known scam domain list.', 'blocklist')
+        if domain in self.allowlist:
+            return self._result('Safe', 0.1, f'{domain} is a known legitimate domain.', 'allowlist', domain)
+
+        label = domain.split('.')[0]
+        folded = fold_homoglyphs(label)
+        brand = self.brands.get(folded)
+        if brand and folded != label:
+            return self._result('Likely Scam', 0.9,
+                                f'{domain} imitates {brand} with look-alike characters.', 'homoglyph', brand)
+        if brand and len(label) >= self.min_length:
+            return self._result('Suspicious', 0.7,
+                                f'{domain} uses the {brand} name on a different domain.', 'brand-tld', brand)
+
+        # Short brand names ("base", "safe") are ordinary words a typo away
+        # from many honest sites, so only longer ones are fuzzy-matched
+        if len(folded) >= self.min_length:
+            matches = self.index.search(folded, 1 if len(folded) < 9 else 2)
+            if matches:
+                distance, brand_label = matches[0]
+                brand = self.brands[brand_label]
+                if distance == 1:
+                    return self._result('Likely Scam', 0.85,
+                                        f'{domain} is one character away from {brand}.', 'typosquat', brand)
+                return self._result('Suspicious', 0.6,
+                                    f'{domain} closely resembles {brand}.', 'typosquat', brand)
+
+        # Brand name embedded in an unrelated domain, e.g. metamask-support.xyz
+        for part in host.replace('-', '.').split('.'):
+            brand = self.brands.get(fold_homoglyphs(part))
+            if brand and len(part) >= self.min_length:
+                return self._result('Suspicious', 0.65,
+                                    f'{host} uses the {brand} name but is not {brand}.', 'brand-in-domain', brand)
+
+        return None
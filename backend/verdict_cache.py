@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class VerdictCache:
+    """TTL + LRU cache of /api/check results shared by all gunicorn workers.
+
+    Entries live in a SQLite file so every worker sees the same results.
+    Identical requests that arrive while an analysis is running wait for it
+    instead of starting their own: threads in the same worker wait on an
+    event, other workers wait on a lease row in the database.
+    """
+
+    def __init__(self, path=None, ttl=None, max_entries=None, lease_timeout=None):
+        self.path = path or os.getenv('VERDICT_CACHE_DB', 'verdict_cache.sqlite3')
+        self.ttl = ttl or float(os.getenv('VERDICT_CACHE_TTL', 300))
+        self.max_entries = max_entries or int(os.getenv('VERDICT_CACHE_SIZE', 10000))
+        self.lease_timeout = lease_timeout or float(os.getenv('VERDICT_CACHE_LEASE_TIMEOUT', 60))
+        # A hit refreshes last_access at most this often, so hot keys don't
+        # make every read a write transaction
+        self.touch_interval = float(os.getenv('VERDICT_CACHE_TOUCH_INTERVAL', 60))
+        self.poll_interval = 0.05
+        self.owner = uuid.uuid4().hex
+        self._local = threading.local()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # Guards the counters, which every request thread updates
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS verdicts ('
+                'key TEXT PRIMARY KEY, result TEXT NOT NULL, '
+                'expires_at REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS verdicts_last_access ON verdicts (last_access)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS verdict_leases ('
+                'key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return the cached result for `key`, or None if missing or expired."""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            'SELECT result, last_access FROM verdicts WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        if now - row[1] >= self.touch_interval:
+            with conn:
+                conn.execute('UPDATE verdicts SET last_access = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, result):
+        """Store `result` under `key` for the configured TTL."""
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO verdicts (key, result, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?)',
+                (key, json.dumps(result, default=str), now + self.ttl, now)
+            )
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % 100 == 0
+        if evict:
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM verdicts WHERE expires_at <= ?', (time.time(),))
+            conn.execute(
+                'DELETE FROM verdicts WHERE key IN ('
+                'SELECT key FROM verdicts ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def _acquire_lease(self, key):
+        """Try to become the one worker computing `key`."""
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            # Take over leases left behind by a crashed or stuck worker
+            conn.execute('DELETE FROM verdict_leases WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO verdict_leases (key, owner, expires_at) VALUES (?, ?, ?)',
+                (key, self.owner, now + self.lease_timeout)
+            )
+        return cursor.rowcount == 1
+
+    def _release_lease(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM verdict_leases WHERE key = ? AND owner = ?', (key, self.owner))
+
+    def _wait_for_other_worker(self, key, deadline):
+        """Poll for the result another worker is computing.
+
+        Returns (result, have_lease); both are falsy when `deadline` passes first.
+        """
+        while time.time() < deadline:
+            time.sleep(min(self.poll_interval, max(deadline - time.time(), 0)))
+            result = self.get(key)
+            if result is not None:
+                return result, False
+            if self._acquire_lease(key):
+                return None, True
+        return None, False
+
+    def get_or_compute(self, key, compute, cacheable=lambda result: True, wait_timeout=None):
+        """Return the cached result for `key`, computing it at most once.
+
+        Callers wait at most `wait_timeout` seconds (default: the lease timeout)
+        for another thread or worker's result before computing it themselves.
+        """
+        result = self.get(key)
+        if result is not None:
+            return result
+        deadline = time.time() + (self.lease_timeout if wait_timeout is None else wait_timeout)
+
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = {'event': threading.Event(), 'result': None}
+                self._inflight[key] = pending
+
+        if not leader:
+            pending['event'].wait(max(deadline - time.time(), 0))
+            if pending['result'] is not None:
+                return pending['result']
+            return compute()
+
+        try:
+            have_lease = self._acquire_lease(key)
+            if not have_lease:
+                result, have_lease = self._wait_for_other_worker(key, deadline)
+                if result is not None:
+                    pending['result'] = result
+                    return result
+                # Out of time: compute anyway, but the lease stays with its owner
+
+            try:
+                result = compute()
+                if cacheable(result):
+                    self.set(key, result)
+            finally:
+                if have_lease:
+                    self._release_lease(key)
+
+            pending['result'] = result
+            return result
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            pending['event'].set()
@@ -0,0 +1,477 @@
+import abc
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-ins for the Base JSON-RPC node, the OpenAI API and the tweepy
+# client, so benchmarks run offline, repeatably and with chosen latencies.
+# `python benchmarks/fakes.py` serves the two HTTP fakes on their own and
+# prints their URLs as one JSON line.
+
+# Block the synthetic chain starts at; Base mainnet heights are in this range
+GENESIS_HEAD = 20_000_000
+BASE_CHAIN_ID = 8453
+MULTICALL3_ADDRESS = '0xca11bde05977b3631167028862be2a173976ca11'
+# Digits only, so it is already in checksum form
+SUBSCRIPTION_ADDRESS = '0x0000000000000000000000000000000000051234'
+SUBSCRIPTION_ABI = [{
+    'name': 'hasValidSubscription',
+    'type': 'function',
+    'stateMutability': 'view',
+    'inputs': [{'name': 'user', 'type': 'address'}],
+    'outputs': [{'name': 'isValid', 'type': 'bool'},
+                {'name': 'tier', 'type': 'uint8'},
+                {'name': 'expiry', 'type': 'uint256'}]
+}]
+
+# Opcodes the synthetic contracts are made of; PUSH1 takes one data byte
+_BODY_OPCODES = bytes([0x01, 0x02, 0x03, 0x10, 0x14, 0x15, 0x16, 0x19, 0x20, 0x33, 0x34, 0x35,
+                       0x50, 0x51, 0x52, 0x54, 0x55, 0x56, 0x57, 0x5b, 0x80, 0x81, 0x90, 0x91,
+                       0xf1, 0xfa, 0xf3, 0xfd])
+_PUSH1 = 0x60
+_DELEGATECALL = 0xf4
+_SELFDESTRUCT = 0xff
+
+
+def _address(kind, i):
+    return '0x' + hashlib.sha256(f'{kind}:{i}'.encode()).hexdigest()[:40]
+
+
+def _hash(kind, *parts):
+    return '0x' + hashlib.sha256(':'.join([kind] + [str(p) for p in parts]).encode()).hexdigest()
+
+
+def _word(value):
+    return value.to_bytes(32, 'big')
+
+
+class FakeChain:
+    """Deterministic synthetic chain: blocks, contract code and history.
+
+    The head advances one block every `block_time` seconds from
+    GENESIS_HEAD. Every block and contract is derived from `seed`, so two
+    runs with the same parameters see the same chain.
+    """
+
+    def __init__(self, seed=1, contracts=500, senders=5000, txs_per_block=50,
+                 contract_share=0.3, block_time=2.0, risky_share=0.2):
+        self.seed = seed
+        self.txs_per_block = txs_per_block
+        self.contract_share = contract_share
+        self.block_time = block_time
+        self.risky_share = risky_share
+        self.contracts = [_address(f'contract-{seed}', i) for i in range(contracts)]
+        self.senders = [_address(f'sender-{seed}', i) for i in range(senders)]
+        self._contract_index = {address: i for i, address in enumerate(self.contracts)}
+        # Popular contracts get most of the traffic, like on a real chain
+        self._contract_weights = [1.0 / (i + 1) for i in range(contracts)]
+        self.started_at = time.time()
+
+    @property
+    def head(self):
+        if not self.block_time:
+            return GENESIS_HEAD
+        return GENESIS_HEAD + int((time.time() - self.started_at) / self.block_time)
+
+    def creation_block(self, address):
+        i = self._contract_index.get(address.lower())
+        if i is None:
+            return None
+        return GENESIS_HEAD - random.Random(f'{self.seed}:created:{i}').randint(1_000, 2_000_000)
+
+    @lru_cache(maxsize=2048)
+    def code(self, i):
+        """Runtime bytecode of contract `i`: 2-12 KB of plausible opcodes."""
+        rng = random.Random(f'{self.seed}:code:{i}')
+        code = bytearray()
+        size = rng.randint(2_000, 12_000)
+        while len(code) < size:
+            if rng.random() < 0.3:
+                code += bytes([_PUSH1, rng.randrange(256)])
+            else:
+                code.append(rng.choice(_BODY_OPCODES))
+        if rng.random() < self.risky_share:
+            code[rng.randrange(len(code))] = _DELEGATECALL
+        if rng.random() < self.risky_share / 4:
+            code.append(_SELFDESTRUCT)
+        return bytes(code)
+
+    def get_code(self, address, block):
+        i = self._contract_index.get(address.lower())
+        if i is None:
+            return b''
+        number = self.head if block in ('latest', 'pending', 'safe', 'finalized') else int(block, 16)
+        return self.code(i) if number >= self.creation_block(address) else b''
+
+    @lru_cache(maxsize=4096)
+    def block(self, number):
+        """JSON-RPC block object with full transactions."""
+        rng = random.Random(f'{self.seed}:block:{number}')
+        block_hash = _hash('block', self.seed, number)
+        timestamp = int(self.started_at + (number - GENESIS_HEAD) * (self.block_time or 2.0))
+        transactions = []
+        for index in range(self.txs_per_block):
+            if rng.random() < self.contract_share:
+                recipient = rng.choices(self.contracts, self._contract_weights)[0]
+                value = 0 if rng.random() < 0.6 else int(rng.lognormvariate(38, 2.5))
+            else:
+                recipient = rng.choice(self.senders)
+                value = int(rng.lognormvariate(39, 2))
+            transactions.append({
+                'hash': _hash('tx', self.seed, number, index),
+                'blockHash': block_hash,
+                'blockNumber': hex(number),
+                'transactionIndex': hex(index),
+                'from': rng.choice(self.senders),
+                'to': recipient,
+                'value': hex(value),
+                'gas': hex(rng.randint(21_000, 500_000)),
+                'gasPrice': hex(rng.randint(10**6, 10**8)),
+                'nonce': hex(rng.randrange(10_000)),
+                'input': '0x',
+                'type': '0x0',
+                'chainId': hex(BASE_CHAIN_ID),
+                'v': '0x0',
+                'r': '0x' + '11' * 32,
+                's': '0x' + '22' * 32,
+            })
+        return {
+            'number': hex(number),
+            'hash': block_hash,
+            'parentHash': _hash('block', self.seed, number - 1),
+            'timestamp': hex(timestamp),
+            'miner': '0x4200000000000000000000000000000000000011',
+            'gasLimit': hex(60_000_000),
+            'gasUsed': hex(30_000_000),
+            'baseFeePerGas': hex(10**6),
+            'difficulty': '0x0',
+            'totalDifficulty': '0x0',
+            'extraData': '0x',
+            'logsBloom': '0x' + '00' * 256,
+            'mixHash': '0x' + '00' * 32,
+            'nonce': '0x0000000000000000',
+            'receiptsRoot': '0x' + '00' * 32,
+            'sha3Uncles': '0x' + '00' * 32,
+            'stateRoot': '0x' + '00' * 32,
+            'transactionsRoot': '0x' + '00' * 32,
+            'size': hex(1_000 + 200 * self.txs_per_block),
+            'uncles': [],
+            'transactions': transactions,
+        }
+
+    def block_json(self, number, full):
+        if number > self.head:
+            return None
+        block = self.block(number)
+        if full:
+            return block
+        return dict(block, transactions=[tx['hash'] for tx in block['transactions']])
+
+    def subscription(self, user):
+        """(is_valid, tier, expiry) the fake subscription contract returns for `user`.
+
+        tier is the contract's SubscriptionTier enum as a uint8 (0 free,
+        1 pro, 2 elite), exactly what the deployed contract returns.
+        """
+        digest = hashlib.sha256(user.lower().encode()).digest()
+        return digest[0] % 4 != 0, digest[1] % 3, 2**40
+
+    def encoded_subscription(self, user):
+        is_valid, tier, expiry = self.subscription(user)
+        return _word(int(is_valid)) + _word(tier) + _word(expiry)
+
+    def call(self, to, data):
+        """eth_call against the subscription contract or Multicall3's aggregate3."""
+        data = bytes.fromhex(data[2:] if data.startswith('0x') else data)
+        if to == SUBSCRIPTION_ADDRESS:
+            return self.encoded_subscription('0x' + data[4 + 12:4 + 32].hex())
+        if to == MULTICALL3_ADDRESS:
+            return self._aggregate3(data[4:])
+        return b''
+
+    def _aggregate3(self, args):
+        # aggregate3((address target, bool allowFailure, bytes callData)[])
+        read = lambda offset: int.from_bytes(args[offset:offset + 32], 'big')
+        array = read(0)
+        count = read(array)
+        elements = array + 32
+        results = []
+        for i in range(count):
+            call = elements + read(elements + 32 * i)
+            target = '0x' + args[call + 12:call + 32].hex()
+            call_data = call + read(call + 64)
+            length = read(call_data)
+            inner = args[call_data + 32:call_data + 32 + length]
+            if target == SUBSCRIPTION_ADDRESS:
+                results.append((True, self.encoded_subscription('0x' + inner[4 + 12:4 + 32].hex())))
+            else:
+                results.append((False, b''))
+
+        # returns (bool success, bytes returnData)[]
+        heads, tails = [], b''
+        for success, payload in results:
+            heads.append(_word(32 * count + len(tails)))
+            padded = payload + b'\x00' * (-len(payload) % 32)
+            tails += _word(int(success)) + _word(64) + _word(len(payload)) + padded
+        return _word(32) + _word(count) + b''.join(heads) + tails
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients reuse pooled connections as they do in production
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/stats'):
+            self._reply(200, self.server.fake.stats())
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            self._reply(400, {'error': 'invalid JSON'})
+            return
+        self.server.fake.sleep()
+        status, body = self.server.fake.handle(self.path, payload)
+        self._reply(status, body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeServer(abc.ABC):
+    """Base for the HTTP fakes: a threaded server with latency and call counters."""
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=1, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer((host, port), _JSONHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def sleep(self):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'calls': dict(self.counts)}
+
+    @abc.abstractmethod
+    def handle(self, path, payload):
+        """(HTTP status, JSON body) answering a POST of `payload` to `path`."""
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=type(self).__name__,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeRPCNode(FakeServer):
+    """JSON-RPC endpoint over a FakeChain; batches cost one round trip of latency."""
+
+    def __init__(self, chain, **kwargs):
+        super().__init__(**kwargs)
+        self.chain = chain
+
+    def handle(self, path, payload):
+        if isinstance(payload, list):
+            return 200, [self._dispatch(call) for call in payload]
+        return 200, self._dispatch(payload)
+
+    def _dispatch(self, call):
+        method = call.get('method')
+        params = call.get('params') or []
+        self.count(method)
+        response = {'jsonrpc': '2.0', 'id': call.get('id')}
+        try:
+            response['result'] = self._result(method, params)
+        except NotImplementedError:
+            response['error'] = {'code': -32601, 'message': f'Method {method} not found'}
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            response['error'] = {'code': -32602, 'message': f'Invalid params: {e}'}
+        return response
+
+    def _result(self, method, params):
+        chain = self.chain
+        if method == 'eth_blockNumber':
+            return hex(chain.head)
+        if method == 'eth_chainId':
+            return hex(BASE_CHAIN_ID)
+        if method == 'net_version':
+            return str(BASE_CHAIN_ID)
+        if method == 'eth_gasPrice':
+            return hex(10**7)
+        if method == 'eth_getBlockByNumber':
+            tag = params[0]
+            number = chain.head if tag in ('latest', 'pending', 'safe', 'finalized') else int(tag, 16)
+            return chain.block_json(number, bool(params[1]) if len(params) > 1 else False)
+        if method == 'eth_getCode':
+            return '0x' + chain.get_code(params[0], params[1] if len(params) > 1 else 'latest').hex()
+        if method == 'eth_call':
+            return '0x' + chain.call(params[0]['to'].lower(), params[0].get('data') or params[0].get('input')).hex()
+        raise NotImplementedError(method)
+
+
+class FakeOpenAI(FakeServer):
+    """OpenAI-compatible chat completions endpoint; point OPENAI_BASE_URL at `url`/v1."""
+
+    VERDICTS = (
+        'The contract and its activity look legitimate; no common scam patterns were found.',
+        'Several suspicious indicators: concentrated senders and a risky proxy pattern.',
+        'Mixed signals. Nothing conclusive, but the project is young and lightly used.',
+        'This looks like a phishing page imitating a well-known wallet brand.',
+    )
+
+    def handle(self, path, payload):
+        if not path.rstrip('/').endswith('/chat/completions'):
+            return 404, {'error': {'message': f'Unknown path {path}', 'type': 'invalid_request_error'}}
+        self.count('chat.completions')
+        prompt = ''.join(message.get('content') or '' for message in payload.get('messages', []))
+        digest = hashlib.sha256(prompt.encode()).digest()
+        content = self.VERDICTS[digest[0] % len(self.VERDICTS)]
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        return 200, {
+            'id': 'chatcmpl-' + digest[:12].hex(),
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'gpt-4'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        }
+
+
+class FakeTweet:
+    __slots__ = ('id', 'text', 'created_at', 'entities')
+
+    def __init__(self, id, text, created_at, entities):
+        self.id = id
+        self.text = text
+        self.created_at = created_at
+        self.entities = entities
+
+
+class FakeTwitterAPI:
+    """In-process stand-in for tweepy.API with the search_tweets() paging it offers.
+
+    Each query has `backlog` tweets spread over the last week and gains
+    `rate` new tweets per second. Pages are newest first and honour
+    since_id / max_id like the real endpoint.
+    """
+
+    WORDS = ('great', 'moon', 'bullish', 'love', 'safe', 'legit', 'scam', 'rug', 'dump', 'avoid',
+             'fake', 'launch', 'token', 'airdrop', 'wallet', 'base', 'chain', 'community', 'team')
+
+    def __init__(self, latency=0.0, backlog=2000, rate=5.0, seed=1):
+        self.latency = latency
+        self.backlog = backlog
+        self.rate = rate
+        self.seed = seed
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _newest_id(self):
+        return self.backlog + int((time.time() - self.started_at) * self.rate)
+
+    def _tweet(self, query, number):
+        rng = random.Random(f'{self.seed}:{query}:{number}')
+        # Backlog tweets spread evenly over the week before start
+        created = self.started_at + (number - self.backlog) * (7 * 86400 / max(self.backlog, 1)) \
+            if number <= self.backlog else self.started_at + (number - self.backlog) / self.rate
+        words = rng.choices(self.WORDS, k=rng.randint(6, 20))
+        urls = []
+        if rng.random() < 0.2:
+            urls.append({'expanded_url': f'https://{query.lower().replace(" ", "")}-{rng.randrange(50)}.example'})
+        # Tweet ids are unique across queries: query hash in the high bits
+        query_id = int(hashlib.sha256(query.encode()).hexdigest()[:6], 16)
+        return FakeTweet(query_id << 32 | number, f'{query} ' + ' '.join(words),
+                         datetime.fromtimestamp(created, timezone.utc), {'urls': urls})
+
+    def search_tweets(self, q, count=15, since_id=None, max_id=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        query_id = int(hashlib.sha256(q.encode()).hexdigest()[:6], 16)
+        newest = self._newest_id()
+        if max_id is not None:
+            newest = min(newest, (max_id - (query_id << 32)))
+        oldest = 1
+        if since_id is not None:
+            oldest = max(oldest, since_id - (query_id << 32) + 1)
+        numbers = range(newest, max(oldest, newest - count + 1) - 1, -1)
+        return [self._tweet(q, number) for number in numbers]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve the fake JSON-RPC node and OpenAI endpoint')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--contracts', type=int, default=500, help='Synthetic contracts on the chain')
+    parser.add_argument('--txs-per-block', type=int, default=50)
+    parser.add_argument('--block-time', type=float, default=2.0, help='Seconds per block; 0 freezes the head')
+    parser.add_argument('--rpc-latency', type=float, default=0.02, help='Seconds per JSON-RPC HTTP request')
+    parser.add_argument('--rpc-jitter', type=float, default=0.0)
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='Seconds per chat completion')
+    parser.add_argument('--llm-jitter', type=float, default=0.0)
+
+    args = parser.parse_args()
+
+    chain = FakeChain(seed=args.seed, contracts=args.contracts, txs_per_block=args.txs_per_block,
+                      block_time=args.block_time)
+    rpc = FakeRPCNode(chain, latency=args.rpc_latency, jitter=args.rpc_jitter, seed=args.seed).start()
+    openai = FakeOpenAI(latency=args.llm_latency, jitter=args.llm_jitter, seed=args.seed).start()
+    print(json.dumps({'rpc': rpc.url, 'openai': openai.url + '/v1'}), flush=True)
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,340 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import SUBSCRIPTION_ABI, SUBSCRIPTION_ADDRESS, FakeChain, FakeTwitterAPI
+
+SCENARIOS = ('contract', 'url', 'social', 'monitor', 'subscription_free', 'subscription_paid')
+
+# Compared against a baseline: metric -> True when higher is better
+COMPARED_METRICS = {
+    'throughput_rps': True,
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'rpc_calls_per_request': False,
+    'rpc_round_trips_per_request': False,
+    'llm_calls_per_request': False,
+}
+
+
+def start_fakes(args):
+    """Run the RPC and OpenAI fakes in their own process, so they don't share our GIL."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'fakes.py'),
+         '--seed', str(args.seed), '--contracts', str(args.contracts),
+         '--txs-per-block', str(args.txs_per_block), '--block-time', str(args.block_time),
+         '--rpc-latency', str(args.rpc_latency), '--rpc-jitter', str(args.rpc_jitter),
+         '--llm-latency', str(args.llm_latency), '--llm-jitter', str(args.llm_jitter)],
+        stdout=subprocess.PIPE, text=True
+    )
+    urls = json.loads(process.stdout.readline())
+    return process, urls
+
+
+def configure_environment(urls, workdir, overrides):
+    """Point the app at the fakes and keep every database and file in `workdir`."""
+    os.environ.update({
+        'BASE_RPC_URL': urls['rpc'],
+        'KRNL_RPC_URL': urls['rpc'],
+        'OPENAI_BASE_URL': urls['openai'],
+        'OPENAI_API_KEY': 'benchmark',
+        'SUBSCRIPTION_CONTRACT_ADDRESS': SUBSCRIPTION_ADDRESS,
+        'SUBSCRIPTION_CONTRACT_ABI': json.dumps(SUBSCRIPTION_ABI),
+        'JWT_SECRET': 'benchmark-secret',
+        'MONITOR_ENABLED': 'false',
+        'PRELOAD_CLIENTS': 'false',
+        'SAFEBASE_DB': os.path.join(workdir, 'safebase.sqlite3'),
+        'VERDICT_CACHE_DB': os.path.join(workdir, 'verdict_cache.sqlite3'),
+        'LLM_CACHE_DB': os.path.join(workdir, 'llm_cache.sqlite3'),
+        'CREATION_BLOCK_DB': os.path.join(workdir, 'creation_blocks.sqlite3'),
+        'SIMILARITY_DB': os.path.join(workdir, 'bytecode_similarity.sqlite3'),
+        'SCAM_FILTER_PATH': os.path.join(workdir, 'scam_filter.bin'),
+        'TX_STORE_DIR': os.path.join(workdir, 'tx_history'),
+    })
+    os.environ.update(overrides)
+
+
+def fake_stats(url):
+    return requests.get(url.rstrip('/') + '/stats', timeout=10).json()
+
+
+def build_scenarios(app_module, chain, args):
+    """Scenario name -> callable(i) performing request i and returning its HTTP status."""
+    import jwt
+    from flask import jsonify
+    from backend.subscription import require_subscription
+
+    flask_app = app_module.app
+    contracts = chain.contracts
+    users = [f'0x{i:040x}' for i in range(1, args.users + 1)]
+    tokens = [jwt.encode({'address': user}, os.environ['JWT_SECRET'], algorithm='HS256') for user in users]
+
+    def distinct(i):
+        return i % args.distinct if args.distinct else i
+
+    def analysis_status(result):
+        return 500 if result.get('verdict') == 'Error' else 200
+
+    def contract(i):
+        return analysis_status(app_module.analyze_contract(contracts[distinct(i) % len(contracts)]))
+
+    # Undecided domains reach the LLM; every fifth is a look-alike triage settles locally
+    def url(i):
+        n = distinct(i)
+        target = f'https://coinbase-wallet-{n}.xyz/login' if n % 5 == 0 else f'https://project-{n}.example/mint'
+        return analysis_status(app_module.analyze_url(target))
+
+    def social(i):
+        query = f'token{distinct(i) % args.queries}'
+        response = flask_app.test_client().post('/api/social', json={'query': query, 'limit': args.social_limit})
+        return response.status_code
+
+    def monitor(i):
+        address = contracts[distinct(i) % len(contracts)]
+        client = flask_app.test_client()
+        statuses = [
+            client.post('/api/monitor/add', json={'address': address}).status_code,
+            client.get('/api/monitor/list').status_code,
+            client.post('/api/monitor/remove', json={'address': address}).status_code,
+        ]
+        return max(statuses)
+
+    def protected(min_tier):
+        view = require_subscription(min_tier)(lambda: jsonify({'status': 'ok'}))
+
+        def call(i):
+            token = tokens[distinct(i) % len(tokens)]
+            with flask_app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+                return flask_app.make_response(view()).status_code
+        return call
+
+    return {
+        'contract': contract,
+        'url': url,
+        'social': social,
+        'monitor': monitor,
+        'subscription_free': protected('free'),
+        # Measures the deny path: the contract returns the tier as a uint8
+        # enum and require_subscription compares it with tier names, so
+        # every paid check currently ends in 403 (see 'statuses')
+        'subscription_paid': protected('pro'),
+    }
+
+
+def stage_totals(metrics):
+    """stage -> (count, seconds) recorded so far by the app's metrics."""
+    totals = {}
+    with metrics._lock:
+        for key, values in metrics.histograms.items():
+            if key.startswith('stage_seconds{'):
+                stage = key.split('"')[1]
+                totals[stage] = (sum(values[:-1]), values[-1])
+    return totals
+
+
+def run_scenario(name, call, args, urls):
+    """Run warm-up requests, then `args.requests` timed ones at `args.concurrency`."""
+    from backend.metrics import metrics
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(call, range(args.warmup)))
+
+        # Timed requests continue after the warm-up inputs
+        def timed(i):
+            started = time.perf_counter()
+            try:
+                status = call(args.warmup + i)
+            except Exception as e:
+                print(f"{name}: request {i} raised {e!r}", file=sys.stderr)
+                status = 599
+            return status, time.perf_counter() - started
+
+        rpc_before = fake_stats(urls['rpc'])
+        llm_before = fake_stats(urls['openai'])
+        stages_before = stage_totals(metrics)
+        started = time.perf_counter()
+        outcomes = list(pool.map(timed, range(args.requests)))
+        elapsed = time.perf_counter() - started
+        rpc_after = fake_stats(urls['rpc'])
+        llm_after = fake_stats(urls['openai'])
+        stages_after = stage_totals(metrics)
+
+    latencies = np.array([seconds for _, seconds in outcomes]) * 1000
+    statuses = {}
+    for status, _ in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    rpc_methods = {method: count - rpc_before['calls'].get(method, 0)
+                   for method, count in rpc_after['calls'].items()
+                   if count - rpc_before['calls'].get(method, 0)}
+    stages = {}
+    for stage, (count, seconds) in stages_after.items():
+        count -= stages_before.get(stage, (0, 0.0))[0]
+        seconds -= stages_before.get(stage, (0, 0.0))[1]
+        if count:
+            stages[stage] = round(seconds / count * 1000, 3)
+
+    return {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(args.requests / elapsed, 2),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'errors': sum(count for status, count in statuses.items() if int(status) >= 500),
+        'statuses': statuses,
+        'rpc_calls_per_request': round(sum(rpc_methods.values()) / args.requests, 3),
+        'rpc_round_trips_per_request': round((rpc_after['requests'] - rpc_before['requests']) / args.requests, 3),
+        'llm_calls_per_request': round(
+            (llm_after['calls'].get('chat.completions', 0) - llm_before['calls'].get('chat.completions', 0))
+            / args.requests, 3),
+        'rpc_methods': rpc_methods,
+        'stage_mean_ms': stages,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(results):
+    print(f"{'scenario':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'rpc/req':>10}{'trips/req':>11}{'llm/req':>9}{'errors':>8}")
+    for name, result in results.items():
+        print(f"{name:<20}{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}{result['rpc_calls_per_request']:>10.2f}"
+              f"{result['rpc_round_trips_per_request']:>11.2f}{result['llm_calls_per_request']:>9.2f}"
+              f"{result['errors']:>8}")
+
+
+def compare(baseline, report, tolerance):
+    """Print changes against `baseline`; returns the number of regressions beyond `tolerance`."""
+    if baseline['config'] != report['config']:
+        changed = sorted(key for key in set(baseline['config']) | set(report['config'])
+                         if baseline['config'].get(key) != report['config'].get(key))
+        print(f"Warning: configuration differs from the baseline ({', '.join(changed)})")
+
+    regressions = 0
+    print(f"\nAgainst baseline from commit {baseline.get('commit')} (tolerance {tolerance:.0%}):")
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"{name}: not in baseline")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > tolerance:
+                flag = '  REGRESSION'
+                regressions += 1
+            elif worse < -tolerance:
+                flag = '  improved'
+            print(f"  {name:<20}{metric:<30}{old:>12.2f} -> {new:>12.2f} ({change:+.1%}){flag}")
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Benchmark the backend against local fake RPC, OpenAI and Twitter services')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'Comma-separated subset of: {", ".join(SCENARIOS)}')
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed requests before each scenario')
+    parser.add_argument('--distinct', type=int, default=0,
+                        help='Cycle through this many distinct inputs (0: every request is new)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--contracts', type=int, default=500, help='Synthetic contracts on the fake chain')
+    parser.add_argument('--txs-per-block', type=int, default=50)
+    parser.add_argument('--block-time', type=float, default=2.0, help='Seconds per fake block; 0 freezes the head')
+    parser.add_argument('--rpc-latency', type=float, default=0.02, help='Seconds per JSON-RPC HTTP request')
+    parser.add_argument('--rpc-jitter', type=float, default=0.0, help='Extra uniform random RPC delay')
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='Seconds per chat completion')
+    parser.add_argument('--llm-jitter', type=float, default=0.0)
+    parser.add_argument('--twitter-latency', type=float, default=0.1, help='Seconds per search_tweets call')
+    parser.add_argument('--queries', type=int, default=20, help='Distinct /api/social queries')
+    parser.add_argument('--social-limit', type=int, default=100, help='Tweets requested per /api/social call')
+    parser.add_argument('--users', type=int, default=1000, help='Distinct JWT users for subscription checks')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Extra environment for the app, e.g. SOCIAL_REFRESH_SECONDS=0')
+    parser.add_argument('--save', metavar='PATH', help='Write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='Compare against a saved JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Relative change counted as a regression when comparing')
+
+    args = parser.parse_args()
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+    overrides = dict(item.split('=', 1) for item in args.env)
+
+    fakes, urls = start_fakes(args)
+    try:
+        with tempfile.TemporaryDirectory(prefix='safebase-bench-') as workdir:
+            configure_environment(urls, workdir, overrides)
+            # Imported only now: the app reads its configuration at import time
+            import backend.app as app_module
+
+            app_module.twitter_api._instance = FakeTwitterAPI(latency=args.twitter_latency, seed=args.seed)
+            # Same seed and size as the served chain, for its contract addresses
+            chain = FakeChain(seed=args.seed, contracts=args.contracts, txs_per_block=args.txs_per_block)
+            scenarios = build_scenarios(app_module, chain, args)
+
+            results = {}
+            for name in names:
+                print(f"Running {name}...", file=sys.stderr)
+                results[name] = run_scenario(name, scenarios[name], args, urls)
+    finally:
+        fakes.terminate()
+        fakes.wait()
+
+    config = {key: value for key, value in vars(args).items() if key not in ('save', 'compare', 'tolerance')}
+    report = {
+        'commit': git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': config,
+        'results': results,
+    }
+
+    print_report(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.tolerance):
+            sys.exit(1)
@@ -0,0 +1,9 @@
+# Loaded automatically by `gunicorn backend.app:app` when run from the repo root.
+
+
+def post_worker_init(worker):
+    # Start the watchlist monitor in each worker once the app is loaded. With
+    # --preload the app is imported in the master, and a thread started there
+    # is lost on fork; the before_request hook covers servers without this file.
+    from backend.app import start_monitor
+    start_monitor()
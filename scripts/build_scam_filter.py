@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.scam_filter import address_key, build_filter, domain_key
+from backend.url_triage import URLTriage
+
+
+def read_entries(path):
+    """Yield one entry per line, skipping blanks and # comments."""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def collect_keys(address_files, domain_files):
+    for path in address_files:
+        for address in read_entries(path):
+            yield address_key(address)
+    for path in domain_files:
+        for domain in read_entries(path):
+            host = URLTriage.host_of(domain)
+            if host:
+                yield domain_key(host)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compile known-scam lists into a memory-mappable filter')
+    parser.add_argument('--addresses', action='append', default=[], help='File with one contract address per line')
+    parser.add_argument('--domains', action='append', default=[], help='File with one domain or URL per line')
+    parser.add_argument('--output', default=os.getenv('SCAM_FILTER_PATH', 'scam_filter.bin'), help='Filter file to write')
+    parser.add_argument('--fp-rate', type=float, default=0.001, help='Bloom filter false-positive rate')
+
+    args = parser.parse_args()
+    if not args.addresses and not args.domains:
+        parser.error('give at least one --addresses or --domains file')
+
+    started = time.perf_counter()
+    info = build_filter(collect_keys(args.addresses, args.domains), args.output, args.fp_rate)
+    print(f"Wrote {args.output}: {info['entries']} entries, {info['bytes'] / 1e6:.1f} MB, "
+          f"{info['hashes']} hashes, {time.perf_counter() - started:.1f}s")
@@ -1,61 +1,280 @@
+import hashlib
 import os
-from web3 import Web3
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import json
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from web3 import Web3
+from backend.lazy import LazyClient
+
 # Load environment variables
 load_dotenv()
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(os.getenv('KRNL_RPC_URL')))
-private_key = os.getenv('DEPLOYER_PRIVATE_KEY')
 
-if not private_key:
-    raise ValueError("No private key provided in environment variables")
+def _build_web3():
+    # The shared pooled transport (and hedging when given a list of URLs)
+    from web3.transport import make_web3
+    return make_web3(os.getenv('KRNL_RPC_URL'))
 
-account = w3.eth.account.from_key(private_key)
 
+def _load_account():
+    private_key = os.getenv('DEPLOYER_PRIVATE_KEY')
+    if not private_key:
+        raise ValueError("No private key provided in environment variables")
+    return w3.eth.account.from_key(private_key)
+
+
+# Built on first use, so the compile helpers work without a node or a key
+w3 = LazyClient(_build_web3, 'krnl_web3')
+account = LazyClient(_load_account, 'deployer_account')
+
+# Compiler output, keyed by the hash of every source involved and the compiler settings
+CACHE_DIR = os.getenv('SOLC_CACHE_DIR', '.solc_cache')
+OUTPUT_VALUES = ['abi', 'bin']
+# Deployments send the node's gas estimate times this margin
+GAS_MARGIN = float(os.getenv('DEPLOY_GAS_MARGIN', 1.2))
+RECEIPT_TIMEOUT = float(os.getenv('DEPLOY_RECEIPT_TIMEOUT', 300))
+MAX_CONCURRENCY = int(os.getenv('DEPLOY_MAX_CONCURRENCY', 16))
+
+# First quoted path of an import directive, whichever of its forms is used
+IMPORT_PATTERN = re.compile(r'\bimport\s+[^;"\']*["\']([^"\']+)["\']')
+
+
+def compiler_settings(solc_version=None, optimize=False, optimize_runs=200, evm_version=None, remappings=None):
+    """Everything besides the sources that changes what solc produces."""
+    if solc_version is None:
+        from solcx import get_solc_version
+        solc_version = str(get_solc_version())
+    return {
+        'solc_version': str(solc_version),
+        'optimize': bool(optimize),
+        'optimize_runs': int(optimize_runs) if optimize else None,
+        'evm_version': evm_version,
+        'remappings': dict(remappings or {}),
+        'output_values': OUTPUT_VALUES,
+    }
+
+
+def resolve_import(importer, path, remappings):
+    """File an import directive in `importer` refers to, or None if it isn't on disk."""
+    if path.startswith('.'):
+        resolved = os.path.join(os.path.dirname(importer), path)
+    else:
+        prefix = max((p for p in remappings if path.startswith(p)), key=len, default=None)
+        resolved = os.path.join(remappings[prefix], path[len(prefix):]) if prefix is not None else path
+    resolved = os.path.normpath(resolved)
+    return resolved if os.path.isfile(resolved) else None
+
+
+def source_hashes(paths, remappings):
+    """{path or unresolved import: sha256} for `paths` and everything they import."""
+    hashes = {}
+    pending = [os.path.normpath(path) for path in paths]
+    while pending:
+        path = pending.pop()
+        if path in hashes:
+            continue
+        with open(path, 'rb') as f:
+            source = f.read()
+        hashes[path] = hashlib.sha256(source).hexdigest()
+        for imported in IMPORT_PATTERN.findall(source.decode('utf-8', 'replace')):
+            resolved = resolve_import(path, imported, remappings)
+            if resolved is None:
+                # Resolved by solc some other way; the name is all we can key on
+                hashes.setdefault(imported, None)
+            else:
+                pending.append(resolved)
+    return hashes
+
+
+def cache_key(paths, settings):
+    """Compile cache key: the source list, the hash of every file involved and the settings."""
+    return hashlib.sha256(json.dumps({
+        'sources': sorted(os.path.normpath(path) for path in paths),
+        'hashes': source_hashes(paths, settings['remappings']),
+        'settings': settings
+    }, sort_keys=True).encode()).hexdigest()
+
+
+def compile_sources(paths, settings, use_cache=True):
+    """Compile `paths` in one solc run; returns {'<source>:<Contract>': {'abi', 'bin'}}.
+
+    Output is cached under SOLC_CACHE_DIR, so unchanged sources compiled with
+    the same settings are never compiled twice.
+    """
+    cache_path = os.path.join(CACHE_DIR, f'{cache_key(paths, settings)}.json')
+
+    if use_cache and os.path.exists(cache_path):
+        with open(cache_path, 'r') as f:
+            return json.load(f)
 
-def compile_contract(contract_path):
-    """Compile a Solidity contract using solcx."""
     from solcx import compile_files
-    
-    # Compile the contract
-    compiled = compile_files([contract_path], output_values=['abi', 'bin'])
-    
-    # Get the contract data
-    contract_key = next(key for key in compiled.keys() if key.endswith(contract_path))
-    contract_data = compiled[contract_key]
-    
+
+    options = {'solc_version': settings['solc_version'], 'allow_paths': [os.getcwd()]}
+    if settings['optimize']:
+        options.update(optimize=True, optimize_runs=settings['optimize_runs'])
+    if settings['evm_version']:
+        options['evm_version'] = settings['evm_version']
+    if settings['remappings']:
+        options['import_remappings'] = [f'{prefix}={target}' for prefix, target in settings['remappings'].items()]
+
+    compiled = compile_files(list(paths), output_values=OUTPUT_VALUES, **options)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(compiled, f)
+    os.replace(tmp_path, cache_path)
+    return compiled
+
+
+def select_contract(compiled, contract_path, name=None):
+    """ABI and bytecode of contract `name` (default: the file's name) from `contract_path`."""
+    target = os.path.abspath(contract_path)
+    contracts = {}
+    for key, data in compiled.items():
+        source, _, contract_name = key.rpartition(':')
+        if os.path.abspath(source) == target:
+            contracts[contract_name] = data
+
+    if name is None:
+        name = os.path.splitext(os.path.basename(contract_path))[0]
+        deployable = [n for n, data in contracts.items() if data['bin']]
+        if name not in contracts and len(deployable) == 1:
+            name = deployable[0]
+    if name not in contracts:
+        raise ValueError(f"No contract {name} in {contract_path} (found: {', '.join(contracts) or 'none'})")
+
     return {
-        'abi': contract_data['abi'],
-        'bytecode': contract_data['bin']
+        'abi': contracts[name]['abi'],
+        'bytecode': contracts[name]['bin']
     }
 
 
+def compile_contract(contract_path, name=None, settings=None, use_cache=True):
+    """Compile a Solidity contract using solcx."""
+    settings = settings or compiler_settings()
+    compiled = compile_sources([contract_path], settings, use_cache)
+    return select_contract(compiled, contract_path, name)
+
+
+def _wait_for_receipt(tx_hash):
+    try:
+        return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=RECEIPT_TIMEOUT), None
+    except Exception as e:
+        return None, str(e)
+
+
+def deploy_contracts(deployments):
+    """Deploy many compiled contracts, waiting for every receipt at once.
+
+    Each deployment is a dict with 'abi', 'bytecode' and optional 'args' and
+    'value'. Every gas estimate is made before anything is sent; if one
+    fails, nothing is sent. Nonces are assigned locally from one
+    pending-count lookup and transactions are sent in nonce order, so the
+    node never sees a gap; a failed send stops the rest of the batch.
+    Returns one result per deployment, saying which were sent.
+    """
+    chain_id = w3.eth.chain_id
+    gas_price = w3.eth.gas_price
+    first_nonce = w3.eth.get_transaction_count(account.address, 'pending')
+
+    def estimate(deployment):
+        try:
+            contract = w3.eth.contract(abi=deployment['abi'], bytecode=deployment['bytecode'])
+            constructor = contract.constructor(*(deployment.get('args') or []))
+            gas = constructor.estimate_gas({'from': account.address, 'value': deployment.get('value', 0)})
+        except Exception as e:
+            return None, None, str(e)
+        return constructor, int(gas * GAS_MARGIN), None
+
+    with ThreadPoolExecutor(max_workers=min(max(len(deployments), 1), MAX_CONCURRENCY)) as pool:
+        # Gas estimates don't depend on each other, so they run side by side
+        estimates = list(pool.map(estimate, deployments))
+
+        results = []
+        for i, (_, gas, error) in enumerate(estimates):
+            result = {'nonce': first_nonce + i, 'gas_limit': gas, 'status': 'not sent'}
+            if error is not None:
+                result.update(status='estimate failed', error=error)
+            results.append(result)
+        if any(error is not None for _, _, error in estimates):
+            return results
+
+        sent = []
+        for i, (constructor, gas, _) in enumerate(estimates):
+            if len(sent) < i:
+                break
+            result = results[i]
+            try:
+                # Build, sign and send the transaction
+                tx = constructor.build_transaction({
+                    'chainId': chain_id,
+                    'gas': gas,
+                    'gasPrice': gas_price,
+                    'from': account.address,
+                    'nonce': first_nonce + i,
+                    'value': deployments[i].get('value', 0)
+                })
+                signed_tx = account.sign_transaction(tx)
+                tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            except Exception as e:
+                result.update(status='failed', error=str(e))
+                continue
+            result.update(status='sent', tx_hash=Web3.to_hex(tx_hash))
+            sent.append((result, tx_hash))
+
+        receipts = pool.map(_wait_for_receipt, [tx_hash for _, tx_hash in sent])
+        for (result, _), (receipt, error) in zip(sent, receipts):
+            if receipt is None:
+                # Sent, but not seen mined in time: tx_hash says what to look for
+                result.update(error=error)
+                continue
+            result.update(
+                status='deployed' if receipt.status == 1 else 'reverted',
+                address=receipt.contractAddress,
+                block=receipt.blockNumber,
+                gas_used=receipt.gasUsed
+            )
+
+    return results
+
+
 def deploy_contract(abi, bytecode, constructor_args=None):
     """Deploy a compiled contract to KRNL network."""
-    # Create contract instance
-    contract = w3.eth.contract(abi=abi, bytecode=bytecode)
-    
-    # Build transaction
-    tx = contract.constructor(*(constructor_args or [])).build_transaction({
-        'chainId': w3.eth.chain_id,
-        'gas': 2000000,
-        'gasPrice': w3.eth.gas_price,
-        'from': account.address,
-        'nonce': w3.eth.get_transaction_count(account.address)
-    })
-    
-    # Sign transaction
-    signed_tx = w3.eth.account.sign_transaction(tx, private_key)
-    
-    # Send transaction
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-    tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    
-    return tx_receipt.contractAddress
+    result, = deploy_contracts([{'abi': abi, 'bytecode': bytecode, 'args': constructor_args}])
+    if result['status'] != 'deployed':
+        raise RuntimeError(f"Deployment {result['status']}: {result.get('error', result.get('tx_hash'))}")
+    return result['address']
+
+
+def load_manifest(path):
+    """Read a deployment manifest; source and remapping paths are relative to it.
+
+    {"settings": {"solc_version": "0.8.24", "optimize": true, "optimize_runs": 200,
+                  "evm_version": null, "remappings": {"@openzeppelin/": "node_modules/@openzeppelin/"}},
+     "contracts": [{"source": "contracts/KRNL.sol", "name": "KRNL", "args": [], "value": 0, "label": "krnl"}]}
+    """
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    settings = dict(manifest.get('settings') or {})
+    # relpath() drops a trailing slash, which solc needs to remap directories
+    settings['remappings'] = {prefix: os.path.relpath(os.path.join(base, target)) + ('/' if target.endswith('/') else '')
+                              for prefix, target in (settings.get('remappings') or {}).items()}
+    contracts = []
+    for entry in manifest['contracts']:
+        entry = dict(entry)
+        entry['source'] = os.path.relpath(os.path.join(base, entry['source']))
+        entry.setdefault('name', os.path.splitext(os.path.basename(entry['source']))[0])
+        entry.setdefault('label', entry['name'])
+        contracts.append(entry)
+    return settings, contracts
 
 
 def verify_contract(address, abi, source_code):
@@ -67,23 +286,77 @@ def verify_contract(address, abi, source_code):
 
 if __name__ == '__main__':
     import argparse
-    
-    parser = argparse.ArgumentParser(description='Deploy smart contracts to KRNL network')
-    parser.add_argument('contract_path', help='Path to Solidity contract file')
+
+    parser = argparse.ArgumentParser(
+        description='Deploy smart contracts to KRNL network',
+        epilog='To try a deployment locally, start a dev chain (e.g. `npx hardhat node`) and set '
+               'KRNL_RPC_URL=http://127.0.0.1:8545 and DEPLOYER_PRIVATE_KEY to one of its funded accounts.'
+    )
+    parser.add_argument('contract_path', nargs='?', help='Path to Solidity contract file')
+    parser.add_argument('--name', help='Contract to deploy from the file (default: the file name)')
+    parser.add_argument('--manifest', help='JSON manifest of contracts to compile together and deploy as one batch')
+    parser.add_argument('--output', help='Write the deployment results as JSON')
+    parser.add_argument('--solc-version', help='solc version (default: the active solcx version)')
+    parser.add_argument('--optimize', action='store_true', default=None, help='Enable the solc optimizer')
+    parser.add_argument('--optimize-runs', type=int, help='Optimizer runs (default 200)')
+    parser.add_argument('--evm-version', help='Target EVM version')
+    parser.add_argument('--remap', action='append', default=[], metavar='PREFIX=PATH',
+                        help='Import remapping, e.g. @openzeppelin/=node_modules/@openzeppelin/')
+    parser.add_argument('--no-cache', action='store_true', help='Compile even if the output is cached')
     parser.add_argument('--verify', action='store_true', help='Verify contract after deployment')
-    
+
     args = parser.parse_args()
-    
-    print(f"Compiling contract: {args.contract_path}")
-    compiled = compile_contract(args.contract_path)
-    
-    print("Deploying contract...")
-    contract_address = deploy_contract(compiled['abi'], compiled['bytecode'])
-    
-    print(f"Contract successfully deployed at: {contract_address}")
-    
-    if args.verify:
-        print("Verifying contract...")
-        with open(args.contract_path, 'r') as f:
-            source_code = f.read()
-        verify_contract(contract_address, compiled['abi'], source_code)
\ No newline at end of file
+    if bool(args.contract_path) == bool(args.manifest):
+        parser.error('Give either a contract path or --manifest')
+
+    if args.manifest:
+        manifest_settings, entries = load_manifest(args.manifest)
+    else:
+        manifest_settings = {}
+        entries = [{'source': args.contract_path, 'name': args.name, 'label': args.name or args.contract_path}]
+
+    # Command-line options override the manifest
+    remappings = dict(manifest_settings.get('remappings') or {})
+    remappings.update(item.split('=', 1) for item in args.remap)
+    settings = compiler_settings(
+        solc_version=args.solc_version or manifest_settings.get('solc_version'),
+        optimize=args.optimize if args.optimize is not None else manifest_settings.get('optimize', False),
+        optimize_runs=args.optimize_runs or manifest_settings.get('optimize_runs', 200),
+        evm_version=args.evm_version or manifest_settings.get('evm_version'),
+        remappings=remappings
+    )
+
+    sources = list(dict.fromkeys(entry['source'] for entry in entries))
+    print(f"Compiling {len(sources)} source file(s) with solc {settings['solc_version']}...")
+    started = time.time()
+    compiled = compile_sources(sources, settings, use_cache=not args.no_cache)
+    print(f"Compiled in {time.time() - started:.1f}s")
+
+    deployments = []
+    for entry in entries:
+        contract = select_contract(compiled, entry['source'], entry.get('name'))
+        deployments.append(dict(contract, args=entry.get('args'), value=entry.get('value', 0)))
+
+    print(f"Deploying {len(deployments)} contract(s) from {account.address}...")
+    results = deploy_contracts(deployments)
+
+    report = []
+    for entry, deployment, result in zip(entries, deployments, results):
+        report.append(dict(result, label=entry['label'], source=entry['source']))
+        if result['status'] == 'deployed':
+            print(f"{entry['label']}: deployed at {result['address']} "
+                  f"(nonce {result['nonce']}, gas {result['gas_used']}/{result['gas_limit']})")
+            if args.verify:
+                with open(entry['source'], 'r') as f:
+                    source_code = f.read()
+                verify_contract(result['address'], deployment['abi'], source_code)
+        else:
+            details = [result[field] for field in ('error', 'tx_hash') if result.get(field)]
+            print(f"{entry['label']}: {result['status']} {' '.join(details)}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if any(result['status'] != 'deployed' for result in results):
+        sys.exit(1)
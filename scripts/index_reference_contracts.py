@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from web3.contract_utils import ContractAnalyzer
+
+
+def read_reference_list(path):
+    """Read "address,label[,name]" lines, skipping blanks and # comments."""
+    labels, names = {}, {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = [field.strip() for field in line.split(',')]
+            labels[fields[0]] = fields[1]
+            if len(fields) > 2 and fields[2]:
+                names[fields[0]] = fields[2]
+    return labels, names
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Add labelled contracts to the bytecode similarity index')
+    parser.add_argument('reference_file', help='File with "address,label[,name]" per line; '
+                                               'label is malicious or benign')
+
+    args = parser.parse_args()
+
+    labels, names = read_reference_list(args.reference_file)
+    print(f"Indexing {len(labels)} reference contracts...")
+
+    analyzer = ContractAnalyzer()
+    results = analyzer.index_reference_contracts(labels, names)
+
+    for address, code_hash in results.items():
+        print(f"{address}: {code_hash if code_hash is not None else 'no code'}")
+
+    print(f"Done. Index holds {len(analyzer.similarity_index)} contracts.")
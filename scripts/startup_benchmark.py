@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def measure_imports(module):
+    """Import `module` in a fresh interpreter under -X importtime.
+
+    Returns (wall seconds, {top-level package: seconds}), where each package is
+    charged the self time of all of its modules, wherever they were imported.
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True,
+        env=dict(os.environ, MONITOR_ENABLED='false')
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # Lines look like: "import time:   self [us] |  cumulative | imported package"
+    per_package = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        per_package[package] = per_package.get(package, 0) + int(self_us) / 1e6
+    return wall, per_package
+
+
+def measure_preload(module):
+    """Time importing `module` and then building every lazy client in-process."""
+    code = (
+        'import time, json\n'
+        'started = time.perf_counter()\n'
+        f'import {module}\n'
+        'imported = time.perf_counter() - started\n'
+        'from backend.lazy import preload\n'
+        'timings = preload()\n'
+        'print(json.dumps({"import": imported, "clients": timings}))\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+        env=dict(os.environ, MONITOR_ENABLED='false')
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Report worker boot cost per imported module')
+    parser.add_argument('--module', default='backend.app', help='Module a worker imports')
+    parser.add_argument('--top', type=int, default=15, help='Number of packages to list')
+    parser.add_argument('--preload', action='store_true', help='Also time building every lazy client')
+
+    args = parser.parse_args()
+
+    wall, per_package = measure_imports(args.module)
+    print(f"Importing {args.module}: {wall * 1000:.0f} ms wall (fresh interpreter)")
+    print(f"{'package':<30}{'ms':>15}")
+    for package, seconds in sorted(per_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<30}{seconds * 1000:>15.1f}")
+
+    if args.preload:
+        report = measure_preload(args.module)
+        print(f"\nImport in-process: {report['import'] * 1000:.0f} ms")
+        for name, seconds in report['clients'].items():
+            print(f"preload {name:<26}{seconds * 1000:>10.1f} ms")
@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from web3.contract_utils import ContractAnalyzer
+
+
+def read_addresses(path):
+    """Read one address per line, skipping blanks and # comments."""
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pre-compute contract creation blocks')
+    parser.add_argument('address_file', help='File with one contract address per line')
+
+    args = parser.parse_args()
+
+    addresses = read_addresses(args.address_file)
+    print(f"Warming creation blocks for {len(addresses)} addresses...")
+
+    analyzer = ContractAnalyzer()
+    results = analyzer.warm_creation_blocks(addresses)
+
+    for address, block in results.items():
+        print(f"{address}: {block if block is not None else 'not found'}")
+
+    print(f"Done. {len(addresses) - len(results)} addresses were already stored.")
@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('web3')
+deploy_krnl = pytest.importorskip('scripts.deploy_krnl')
+
+
+def settings(**overrides):
+    return deploy_krnl.compiler_settings(**dict({'solc_version': '0.8.24'}, **overrides))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'lib').mkdir()
+    (tmp_path / 'contracts').mkdir()
+    (tmp_path / 'lib' / 'Ownable.sol').write_text('contract Ownable {}\n')
+    (tmp_path / 'contracts' / 'Math.sol').write_text('library Math {}\n')
+    (tmp_path / 'contracts' / 'Token.sol').write_text(
+        'import "./Math.sol";\nimport {Ownable} from "@lib/Ownable.sol";\ncontract Token is Ownable {}\n')
+    (tmp_path / 'contracts' / 'Vault.sol').write_text('contract Vault {}\n')
+    return tmp_path
+
+
+REMAPPED = {'remappings': {'@lib/': 'lib/'}}
+
+
+def test_key_ignores_source_order(project):
+    paths = ['contracts/Token.sol', 'contracts/Vault.sol']
+    assert deploy_krnl.cache_key(paths, settings(**REMAPPED)) == \
+        deploy_krnl.cache_key(paths[::-1], settings(**REMAPPED))
+
+
+@pytest.mark.parametrize('changed', ['contracts/Token.sol', 'contracts/Math.sol', 'lib/Ownable.sol'])
+def test_key_follows_every_imported_file(project, changed):
+    before = deploy_krnl.cache_key(['contracts/Token.sol'], settings(**REMAPPED))
+    with open(changed, 'a') as f:
+        f.write('// changed\n')
+    assert deploy_krnl.cache_key(['contracts/Token.sol'], settings(**REMAPPED)) != before
+
+
+def test_key_ignores_unrelated_files(project):
+    before = deploy_krnl.cache_key(['contracts/Token.sol'], settings(**REMAPPED))
+    (project / 'contracts' / 'Vault.sol').write_text('contract Vault { uint x; }\n')
+    assert deploy_krnl.cache_key(['contracts/Token.sol'], settings(**REMAPPED)) == before
+
+
+@pytest.mark.parametrize('overrides', [
+    {'solc_version': '0.8.25'},
+    {'optimize': True},
+    {'evm_version': 'paris'},
+    {'remappings': {'@lib/': 'lib/', '@oz/': 'node_modules/@oz/'}},
+])
+def test_key_follows_compiler_settings(project, overrides):
+    before = deploy_krnl.cache_key(['contracts/Token.sol'], settings(**REMAPPED))
+    assert deploy_krnl.cache_key(['contracts/Token.sol'], settings(**dict(REMAPPED, **overrides))) != before
+
+
+def test_optimizer_runs_only_matter_when_optimizing(project):
+    paths = ['contracts/Vault.sol']
+    assert deploy_krnl.cache_key(paths, settings(optimize_runs=1)) == \
+        deploy_krnl.cache_key(paths, settings(optimize_runs=999))
+    assert deploy_krnl.cache_key(paths, settings(optimize=True, optimize_runs=1)) != \
+        deploy_krnl.cache_key(paths, settings(optimize=True, optimize_runs=999))
+
+
+def test_unresolved_imports_are_keyed_by_name(project):
+    # Without the remapping, "@lib/Ownable.sol" isn't on disk
+    hashes = deploy_krnl.source_hashes(['contracts/Token.sol'], {})
+    assert hashes['@lib/Ownable.sol'] is None
+    assert 'lib/Ownable.sol' not in hashes
+
+
+class FakeEth:
+    """Just enough of w3.eth for deploy_contracts; records what was sent."""
+
+    chain_id = 8453
+    gas_price = 10**7
+
+    def __init__(self, failing_estimates=(), failing_sends=()):
+        self.failing_estimates = set(failing_estimates)
+        self.failing_sends = set(failing_sends)
+        self.sent = []
+
+    def get_transaction_count(self, address, block):
+        return 7
+
+    def contract(self, abi, bytecode):
+        eth = self
+
+        class Constructor:
+            def estimate_gas(self, tx):
+                if bytecode in eth.failing_estimates:
+                    raise ValueError(f'execution reverted: {bytecode}')
+                return 100000
+
+            def build_transaction(self, tx):
+                return dict(tx, data=bytecode)
+
+        return SimpleNamespace(constructor=lambda *args: Constructor())
+
+    def send_raw_transaction(self, raw):
+        if raw['data'] in self.failing_sends:
+            raise ValueError('nonce too low')
+        self.sent.append(raw['nonce'])
+        return bytes([raw['nonce']]) * 32
+
+    def wait_for_transaction_receipt(self, tx_hash, timeout):
+        return SimpleNamespace(status=1, contractAddress=f'0x{tx_hash[0]:040x}', blockNumber=1, gasUsed=90000)
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    def install(**kwargs):
+        eth = FakeEth(**kwargs)
+        monkeypatch.setattr(deploy_krnl, 'w3', SimpleNamespace(eth=eth))
+        monkeypatch.setattr(deploy_krnl, 'account', SimpleNamespace(
+            address='0x' + '11' * 20, sign_transaction=lambda tx: SimpleNamespace(raw_transaction=tx)))
+        return eth
+    return install
+
+
+def deployments(*names):
+    return [{'abi': [], 'bytecode': name} for name in names]
+
+
+def test_failed_estimate_sends_nothing(chain):
+    eth = chain(failing_estimates={'b'})
+    results = deploy_krnl.deploy_contracts(deployments('a', 'b', 'c'))
+
+    assert eth.sent == []
+    assert [r['status'] for r in results] == ['not sent', 'estimate failed', 'not sent']
+    assert 'execution reverted' in results[1]['error']
+
+
+def test_failed_send_reports_what_was_sent(chain):
+    eth = chain(failing_sends={'b'})
+    results = deploy_krnl.deploy_contracts(deployments('a', 'b', 'c'))
+
+    assert eth.sent == [7]
+    assert [r['status'] for r in results] == ['deployed', 'failed', 'not sent']
+    assert results[0]['tx_hash'] and 'tx_hash' not in results[2]
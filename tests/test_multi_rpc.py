@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+
+import pytest
+
+requests = pytest.importorskip('requests')
+multi_rpc = pytest.importorskip('web3.multi_rpc')
+
+from benchmarks.fakes import FakeChain, FakeRPCNode, FakeServer
+from web3.transport import get_session
+
+BLOCK_NUMBER = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}).encode()
+
+
+class FailingNode(FakeServer):
+    """RPC endpoint that answers every request with HTTP 500."""
+
+    def handle(self, path, payload):
+        return 500, {'error': 'unavailable'}
+
+
+@pytest.fixture
+def nodes():
+    chain = FakeChain(contracts=1, senders=1)
+    started = []
+
+    def start(latency=0.0, failing=False):
+        node = (FailingNode(latency=latency) if failing else FakeRPCNode(chain, latency=latency)).start()
+        started.append(node)
+        return node
+
+    yield start
+    for node in started:
+        node.stop()
+
+
+def make_pool(*nodes, hedge_delay=0.05):
+    """Pool over `nodes`, ranked in the order given."""
+    pool = multi_rpc.EndpointPool([node.url for node in nodes], get_session, timeout=5)
+    pool.hedge_default = hedge_delay
+    for rank, endpoint in enumerate(pool.endpoints):
+        endpoint.ewma = 0.01 * (rank + 1)
+    return pool
+
+
+def requests_to(node):
+    return node.stats()['requests']
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until `condition()` holds; the losing leg of a hedge finishes in the background."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_slow_primary_is_hedged_to_the_next_endpoint(nodes):
+    slow, fast = nodes(latency=0.5), nodes()
+    pool = make_pool(slow, fast)
+
+    started = time.monotonic()
+    response = json.loads(pool.post(BLOCK_NUMBER))
+    assert time.monotonic() - started < 0.4
+    assert 'result' in response
+    assert requests_to(fast) == 1
+
+
+def test_failed_read_fails_over(nodes):
+    broken, healthy = nodes(failing=True), nodes()
+    pool = make_pool(broken, healthy)
+    pool.breaker_failures = 1
+
+    assert 'result' in json.loads(pool.post(BLOCK_NUMBER))
+    assert requests_to(healthy) == 1
+    wait_for(lambda: pool.endpoints[0].open_until > time.monotonic())
+
+
+def test_open_breaker_admits_a_single_trial_request(nodes):
+    recovering, healthy = nodes(latency=0.3), nodes()
+    pool = make_pool(recovering, healthy)
+    # Tripped earlier, and its cooldown has just run out
+    pool.endpoints[0].consecutive_failures = pool.breaker_failures
+    pool.endpoints[0].open_until = time.monotonic() - 1
+
+    threads = [threading.Thread(target=pool.post, args=(BLOCK_NUMBER,)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert requests_to(recovering) == 1
+    assert requests_to(healthy) >= 4
+    # The trial succeeds, which closes the breaker again
+    wait_for(lambda: pool.endpoints[0].open_until == 0.0)
+
+
+def test_send_is_neither_retried_nor_failed_over(nodes):
+    broken, healthy = nodes(failing=True), nodes()
+    pool = make_pool(broken, healthy)
+
+    with pytest.raises(requests.HTTPError):
+        pool.post(BLOCK_NUMBER, idempotent=False)
+    time.sleep(0.1)
+    assert requests_to(broken) == 1
+    assert requests_to(healthy) == 0
+
+
+def test_slow_send_is_not_hedged(nodes):
+    slow, fast = nodes(latency=0.3), nodes()
+    pool = make_pool(slow, fast)
+
+    assert 'result' in json.loads(pool.post(BLOCK_NUMBER, idempotent=False))
+    assert requests_to(slow) == 1
+    assert requests_to(fast) == 0
+
+
+def test_provider_sends_raw_transactions_without_hedging(nodes):
+    broken, healthy = nodes(failing=True), nodes()
+    provider = multi_rpc.HedgedHTTPProvider([broken.url, healthy.url], get_session, timeout=5)
+    for rank, endpoint in enumerate(provider.pool.endpoints):
+        endpoint.ewma = 0.01 * (rank + 1)
+
+    with pytest.raises(requests.HTTPError):
+        provider.make_request('eth_sendRawTransaction', ['0x00'])
+    assert requests_to(broken) == 1
+    assert requests_to(healthy) == 0
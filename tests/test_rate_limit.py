@@ -0,0 +1,51 @@
+import pytest
+
+from backend.rate_limit import MemoryRateStore, RateLimiter
+from backend.storage import Storage
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def limiter(request, tmp_path):
+    storage = Storage(str(tmp_path / 'safebase.sqlite3')) if request.param == 'sqlite' else None
+    return RateLimiter(limits={'free': (3, 100)}, storage=storage, backend=request.param)
+
+
+def allowed(limiter, key, now, attempts):
+    return sum(limiter.allow('free', key, now=now) for _ in range(attempts))
+
+
+def test_limit_holds_within_a_window(limiter):
+    assert allowed(limiter, 'alice', 10, 5) == 3
+    # Keys are counted separately
+    assert allowed(limiter, 'bob', 10, 5) == 3
+
+
+def test_previous_window_is_weighted_by_its_overlap(limiter):
+    assert allowed(limiter, 'alice', 50, 3) == 3
+    # Halfway through the next window, half of the previous 3 still counts
+    assert allowed(limiter, 'alice', 150, 5) == 2
+
+
+def test_idle_key_starts_fresh(limiter):
+    assert allowed(limiter, 'alice', 50, 3) == 3
+    assert allowed(limiter, 'alice', 350, 5) == 3
+
+
+def test_unlimited_tier_always_allows(limiter):
+    assert allowed(limiter, 'alice', 10, 1) == 1
+    assert all(limiter.allow('pro', 'alice', now=10) for _ in range(100))
+
+
+def test_memory_store_expires_idle_keys():
+    store = MemoryRateStore(period=10, max_keys=100)
+    store.consume('a', 3, now=0)
+    store.consume('b', 3, now=1)
+    store.consume('c', 3, now=50)
+    assert len(store) == 1
+
+
+def test_memory_store_is_bounded():
+    store = MemoryRateStore(period=10, max_keys=2)
+    for key in 'abcd':
+        store.consume(key, 3, now=0)
+    assert len(store) == 2
@@ -0,0 +1,50 @@
+import os
+
+from backend.scam_filter import ScamFilter, address_key, build_filter, domain_key
+
+SCAM_ADDRESS = '0x00000000000000000000000000000000DeaDBeef'
+CLEAN_ADDRESS = '0x0000000000000000000000000000000000000001'
+
+
+def write_filter(path, addresses=(), domains=()):
+    build_filter([address_key(a) for a in addresses] + [domain_key(d) for d in domains], str(path))
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'scam_filter.bin'
+    extra = [f'0x{i:040x}' for i in range(2, 1000)]
+    write_filter(path, [SCAM_ADDRESS] + extra, ['evil-airdrop.xyz'])
+    scams = ScamFilter(str(path), reload_interval=0)
+
+    # Addresses match case-insensitively
+    assert scams.is_known_scam_address(SCAM_ADDRESS.lower())
+    assert all(scams.is_known_scam_address(address) for address in extra)
+    assert not scams.is_known_scam_address(CLEAN_ADDRESS)
+    # A listed domain covers its subdomains, not its parent
+    assert scams.is_known_scam_url('https://claim.evil-airdrop.xyz/connect')
+    assert not scams.is_known_scam_url('https://airdrop.xyz/')
+    assert scams.stats()['entries'] == len(extra) + 2
+
+
+def test_rebuilt_file_is_picked_up(tmp_path):
+    path = tmp_path / 'scam_filter.bin'
+    write_filter(path, [CLEAN_ADDRESS])
+    scams = ScamFilter(str(path), reload_interval=0)
+    assert not scams.is_known_scam_address(SCAM_ADDRESS)
+
+    # build_filter swaps in a new file, which the next lookup maps
+    write_filter(path, [SCAM_ADDRESS])
+    assert scams.is_known_scam_address(SCAM_ADDRESS)
+
+
+def test_missing_or_corrupt_file_matches_nothing(tmp_path):
+    path = tmp_path / 'scam_filter.bin'
+    assert not ScamFilter(str(path)).is_known_scam_address(SCAM_ADDRESS)
+
+    write_filter(path, [SCAM_ADDRESS])
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 1)
+    scams = ScamFilter(str(path))
+    assert not scams.is_known_scam_address(SCAM_ADDRESS)
+    assert scams.stats()['loaded'] is False
+    assert scams.error
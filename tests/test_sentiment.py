@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip('numpy')
+textblob = pytest.importorskip('textblob')
+
+from backend.sentiment import SentimentEngine, score_texts
+
+CASES = [
+    "not very good",
+    "it is not really good",
+    "This is not a bad idea",
+    "The team isn't honest",
+    "This project is great!",
+    "great!!!",
+    "really not good",
+    "Never been this happy :)",
+    "so sad :( but very very nice (!)",
+    "I don't like it at all",
+    "terribly good",
+    "",
+]
+
+
+@pytest.mark.parametrize('text', CASES)
+def test_matches_textblob_pattern_analyzer(text):
+    expected = textblob.TextBlob(text).sentiment.polarity
+    assert score_texts([text])[0] == pytest.approx(expected, abs=1e-9)
+
+
+def test_engine_classifies_with_cache():
+    class Tweet:
+        def __init__(self, id, text):
+            self.id = id
+            self.text = text
+
+    engine = SentimentEngine(cache_size=2)
+    tweets = [Tweet(1, "This project is great!"), Tweet(2, "The dev is a terrible liar"), Tweet(3, "gm")]
+    assert engine.classify(tweets) == {'positive': 1, 'negative': 1, 'neutral': 1}
+    assert engine.classify(tweets) == {'positive': 1, 'negative': 1, 'neutral': 1}
+    assert len(engine._cache) == 2
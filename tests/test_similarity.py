@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+similarity = pytest.importorskip('web3.similarity')
+
+
+def opcodes(seed, length=3000):
+    rng = random.Random(seed)
+    return bytes(rng.randrange(256) for _ in range(length))
+
+
+def mutated(code, changes, seed=0):
+    rng = random.Random(seed)
+    code = bytearray(code)
+    for _ in range(changes):
+        code[rng.randrange(len(code))] = rng.randrange(256)
+    return bytes(code)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / 'similarity.sqlite3')
+
+
+def test_nearest_finds_a_near_copy(index_path):
+    index = similarity.SimilarityIndex(index_path)
+    drainer = opcodes(1)
+    index.add('0xdrainer', drainer, 'malicious', 'Drainer')
+    index.add('0xtoken', opcodes(2), 'benign', 'Token')
+
+    matches = index.nearest(mutated(drainer, 5))
+    assert [match['code_hash'] for match in matches] == ['0xdrainer']
+    assert matches[0]['similarity'] > 0.9
+    assert index.nearest(opcodes(3)) == []
+
+
+def test_relabel_replaces_the_entry(index_path):
+    index = similarity.SimilarityIndex(index_path)
+    code = opcodes(1)
+    index.add('0xcontract', code, 'benign', 'Vault')
+    index.add('0xcontract', code, 'malicious', 'Vault (drainer)')
+
+    assert len(index) == 1
+    match, = index.nearest(code)
+    assert (match['label'], match['name']) == ('malicious', 'Vault (drainer)')
+    # And it persists
+    match, = similarity.SimilarityIndex(index_path).nearest(code)
+    assert match['label'] == 'malicious'
+
+
+def test_running_index_loads_rows_added_elsewhere(index_path):
+    worker = similarity.SimilarityIndex(index_path)
+    worker.reload_interval = 0
+    code = opcodes(1)
+    assert worker.nearest(code) == []
+
+    # e.g. scripts/index_reference_contracts.py in another process
+    similarity.SimilarityIndex(index_path).add('0xcontract', code, 'benign')
+    assert [match['label'] for match in worker.nearest(code)] == ['benign']
+
+    similarity.SimilarityIndex(index_path).add('0xcontract', code, 'malicious')
+    assert [match['label'] for match in worker.nearest(code)] == ['malicious']
+
+
+def test_nearest_analysis_is_reused_until_the_index_changes(index_path):
+    index = similarity.SimilarityIndex(index_path)
+    code = opcodes(1)
+    index.add('0xcontract', code, 'benign')
+    analysis = {'opcodes': code}
+
+    first = index.nearest_analysis(analysis)
+    assert index.nearest_analysis(analysis) is first
+    assert 'signature' in analysis
+
+    index.add('0xcontract', code, 'malicious')
+    assert index.nearest_analysis(analysis)[0]['label'] == 'malicious'
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from backend.verdict_cache import VerdictCache
+
+
+def slow_counter(result, delay=0.2):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(delay)
+        return result
+    return compute, calls
+
+
+def run_concurrently(functions):
+    results = [None] * len(functions)
+
+    def run(i):
+        results[i] = functions[i]()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(functions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_threads_share_one_computation(tmp_path):
+    cache = VerdictCache(path=str(tmp_path / 'verdicts.sqlite3'))
+    compute, calls = slow_counter({'verdict': 'Safe'})
+
+    results = run_concurrently([lambda: cache.get_or_compute('key', compute)] * 8)
+
+    assert calls == [1]
+    assert results == [{'verdict': 'Safe'}] * 8
+    assert cache.get('key') == {'verdict': 'Safe'}
+
+
+def test_workers_share_one_computation_through_the_lease(tmp_path):
+    path = str(tmp_path / 'verdicts.sqlite3')
+    # Separate instances stand in for separate gunicorn workers
+    workers = [VerdictCache(path=path) for _ in range(3)]
+    compute, calls = slow_counter({'verdict': 'Safe'})
+
+    results = run_concurrently([lambda cache=cache: cache.get_or_compute('key', compute) for cache in workers])
+
+    assert calls == [1]
+    assert results == [{'verdict': 'Safe'}] * 3
+
+
+def test_uncacheable_results_are_recomputed(tmp_path):
+    cache = VerdictCache(path=str(tmp_path / 'verdicts.sqlite3'))
+    compute, calls = slow_counter({'verdict': 'Error'}, delay=0)
+    cacheable = lambda result: result['verdict'] != 'Error'
+
+    cache.get_or_compute('key', compute, cacheable=cacheable)
+    cache.get_or_compute('key', compute, cacheable=cacheable)
+
+    assert calls == [1, 1]
+    assert cache.get('key') is None
+
+
+def test_wait_timeout_computes_without_taking_the_lease(tmp_path):
+    path = str(tmp_path / 'verdicts.sqlite3')
+    holder, waiter = VerdictCache(path=path), VerdictCache(path=path)
+    assert holder._acquire_lease('key')
+
+    started = time.monotonic()
+    assert waiter.get_or_compute('key', lambda: {'verdict': 'Safe'}, wait_timeout=0.2) == {'verdict': 'Safe'}
+    assert time.monotonic() - started < 1
+
+    owners = holder._connect().execute('SELECT owner FROM verdict_leases WHERE key = ?', ('key',)).fetchall()
+    assert owners == [(holder.owner,)]
+
+
+def test_follower_stops_waiting_at_its_deadline(tmp_path):
+    cache = VerdictCache(path=str(tmp_path / 'verdicts.sqlite3'))
+    release = threading.Event()
+
+    def stuck():
+        release.wait()
+        return {'verdict': 'Safe'}
+
+    leader = threading.Thread(target=cache.get_or_compute, args=('key', stuck))
+    leader.start()
+    time.sleep(0.05)
+    try:
+        started = time.monotonic()
+        result = cache.get_or_compute('key', lambda: {'verdict': 'Unknown'}, wait_timeout=0.2)
+        assert result == {'verdict': 'Unknown'}
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        leader.join()
@@ -0,0 +1,115 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class BlockCache:
+    """Process-wide ring buffer of recent full blocks, indexed by recipient."""
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or int(os.getenv('BLOCK_CACHE_SIZE', 256))
+        self.blocks: Dict[int, Any] = {}
+        # Lowercased `to` address -> {block number: [transactions]}
+        self.by_recipient: Dict[str, Dict[int, List[Any]]] = {}
+        self.head: Optional[int] = None
+        self._lock = threading.Lock()
+        # Held while downloading so concurrent callers never fetch the same block twice
+        self._fetch_lock = threading.Lock()
+
+    def _insert(self, number: int, block: Any) -> None:
+        """Store a block and index its transactions by recipient."""
+        self.blocks[number] = block
+        for tx in block.transactions:
+            if tx['to']:
+                per_block = self.by_recipient.setdefault(tx['to'].lower(), {})
+                per_block.setdefault(number, []).append(tx)
+
+    def _evict_below(self, floor: int) -> None:
+        """Drop every block older than `floor` along with its index entries."""
+        for number in [n for n in self.blocks if n < floor]:
+            block = self.blocks.pop(number)
+            for tx in block.transactions:
+                if not tx['to']:
+                    continue
+                key = tx['to'].lower()
+                per_block = self.by_recipient.get(key)
+                if per_block is None:
+                    continue
+                per_block.pop(number, None)
+                if not per_block:
+                    del self.by_recipient[key]
+
+    def sync(self, w3, depth: int, fetcher=None) -> int:
+        """Make sure the last `depth` blocks are cached and return the head number.
+
+        When a BatchFetcher is given, missing blocks are downloaded as batched
+        JSON-RPC requests instead of one get_block call each.
+        """
+        depth = min(depth, self.capacity)
+        head = w3.eth.block_number
+
+        with self._fetch_lock:
+            with self._lock:
+                missing = [n for n in range(head - depth + 1, head + 1)
+                           if n >= 0 and n not in self.blocks]
+
+            if fetcher is not None:
+                fetched = fetcher.get_blocks(missing, True) if missing else {}
+            else:
+                fetched = {n: w3.eth.get_block(n, True) for n in missing}
+
+            with self._lock:
+                for number, block in fetched.items():
+                    if number not in self.blocks:
+                        self._insert(number, block)
+                if self.head is None or head > self.head:
+                    self.head = head
+                self._evict_below(self.head - self.capacity + 1)
+
+        return head
+
+    def add_block(self, number: int, block: Any) -> None:
+        """Insert a block fetched elsewhere (e.g. by the watchlist monitor)."""
+        self.add_blocks({number: block})
+
+    def add_blocks(self, blocks: Dict[int, Any]) -> None:
+        """Insert blocks fetched elsewhere; ones older than the cached window are skipped."""
+        if not blocks:
+            return
+        with self._lock:
+            newest = max(blocks)
+            if self.head is None or newest > self.head:
+                self.head = newest
+            floor = self.head - self.capacity + 1
+            for number, block in blocks.items():
+                if number >= floor and number not in self.blocks:
+                    self._insert(number, block)
+            self._evict_below(floor)
+
+    def transactions_to(self, w3, address: str, depth: int, fetcher=None) -> List[Any]:
+        """Return transactions sent to `address` within the last `depth` blocks."""
+        head = self.sync(w3, depth, fetcher)
+        floor = head - depth + 1
+
+        with self._lock:
+            per_block = self.by_recipient.get(address.lower(), {})
+            return [tx
+                    for number in sorted(per_block, reverse=True)
+                    if floor <= number <= head
+                    for tx in per_block[number]]
+
+    def cached(self, numbers: List[int]) -> Dict[int, Any]:
+        """Return whichever of `numbers` are currently cached."""
+        with self._lock:
+            return {n: self.blocks[n] for n in numbers if n in self.blocks}
+
+    def clear(self) -> None:
+        """Forget every cached block."""
+        with self._lock:
+            self.blocks.clear()
+            self.by_recipient.clear()
+            self.head = None
+
+
+# Shared by every ContractAnalyzer in the process
+block_cache = BlockCache()
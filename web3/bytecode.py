@@ -0,0 +1,200 @@
+from web3 import Web3
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import os
+import threading
+
+# Opcode byte -> mnemonic. PUSH1..PUSH32, DUP1..DUP16, SWAP1..SWAP16 and
+# LOG0..LOG4 are filled in below.
+OPCODES = {
+    0x00: 'STOP', 0x01: 'ADD', 0x02: 'MUL', 0x03: 'SUB', 0x04: 'DIV', 0x05: 'SDIV',
+    0x06: 'MOD', 0x07: 'SMOD', 0x08: 'ADDMOD', 0x09: 'MULMOD', 0x0a: 'EXP', 0x0b: 'SIGNEXTEND',
+    0x10: 'LT', 0x11: 'GT', 0x12: 'SLT', 0x13: 'SGT', 0x14: 'EQ', 0x15: 'ISZERO',
+    0x16: 'AND', 0x17: 'OR', 0x18: 'XOR', 0x19: 'NOT', 0x1a: 'BYTE', 0x1b: 'SHL',
+    0x1c: 'SHR', 0x1d: 'SAR', 0x20: 'KECCAK256',
+    0x30: 'ADDRESS', 0x31: 'BALANCE', 0x32: 'ORIGIN', 0x33: 'CALLER', 0x34: 'CALLVALUE',
+    0x35: 'CALLDATALOAD', 0x36: 'CALLDATASIZE', 0x37: 'CALLDATACOPY', 0x38: 'CODESIZE',
+    0x39: 'CODECOPY', 0x3a: 'GASPRICE', 0x3b: 'EXTCODESIZE', 0x3c: 'EXTCODECOPY',
+    0x3d: 'RETURNDATASIZE', 0x3e: 'RETURNDATACOPY', 0x3f: 'EXTCODEHASH',
+    0x40: 'BLOCKHASH', 0x41: 'COINBASE', 0x42: 'TIMESTAMP', 0x43: 'NUMBER',
+    0x44: 'PREVRANDAO', 0x45: 'GASLIMIT', 0x46: 'CHAINID', 0x47: 'SELFBALANCE',
+    0x48: 'BASEFEE', 0x49: 'BLOBHASH', 0x4a: 'BLOBBASEFEE',
+    0x50: 'POP', 0x51: 'MLOAD', 0x52: 'MSTORE', 0x53: 'MSTORE8', 0x54: 'SLOAD',
+    0x55: 'SSTORE', 0x56: 'JUMP', 0x57: 'JUMPI', 0x58: 'PC', 0x59: 'MSIZE', 0x5a: 'GAS',
+    0x5b: 'JUMPDEST', 0x5c: 'TLOAD', 0x5d: 'TSTORE', 0x5e: 'MCOPY', 0x5f: 'PUSH0',
+    0xf0: 'CREATE', 0xf1: 'CALL', 0xf2: 'CALLCODE', 0xf3: 'RETURN', 0xf4: 'DELEGATECALL',
+    0xf5: 'CREATE2', 0xfa: 'STATICCALL', 0xfd: 'REVERT', 0xfe: 'INVALID', 0xff: 'SELFDESTRUCT',
+}
+OPCODES.update({0x60 + i: f'PUSH{i + 1}' for i in range(32)})
+OPCODES.update({0x80 + i: f'DUP{i + 1}' for i in range(16)})
+OPCODES.update({0x90 + i: f'SWAP{i + 1}' for i in range(16)})
+OPCODES.update({0xa0 + i: f'LOG{i}' for i in range(5)})
+
+# Opcodes reported as flags on every analysis
+FLAGGED_OPCODES = ['DELEGATECALL', 'SELFDESTRUCT', 'CALLCODE', 'CREATE2', 'CREATE', 'ORIGIN', 'SSTORE', 'CALL']
+
+# Subset of the flags treated as risky by verify_contract
+RISKY_OPCODES = ['DELEGATECALL', 'SELFDESTRUCT', 'CALLCODE', 'CREATE2']
+
+
+# Keys solc writes into the metadata trailer; one of the first four must be present
+METADATA_KEYS = {'ipfs', 'bzzr0', 'bzzr1', 'solc', 'experimental'}
+REQUIRED_METADATA_KEYS = {'ipfs', 'bzzr0', 'bzzr1', 'solc'}
+
+
+def _cbor_item(data: bytes, pos: int):
+    """Decode one CBOR uint, byte/text string or simple value; returns (value, next pos)."""
+    if pos >= len(data):
+        raise ValueError('truncated CBOR')
+    major, info = data[pos] >> 5, data[pos] & 0x1f
+    pos += 1
+    if info < 24:
+        value = info
+    elif info in (24, 25, 26, 27):
+        size = 1 << (info - 24)
+        if pos + size > len(data):
+            raise ValueError('truncated CBOR')
+        value = int.from_bytes(data[pos:pos + size], 'big')
+        pos += size
+    else:
+        raise ValueError('unsupported CBOR length')
+
+    if major == 0:
+        return value, pos
+    if major in (2, 3):
+        if pos + value > len(data):
+            raise ValueError('truncated CBOR')
+        raw = data[pos:pos + value]
+        return (raw.decode() if major == 3 else raw), pos + value
+    if major == 7 and info in (20, 21):
+        return info == 21, pos
+    raise ValueError('unexpected CBOR type')
+
+
+def metadata_start(code: bytes) -> Optional[int]:
+    """Offset of solc's CBOR metadata trailer, or None if `code` doesn't end with one.
+
+    The trailer only counts when its length suffix frames a CBOR map that
+    parses exactly and holds solc's keys; anything else is treated as code.
+    """
+    if len(code) < 3:
+        return None
+    length = int.from_bytes(code[-2:], 'big')
+    start = len(code) - 2 - length
+    if start < 0 or not 0xa1 <= code[start] <= 0xb7:
+        return None
+
+    trailer = code[start:-2]
+    keys = set()
+    try:
+        pos = 1
+        for _ in range(trailer[0] & 0x1f):
+            key, pos = _cbor_item(trailer, pos)
+            _, pos = _cbor_item(trailer, pos)
+            if not isinstance(key, str) or key not in METADATA_KEYS:
+                return None
+            keys.add(key)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if pos != len(trailer) or not keys & REQUIRED_METADATA_KEYS:
+        return None
+    return start
+
+
+def strip_metadata(code: bytes) -> bytes:
+    """Drop the CBOR metadata trailer solc appends after the runtime code.
+
+    The trailer is data, not instructions; decoding it produces bogus opcodes.
+    """
+    start = metadata_start(code)
+    return code if start is None else code[:start]
+
+
+def _decode(body: bytes):
+    """One linear pass: opcode counts, JUMPDESTs, opcode stream and PUSHed values."""
+    counts: Dict[str, int] = {}
+    jumpdests: List[int] = []
+    opcodes = bytearray()
+    pushed = set()
+    pc = 0
+    end = len(body)
+
+    while pc < end:
+        op = body[pc]
+        name = OPCODES.get(op, 'INVALID')
+        counts[name] = counts.get(name, 0) + 1
+        opcodes.append(op)
+        if op == 0x5b:
+            jumpdests.append(pc)
+        if 0x60 <= op <= 0x7f:
+            # PUSHn carries n bytes of data that must not be read as opcodes
+            size = op - 0x5f
+            if size <= 4:
+                pushed.add(int.from_bytes(body[pc + 1:pc + 1 + size], 'big'))
+            pc += size
+        pc += 1
+    return counts, jumpdests, opcodes, pushed
+
+
+def disassemble(code: bytes) -> Dict[str, Any]:
+    """Decode runtime bytecode in one linear pass, skipping PUSH immediates."""
+    start = metadata_start(code)
+    body = code if start is None else code[:start]
+    counts, jumpdests, opcodes, pushed = _decode(body)
+
+    # A jump target inside the trailer means it is reachable code, not metadata
+    metadata_reachable = start is not None and any(
+        start <= target < len(code) and code[target] == 0x5b for target in pushed)
+    if metadata_reachable:
+        body = code
+        counts, jumpdests, opcodes, _ = _decode(body)
+
+    return {
+        'instruction_count': sum(counts.values()),
+        'opcode_counts': counts,
+        'jumpdests': jumpdests,
+        'flags': {name: name in counts for name in FLAGGED_OPCODES},
+        'metadata_length': len(code) - len(body),
+        'metadata_reachable': metadata_reachable,
+        # Opcode stream without PUSH data, for similarity fingerprints
+        'opcodes': bytes(opcodes),
+    }
+
+
+class BytecodeAnalysisCache:
+    """LRU of disassembly results keyed by keccak256 of the runtime code.
+
+    Clones and minimal proxies share identical runtime code, so one decode
+    serves every deployment.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv('BYTECODE_CACHE_SIZE', 10000))
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, code: bytes) -> Dict[str, Any]:
+        """Return the (possibly cached) disassembly of `code`."""
+        code_hash = Web3.keccak(code).hex()
+        with self._lock:
+            cached = self._entries.get(code_hash)
+            if cached is not None:
+                self._entries.move_to_end(code_hash)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        analysis = disassemble(code)
+        analysis['code_hash'] = code_hash
+
+        with self._lock:
+            self._entries[code_hash] = analysis
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+
+# Shared by every ContractAnalyzer in the process
+bytecode_cache = BytecodeAnalysisCache()
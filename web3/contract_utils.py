@@ -1,59 +1,104 @@
 from web3 import Web3
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional
 import os
 from dotenv import load_dotenv
+from web3.block_cache import block_cache
+from web3.rpc_batch import BatchFetcher
+from web3.creation_store import creation_store
+from web3.bytecode import RISKY_OPCODES, bytecode_cache
+from web3.similarity import similarity_index
+from web3.tx_store import BackfillQueue, history_metrics, tx_store
+from web3.transport import make_web3
 
 # Load environment variables
 load_dotenv()
 
 class ContractAnalyzer:
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(os.getenv('BASE_RPC_URL')))
-        self.risky_opcodes = {
-            'DELEGATECALL': '0xf4',
-            'SELFDESTRUCT': '0xff'
+        self.w3 = make_web3(os.getenv('BASE_RPC_URL'))
+        self.block_cache = block_cache
+        self.fetcher = BatchFetcher(self.w3)
+        self.creation_store = creation_store
+        # Deepest block window read by any analysis; fetched in one batched pass
+        self.scan_depth = 100
+        self.bytecode_cache = bytecode_cache
+        self.similarity_index = similarity_index
+        # Deep per-contract history, grown in the background
+        self.tx_store = tx_store
+        self.backfill = BackfillQueue(self.tx_store, lambda: self.w3.eth.block_number, self._get_blocks)
+        # A reference contract this similar decides the verdict on its own
+        self.clone_threshold = float(os.getenv('SIMILARITY_MATCH_THRESHOLD', 0.9))
+
+    def inspect_bytecode(self, address: str, code: Optional[bytes] = None) -> Dict[str, Any]:
+        """Validate `address` and analyze its bytecode, without scanning blocks.
+
+        Sets `clone_match` when the code nearly copies a labelled reference
+        contract; a copy of a malicious one needs no further chain reads.
+        """
+        # Check if address is valid
+        if not self.w3.is_address(address):
+            return {
+                'is_valid': False,
+                'error': 'Invalid address format'
+            }
+
+        # Get contract bytecode
+        if code is None:
+            code = self.w3.eth.get_code(address)
+        code = bytes(code)
+        if len(code) == 0:
+            return {
+                'is_valid': False,
+                'error': 'No contract code found'
+            }
+        bytecode = '0x' + code.hex()
+
+        # Disassemble (or reuse the analysis of an identical contract)
+        disassembly = self.bytecode_cache.analyze(code)
+        risky_ops_found = [op_name for op_name in RISKY_OPCODES
+                           if disassembly['flags'][op_name]]
+
+        similar = self.similarity_index.nearest_analysis(disassembly)
+        return {
+            'is_valid': True,
+            'bytecode_length': len(bytecode),
+            'risky_operations': risky_ops_found,
+            'bytecode_analysis': {
+                'code_hash': disassembly['code_hash'],
+                'instruction_count': disassembly['instruction_count'],
+                'jumpdest_count': len(disassembly['jumpdests']),
+                'flags': disassembly['flags'],
+                'metadata_reachable': disassembly['metadata_reachable']
+            },
+            'similar_contracts': similar,
+            'clone_match': similar[0] if similar and similar[0]['similarity'] >= self.clone_threshold else None
         }
 
-    def verify_contract(self, address: str) -> Dict[str, Any]:
-        """Verify a smart contract's bytecode and recent transactions."""
+    def recent_transaction_count(self, address: str) -> int:
+        """Transactions sent to `address` in the last 10 blocks."""
+        # Warm the whole scan window once, then read the last 10 blocks from it
+        self.block_cache.sync(self.w3, self.scan_depth, self.fetcher)
+        return len(self.block_cache.transactions_to(self.w3, address, 10, self.fetcher))
+
+    def verify_contract(self, address: str, code: Optional[bytes] = None) -> Dict[str, Any]:
+        """Verify a smart contract's bytecode and recent transactions.
+
+        `code` may be passed in when it was already fetched, e.g. by prefetch().
+        """
         try:
-            # Check if address is valid
-            if not self.w3.is_address(address):
-                return {
-                    'is_valid': False,
-                    'error': 'Invalid address format'
-                }
-
-            # Get contract bytecode
-            bytecode = self.w3.eth.get_code(address).hex()
-            if bytecode == '0x':
-                return {
-                    'is_valid': False,
-                    'error': 'No contract code found'
-                }
-
-            # Check for risky opcodes
-            risky_ops_found = []
-            for op_name, op_code in self.risky_opcodes.items():
-                if op_code in bytecode:
-                    risky_ops_found.append(op_name)
-
-            # Get recent transactions
-            block_number = self.w3.eth.block_number
-            recent_txs = []
-            for i in range(10):  # Check last 10 blocks
-                block = self.w3.eth.get_block(block_number - i, True)
-                for tx in block.transactions:
-                    if tx['to'] and tx['to'].lower() == address.lower():
-                        recent_txs.append(tx)
+            result = self.inspect_bytecode(address, code)
 
-            return {
-                'is_valid': True,
-                'bytecode_length': len(bytecode),
-                'risky_operations': risky_ops_found,
-                'recent_transactions': len(recent_txs),
-                'creation_block': self.get_contract_creation_block(address)
-            }
+            # A near-copy of a known malicious contract needs no chain scan
+            clone = result.get('clone_match')
+            if not result['is_valid'] or (clone is not None and clone['label'] == 'malicious'):
+                return result
+
+            # Search for the creation block while the recent blocks download
+            creation_block = self.fetcher.submit(self.get_contract_creation_block, address)
+
+            result['recent_transactions'] = self.recent_transaction_count(address)
+            result['creation_block'] = creation_block.result()
+            return result
 
         except Exception as e:
             return {
@@ -63,52 +108,125 @@ class ContractAnalyzer:
 
     def get_contract_creation_block(self, address: str) -> Optional[int]:
         """Get the block number where the contract was created."""
+        # Creation block never changes, so a stored answer is final
+        known = self.creation_store.get(address)
+        if known is not None:
+            return known
+
         try:
-            # Binary search for contract creation
-            left = 0
-            right = self.w3.eth.block_number
+            # Bisect for the first block with code: one archive get_code per
+            # round, and a bound once read is never read again. Blocks below
+            # `left` have no code, `right` has code; head + 1 means "none found".
+            head = self.w3.eth.block_number
+            left, right = 0, head + 1
 
-            while left <= right:
+            while left < right:
                 mid = (left + right) // 2
-                code = self.w3.eth.get_code(address, mid)
-                prev_code = self.w3.eth.get_code(address, mid - 1) if mid > 0 else b''
-
-                if len(code) > 0 and len(prev_code) == 0:
-                    return mid
-                elif len(code) == 0:
-                    left = mid + 1
+                if len(self.w3.eth.get_code(address, mid)) > 0:
+                    right = mid
                 else:
-                    right = mid - 1
+                    left = mid + 1
 
-            return None
+            if left > head:
+                return None
+
+            self.creation_store.set(address, left)
+            return left
 
         except Exception:
             return None
 
+    def prefetch(self, addresses: Iterable[str]) -> Dict[str, bytes]:
+        """Fetch shared chain data for many contracts in a few batched requests.
+
+        Syncs the recent block window once and batches get_code for every valid
+        address. Returns the code keyed by the address as given.
+        """
+        valid = [address for address in addresses if self.w3.is_address(address)]
+        if not valid:
+            return {}
+
+        try:
+            self.block_cache.sync(self.w3, self.scan_depth, self.fetcher)
+            codes = self.fetcher.map('get_code', [(Web3.to_checksum_address(a),) for a in valid])
+            return dict(zip(valid, codes))
+        except Exception:
+            # Each contract falls back to fetching its own data
+            return {}
+
+    def index_reference_contracts(self, labels: Dict[str, str],
+                                  names: Optional[Dict[str, str]] = None) -> Dict[str, Optional[str]]:
+        """Add contracts to the similarity index, labelled e.g. 'malicious' or 'benign'.
+
+        Returns the indexed code hash per address (None when it has no code).
+        """
+        names = names or {}
+        codes = self.prefetch(labels)
+        indexed = {}
+        for address, label in labels.items():
+            code = bytes(codes.get(address, b''))
+            if not code:
+                indexed[address] = None
+                continue
+            disassembly = self.bytecode_cache.analyze(code)
+            self.similarity_index.add(disassembly['code_hash'], disassembly['opcodes'],
+                                      label, names.get(address, address))
+            indexed[address] = disassembly['code_hash']
+        return indexed
+
+    def warm_creation_blocks(self, addresses: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Fill the creation block store for many addresses at once."""
+        addresses = self.creation_store.missing(addresses)
+        futures = {address: self.fetcher.submit(self.get_contract_creation_block, address)
+                   for address in addresses}
+        return {address: future.result() for address, future in futures.items()}
+
+    def _get_blocks(self, numbers: List[int]) -> Dict[int, Any]:
+        """Full blocks through the recent-block cache; recent downloads are shared with it."""
+        blocks = self.block_cache.cached(numbers)
+        missing = [n for n in numbers if n not in blocks]
+        if missing:
+            fetched = self.fetcher.get_blocks(missing, True)
+            self.block_cache.add_blocks(fetched)
+            blocks.update(fetched)
+        return blocks
+
+    def transaction_history(self, address: str) -> Dict[str, Any]:
+        """Summarize the stored history of `address` and queue its extension.
+
+        Blocks are downloaded in the background; until they arrive the
+        summary covers whatever is already stored.
+        """
+        try:
+            self.backfill.request(address)
+            metrics = history_metrics(self.tx_store.load(address), self.tx_store.window)
+            if self.block_cache.head is not None and metrics.get('to_block') is not None:
+                metrics['blocks_behind_head'] = max(self.block_cache.head - metrics['to_block'], 0)
+            return metrics
+        except Exception as e:
+            return {
+                'error': str(e)
+            }
+
     def analyze_transaction_patterns(self, address: str) -> Dict[str, Any]:
         """Analyze transaction patterns for suspicious activity."""
         try:
-            # Get recent transactions
-            block_number = self.w3.eth.block_number
-            transactions = []
+            # Analyze last 100 blocks
+            transactions = self.block_cache.transactions_to(self.w3, address, self.scan_depth, self.fetcher)
             unique_senders = set()
             total_value = 0
 
-            # Analyze last 100 blocks
-            for i in range(100):
-                block = self.w3.eth.get_block(block_number - i, True)
-                for tx in block.transactions:
-                    if tx['to'] and tx['to'].lower() == address.lower():
-                        transactions.append(tx)
-                        unique_senders.add(tx['from'])
-                        total_value += tx['value']
+            for tx in transactions:
+                unique_senders.add(tx['from'])
+                total_value += tx['value']
 
             return {
                 'transaction_count': len(transactions),
                 'unique_senders': len(unique_senders),
                 'total_value_wei': total_value,
                 'total_value_eth': self.w3.from_wei(total_value, 'ether'),
-                'avg_value_eth': self.w3.from_wei(total_value / len(transactions) if transactions else 0, 'ether')
+                'avg_value_eth': self.w3.from_wei(total_value / len(transactions) if transactions else 0, 'ether'),
+                'history': self.transaction_history(address)
             }
 
         except Exception as e:
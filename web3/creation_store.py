@@ -0,0 +1,67 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+
+
+class CreationBlockStore:
+    """Permanent address -> creation block store backed by SQLite.
+
+    A contract's creation block never changes, so entries are written once and
+    never expire. Reads are served from memory after the first hit.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('CREATION_BLOCK_DB', 'creation_blocks.sqlite3')
+        self._memory: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS creation_blocks ('
+                'address TEXT PRIMARY KEY, block_number INTEGER NOT NULL)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, address: str) -> Optional[int]:
+        """Return the stored creation block for `address`, if known."""
+        key = address.lower()
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+
+        row = self._connect().execute(
+            'SELECT block_number FROM creation_blocks WHERE address = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        with self._lock:
+            self._memory[key] = row[0]
+        return row[0]
+
+    def set(self, address: str, block_number: int) -> None:
+        """Record the creation block for `address`."""
+        key = address.lower()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO creation_blocks (address, block_number) VALUES (?, ?)',
+                (key, block_number)
+            )
+        with self._lock:
+            self._memory[key] = block_number
+
+    def missing(self, addresses: Iterable[str]) -> list:
+        """Return the addresses that have no stored creation block yet."""
+        return [address for address in addresses if self.get(address) is None]
+
+
+# Shared by every ContractAnalyzer in the process
+creation_store = CreationBlockStore()
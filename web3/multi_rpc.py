@@ -0,0 +1,191 @@
+from web3.providers.rpc import HTTPProvider
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import threading
+import time
+from web3.transport import count_rpc_calls, is_idempotent
+
+
+class Endpoint:
+    """Latency and health bookkeeping for one RPC URL, shared process-wide."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.ewma: Optional[float] = None
+        self.samples: deque = deque(maxlen=200)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float, alpha: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.ewma = latency if self.ewma is None else alpha * latency + (1 - alpha) * self.ewma
+            self.samples.append(latency)
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+
+    def record_failure(self, threshold: int, cooldown: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= threshold:
+                self.open_until = time.monotonic() + cooldown
+
+    def available(self, now: float) -> bool:
+        """Closed breaker, or an open one whose cooldown has passed."""
+        with self._lock:
+            return self.open_until == 0.0 or now >= self.open_until
+
+    def claim(self, now: float, cooldown: float) -> bool:
+        """Take a slot for one request: always free while closed, one trial per
+        cooldown while open."""
+        with self._lock:
+            if self.open_until == 0.0:
+                return True
+            if now >= self.open_until:
+                self.open_until = now + cooldown
+                return True
+            return False
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < 20:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+class EndpointPool:
+    """Route each request to the fastest healthy endpoint and hedge slow ones.
+
+    The request goes to the endpoint with the lowest latency EWMA. If it has
+    not answered within that endpoint's recent p95 latency, the same request
+    is sent to the next endpoint and whichever answers first wins. Endpoints
+    that fail repeatedly are skipped until their breaker cooldown passes;
+    after that only the request actually sent there takes the trial slot.
+    Transaction sends go to one endpoint once, without hedging or failover.
+    """
+
+    _endpoints: Dict[str, Endpoint] = {}
+    _endpoints_lock = threading.Lock()
+    _pool: Optional[ThreadPoolExecutor] = None
+
+    def __init__(self, urls: Sequence[str], session_for, timeout: float):
+        with EndpointPool._endpoints_lock:
+            self.endpoints = [EndpointPool._endpoints.setdefault(url, Endpoint(url)) for url in urls]
+            if EndpointPool._pool is None:
+                EndpointPool._pool = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('RPC_HEDGE_POOL_SIZE', 64)), thread_name_prefix='rpc-hedge')
+        self.session_for = session_for
+        self.timeout = timeout
+        self.alpha = float(os.getenv('RPC_EWMA_ALPHA', 0.2))
+        self.hedge_default = float(os.getenv('RPC_HEDGE_DELAY', 0.25))
+        self.hedge_min = float(os.getenv('RPC_HEDGE_MIN_DELAY', 0.02))
+        self.hedge_max = float(os.getenv('RPC_HEDGE_MAX_DELAY', 2.0))
+        self.breaker_failures = int(os.getenv('RPC_BREAKER_FAILURES', 3))
+        self.breaker_cooldown = float(os.getenv('RPC_BREAKER_COOLDOWN', 10))
+
+    def ranked(self) -> List[Endpoint]:
+        """Available endpoints, fastest first; never empty."""
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if e.available(now)]
+        if not healthy:
+            # Everything is tripped: try whichever recovers first
+            healthy = [min(self.endpoints, key=lambda e: e.open_until)]
+        # Unmeasured endpoints sort first so they get measured
+        return sorted(healthy, key=lambda e: -1.0 if e.ewma is None else e.ewma)
+
+    def hedge_delay(self, endpoint: Endpoint) -> float:
+        p95 = endpoint.p95()
+        if p95 is None:
+            return self.hedge_default
+        return min(max(p95, self.hedge_min), self.hedge_max)
+
+    def _claim_next(self, candidates) -> Optional[Endpoint]:
+        """First remaining candidate whose breaker lets this request through."""
+        for endpoint in candidates:
+            if endpoint.claim(time.monotonic(), self.breaker_cooldown):
+                return endpoint
+        return None
+
+    def _send(self, endpoint: Endpoint, body: bytes, retry: bool = True) -> bytes:
+        started = time.monotonic()
+        try:
+            response = self.session_for(endpoint.url, retry).post(
+                endpoint.url, data=body, timeout=self.timeout,
+                headers={'Content-Type': 'application/json'})
+            response.raise_for_status()
+        except Exception:
+            endpoint.record_failure(self.breaker_failures, self.breaker_cooldown)
+            raise
+        endpoint.record_success(time.monotonic() - started, self.alpha)
+        return response.content
+
+    def post(self, body: bytes, idempotent: bool = True) -> bytes:
+        """Send `body` and return the first successful raw response."""
+        ranked = self.ranked()
+        candidates = iter(ranked)
+        # With every breaker open, the endpoint closest to recovery goes anyway
+        primary = self._claim_next(candidates) or ranked[0]
+        if not idempotent:
+            return self._send(primary, body, retry=False)
+
+        pending = {EndpointPool._pool.submit(self._send, primary, body)}
+        delay = self.hedge_delay(primary)
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+
+            # Slow or failed: bring in the next endpoint, if any is left
+            backup = self._claim_next(candidates)
+            if backup is not None:
+                pending.add(EndpointPool._pool.submit(self._send, backup, body))
+            elif not done:
+                delay = None
+
+        raise last_error if last_error else RuntimeError('No RPC endpoint answered')
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [{
+            'url': e.url,
+            'ewma_seconds': e.ewma,
+            'p95_seconds': e.p95(),
+            'requests': e.requests,
+            'failures': e.failures,
+            'open': e.open_until > time.monotonic(),
+        } for e in self.endpoints]
+
+
+class HedgedHTTPProvider(HTTPProvider):
+    """web3 HTTP provider that spreads requests over several RPC URLs."""
+
+    def __init__(self, endpoint_uris: Sequence[str], session_for, timeout: float, **kwargs):
+        # endpoint_uri keeps the full list so copies of this client can be rebuilt
+        super().__init__(','.join(endpoint_uris), **kwargs)
+        self.pool = EndpointPool(endpoint_uris, session_for, timeout)
+
+    def make_request(self, method, params):
+        count_rpc_calls([method])
+        request_data = self.encode_rpc_request(method, params)
+        return self.decode_rpc_response(self.pool.post(request_data, is_idempotent([method])))
+
+    def make_batch_request(self, batch_requests: List[Tuple[Any, Any]]):
+        methods = [method for method, _ in batch_requests]
+        count_rpc_calls(methods)
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        response = self.decode_rpc_response(self.pool.post(request_data, is_idempotent(methods)))
+        if isinstance(response, list):
+            # Servers may answer a batch in any order
+            response = sorted(response, key=lambda r: r.get('id', 0))
+        return response
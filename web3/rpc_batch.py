@@ -0,0 +1,66 @@
+from web3 import Web3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import threading
+from web3.transport import make_web3
+
+
+class BatchFetcher:
+    """Send JSON-RPC calls as batches, several batches in flight at once."""
+
+    def __init__(self, w3: Web3, batch_size: Optional[int] = None, max_concurrency: Optional[int] = None):
+        self.w3 = w3
+        self.batch_size = batch_size or int(os.getenv('RPC_BATCH_SIZE', 50))
+        self.max_concurrency = max_concurrency or int(os.getenv('RPC_MAX_CONCURRENCY', 8))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                        thread_name_prefix='rpc-batch')
+        # web3 marks the whole provider as "batching" inside batch_requests(),
+        # so every pool thread gets its own client; they share one connection pool.
+        self._local = threading.local()
+
+    def _client(self) -> Web3:
+        client = getattr(self._local, 'w3', None)
+        if client is None:
+            client = make_web3(self.w3.provider.endpoint_uri)
+            self._local.w3 = client
+        return client
+
+    def _run_batch(self, method: str, chunk: Sequence[Tuple]) -> List[Any]:
+        """Execute one chunk of calls as a single JSON-RPC batch request."""
+        client = self._client()
+        try:
+            with client.batch_requests() as batch:
+                for args in chunk:
+                    batch.add(getattr(client.eth, method)(*args))
+                return list(batch.execute())
+        except Exception:
+            # Node rejected the batch; fall back to one request per call
+            return [getattr(client.eth, method)(*args) for args in chunk]
+
+    def map(self, method: str, args_list: Iterable[Tuple]) -> List[Any]:
+        """Call `w3.eth.<method>` for every argument tuple, preserving order."""
+        args_list = list(args_list)
+        chunks = [args_list[i:i + self.batch_size]
+                  for i in range(0, len(args_list), self.batch_size)]
+        if len(chunks) == 1:
+            return self._run_batch(method, chunks[0])
+
+        results = []
+        for chunk_results in self._pool.map(lambda chunk: self._run_batch(method, chunk), chunks):
+            results.extend(chunk_results)
+        return results
+
+    def get_blocks(self, numbers: Iterable[int], full_transactions: bool = True) -> Dict[int, Any]:
+        """Fetch several blocks, returned keyed by block number."""
+        numbers = list(numbers)
+        blocks = self.map('get_block', [(n, full_transactions) for n in numbers])
+        return dict(zip(numbers, blocks))
+
+    def get_codes(self, address: str, block_numbers: Iterable[int]) -> List[bytes]:
+        """Fetch the code of `address` at each of the given block numbers."""
+        return self.map('get_code', [(address, n) for n in block_numbers])
+
+    def submit(self, fn, *args, **kwargs):
+        """Run an arbitrary callable on the bounded pool."""
+        return self._pool.submit(fn, *args, **kwargs)
@@ -0,0 +1,194 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+import os
+import sqlite3
+import threading
+import time
+
+MAX_HASH = np.uint32(0xFFFFFFFF)
+
+
+def shingles(opcodes: bytes, ngram: int) -> np.ndarray:
+    """Distinct opcode n-grams of `opcodes`, each packed into one integer."""
+    ops = np.frombuffer(opcodes, dtype=np.uint8).astype(np.uint64)
+    if len(ops) == 0:
+        return ops
+    ngram = min(ngram, len(ops))
+    count = len(ops) - ngram + 1
+    packed = np.zeros(count, dtype=np.uint64)
+    for j in range(ngram):
+        packed = (packed << np.uint64(8)) | ops[j:j + count]
+    return np.unique(packed)
+
+
+class MinHasher:
+    """MinHash signatures from multiply-shift hash functions.
+
+    The hash functions come from a fixed seed, so signatures computed by any
+    process can be compared and stored.
+    """
+
+    def __init__(self, num_perm: int, ngram: int, seed: int = 1):
+        self.num_perm = num_perm
+        self.ngram = ngram
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, 2 ** 64 - 1, num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 64 - 1, num_perm, dtype=np.uint64, endpoint=True)
+
+    def signature(self, opcodes: bytes) -> np.ndarray:
+        values = shingles(opcodes, self.ngram)
+        signature = np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # Chunked so very large contracts don't build a huge temporary matrix
+        for start in range(0, len(values), 4096):
+            chunk = values[start:start + 4096]
+            hashed = (self.a[:, None] * chunk[None, :] + self.b[:, None]) >> np.uint64(32)
+            signature = np.minimum(signature, hashed.min(axis=1).astype(np.uint32))
+        return signature
+
+
+class SimilarityIndex:
+    """MinHash/LSH index of labelled contract bytecode for clone detection.
+
+    Each contract is fingerprinted by the set of opcode n-grams in its runtime
+    code (PUSH data excluded, so changed constants and addresses don't matter).
+    Signatures are split into bands; contracts sharing any band are candidates,
+    ranked by the fraction of equal signature slots, which estimates the
+    Jaccard similarity of their n-gram sets. Entries persist in SQLite; rows
+    written by other processes (e.g. scripts/index_reference_contracts.py) are
+    picked up by rowid at most once per `reload_interval` seconds.
+    """
+
+    def __init__(self, path: Optional[str] = None, num_perm: Optional[int] = None,
+                 bands: Optional[int] = None, ngram: Optional[int] = None):
+        self.path = path or os.getenv('SIMILARITY_DB', 'bytecode_similarity.sqlite3')
+        num_perm = num_perm or int(os.getenv('SIMILARITY_NUM_PERM', 128))
+        self.bands = bands or int(os.getenv('SIMILARITY_BANDS', 32))
+        self.rows = num_perm // self.bands
+        self.hasher = MinHasher(self.rows * self.bands, ngram or int(os.getenv('SIMILARITY_NGRAM', 5)))
+        # Signatures are only comparable under the same settings
+        self.params = f'{self.hasher.ngram}:{self.hasher.num_perm}:{self.bands}'
+
+        self._entries: List[Dict[str, Any]] = []
+        self._signatures: List[np.ndarray] = []
+        self._by_hash: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Bumped whenever an entry is added or relabelled, so cached matches can be checked
+        self.version = 0
+        self.reload_interval = float(os.getenv('SIMILARITY_RELOAD_INTERVAL', 1))
+        self._loaded_rowid = 0
+        self._checked_at = 0.0
+
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS bytecode_signatures ('
+                'code_hash TEXT PRIMARY KEY, label TEXT NOT NULL, name TEXT, '
+                'params TEXT NOT NULL, signature BLOB NOT NULL)'
+            )
+        self.reload(force=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def reload(self, force: bool = False) -> None:
+        """Load rows written since the last load.
+
+        INSERT OR REPLACE gives a replaced row a new rowid, so relabels made by
+        other processes show up here too.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        rows = self._connect().execute(
+            'SELECT rowid, code_hash, label, name, signature FROM bytecode_signatures '
+            'WHERE rowid > ? AND params = ? ORDER BY rowid',
+            (self._loaded_rowid, self.params)
+        ).fetchall()
+        for rowid, code_hash, label, name, blob in rows:
+            self._index(code_hash, label, name, np.frombuffer(blob, dtype=np.uint32))
+            self._loaded_rowid = max(self._loaded_rowid, rowid)
+
+    def _index(self, code_hash: str, label: str, name: Optional[str], signature: np.ndarray) -> None:
+        with self._lock:
+            position = self._by_hash.get(code_hash)
+            if position is not None:
+                # Same code hash means same opcodes, so only the label can change
+                if self._entries[position] != {'code_hash': code_hash, 'label': label, 'name': name}:
+                    self._entries[position] = {'code_hash': code_hash, 'label': label, 'name': name}
+                    self.version += 1
+                return
+            position = len(self._entries)
+            self._entries.append({'code_hash': code_hash, 'label': label, 'name': name})
+            self._signatures.append(signature)
+            self._by_hash[code_hash] = position
+            for band, key in zip(self._buckets, self._band_keys(signature)):
+                band.setdefault(key, []).append(position)
+            self.version += 1
+
+    def add(self, code_hash: str, opcodes: bytes, label: str, name: Optional[str] = None) -> None:
+        """Record a reference contract, labelled e.g. 'malicious' or 'benign'."""
+        signature = self.hasher.signature(opcodes)
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO bytecode_signatures (code_hash, label, name, params, signature) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (code_hash, label, name, self.params, signature.tobytes())
+            )
+        self._index(code_hash, label, name, signature)
+
+    def nearest(self, opcodes: bytes, limit: int = 5, min_similarity: float = 0.5) -> List[Dict[str, Any]]:
+        """Reference contracts most similar to `opcodes`, best first."""
+        return self.nearest_signature(self.hasher.signature(opcodes), limit, min_similarity)
+
+    def nearest_analysis(self, analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """`nearest` for a bytecode_cache entry, memoized on the entry.
+
+        The signature is stored on the entry once; the match list is reused
+        until the index changes.
+        """
+        self.reload()
+        signature = analysis.get('signature')
+        if signature is None:
+            signature = analysis['signature'] = self.hasher.signature(analysis['opcodes'])
+        cached = analysis.get('nearest')
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        version = self.version
+        similar = self.nearest_signature(signature)
+        analysis['nearest'] = (version, similar)
+        return similar
+
+    def nearest_signature(self, signature: np.ndarray, limit: int = 5,
+                          min_similarity: float = 0.5) -> List[Dict[str, Any]]:
+        self.reload()
+        with self._lock:
+            candidates = set()
+            for band, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(band.get(key, ()))
+            if not candidates:
+                return []
+            candidates = list(candidates)
+            matrix = np.stack([self._signatures[i] for i in candidates])
+            entries = [self._entries[i] for i in candidates]
+
+        similarity = (matrix == signature).mean(axis=1)
+        order = np.argsort(-similarity)[:limit]
+        return [dict(entries[i], similarity=round(float(similarity[i]), 3))
+                for i in order if similarity[i] >= min_similarity]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every ContractAnalyzer in the process
+similarity_index = SimilarityIndex()
@@ -0,0 +1,111 @@
+from web3 import Web3
+from web3.providers.rpc import HTTPProvider
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Iterable, Optional, Tuple
+import os
+import threading
+
+_sessions: Dict[Tuple[str, bool], Session] = {}
+_sessions_lock = threading.Lock()
+
+# JSON-RPC method -> calls sent by this process, batched calls counted singly
+rpc_calls: Dict[str, int] = {}
+_rpc_calls_lock = threading.Lock()
+
+# Calls that must reach a node at most once: never retried, hedged or failed over
+NON_IDEMPOTENT_METHODS = frozenset(['eth_sendTransaction', 'eth_sendRawTransaction'])
+
+
+def is_idempotent(methods: Iterable[str]) -> bool:
+    return not any(method in NON_IDEMPOTENT_METHODS for method in methods)
+
+
+def count_rpc_calls(methods: Iterable[str]) -> None:
+    with _rpc_calls_lock:
+        for method in methods:
+            rpc_calls[method] = rpc_calls.get(method, 0) + 1
+
+
+class CountingHTTPProvider(HTTPProvider):
+    """HTTPProvider that tallies every JSON-RPC call in `rpc_calls`."""
+
+    def make_request(self, method, params):
+        count_rpc_calls([method])
+        if method not in NON_IDEMPOTENT_METHODS:
+            return super().make_request(method, params)
+        return self.decode_rpc_response(self._post_once(self.encode_rpc_request(method, params)))
+
+    def make_batch_request(self, batch_requests):
+        methods = [method for method, _ in batch_requests]
+        count_rpc_calls(methods)
+        if is_idempotent(methods):
+            return super().make_batch_request(batch_requests)
+        response = self.decode_rpc_response(self._post_once(self.encode_batch_rpc_request(batch_requests)))
+        if isinstance(response, list):
+            response = sorted(response, key=lambda r: r.get('id', 0))
+        return response
+
+    def _post_once(self, request_data: bytes) -> bytes:
+        """POST through the session without retries, for transaction sends."""
+        response = get_session(self.endpoint_uri, retry=False).post(
+            self.endpoint_uri, data=request_data, **dict(self.get_request_kwargs()))
+        response.raise_for_status()
+        return response.content
+
+
+def make_session(retry: bool = True) -> Session:
+    """HTTP session with a sized keep-alive pool and retry with backoff.
+
+    Retries cover connection failures and 429/5xx answers; JSON-RPC reads are
+    idempotent, so POSTs are retried too. Sessions for transaction sends are
+    built with retry=False, since a retried send can be broadcast twice.
+    """
+    pool_size = int(os.getenv('RPC_POOL_SIZE', 32))
+    retries = Retry(
+        total=int(os.getenv('RPC_RETRIES', 3)),
+        read=0,
+        backoff_factor=float(os.getenv('RPC_BACKOFF', 0.2)),
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['POST']),
+        respect_retry_after_header=True,
+    ) if retry else 0
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retries, pool_block=True)
+    session = Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(endpoint_uri: str, retry: bool = True) -> Session:
+    """Return the process-wide session for `endpoint_uri`, with or without retries."""
+    with _sessions_lock:
+        session = _sessions.get((endpoint_uri, retry))
+        if session is None:
+            session = make_session(retry)
+            _sessions[(endpoint_uri, retry)] = session
+        return session
+
+
+def make_web3(endpoint_uri: Optional[str], timeout: Optional[float] = None) -> Web3:
+    """Web3 client for `endpoint_uri` that shares one connection pool per endpoint.
+
+    A comma-separated list of URLs gives a client that routes to the fastest
+    healthy endpoint and hedges slow requests (see web3.multi_rpc).
+    """
+    timeout = timeout or float(os.getenv('RPC_TIMEOUT', 10))
+    if endpoint_uri and ',' in endpoint_uri:
+        from web3.multi_rpc import HedgedHTTPProvider
+        urls = [url.strip() for url in endpoint_uri.split(',') if url.strip()]
+        return Web3(HedgedHTTPProvider(urls, get_session, timeout,
+                                       exception_retry_configuration=None))
+    provider = CountingHTTPProvider(
+        endpoint_uri,
+        request_kwargs={'timeout': timeout},
+        session=get_session(endpoint_uri),
+        # Retries happen once, in the transport
+        exception_retry_configuration=None,
+    )
+    return Web3(provider)
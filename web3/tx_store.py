@@ -0,0 +1,409 @@
+import numpy as np
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+import fcntl
+import json
+import os
+import shutil
+import threading
+
+# Column name -> on-disk dtype. Values are stored in ETH; float64 keeps
+# about 15 significant digits, plenty for analytics.
+COLUMNS = {
+    'block': np.int64,
+    'sender': np.uint32,
+    'value': np.float64,
+    'gas': np.int64,
+    'direction': np.int8,
+}
+INFLOW, OUTFLOW = 1, -1
+
+
+def tx_row(block_number: int, tx: Any, direction: int) -> tuple:
+    """(block, sender, value, gas, direction) for one transaction."""
+    sender = tx['from'].lower() if tx['from'] else ''
+    return (block_number, sender, tx['value'] / 1e18, tx['gas'], direction)
+
+
+def extract_rows(block_number: int, block: Any, wanted: Dict[str, List[range]]) -> Dict[str, List[tuple]]:
+    """Rows for every transaction in `block` touching an address of `wanted`.
+
+    `wanted` maps a lowercased address to the block ranges it needs; one pass
+    over the transactions serves every address.
+    """
+    rows: Dict[str, List[tuple]] = {}
+    for tx in block.transactions:
+        sender = tx['from'].lower() if tx['from'] else ''
+        recipient = tx['to'].lower() if tx['to'] else ''
+        # A transfer between two wanted addresses is a row for each; a self-transfer is one inflow
+        for address, direction in ((recipient, INFLOW), (sender, OUTFLOW)):
+            if address in wanted and any(block_number in numbers for numbers in wanted[address]):
+                rows.setdefault(address, []).append(tx_row(block_number, tx, direction))
+            if sender == recipient:
+                break
+    return rows
+
+
+class TransactionStore:
+    """Append-only columnar transaction history, one directory per address.
+
+    Each column is a flat binary file that only ever grows; senders are
+    interned into a per-address id table. meta.json records the contiguous
+    block range [low, high] already scanned, so each update only downloads
+    blocks outside it. A file lock keeps workers from appending at once.
+    At most `max_addresses` histories are kept; starting a new one removes
+    the least recently updated.
+    """
+
+    def __init__(self, root: Optional[str] = None, backfill_step: Optional[int] = None,
+                 window: Optional[int] = None, max_addresses: Optional[int] = None):
+        self.root = root or os.getenv('TX_STORE_DIR', 'tx_history')
+        # Blocks downloaded per request to the node
+        self.backfill_step = backfill_step or int(os.getenv('TX_STORE_BACKFILL_STEP', 500))
+        # How far back history is kept and analyzed
+        self.window = window or int(os.getenv('TX_HISTORY_WINDOW', 10000))
+        self.max_addresses = max_addresses or int(os.getenv('TX_STORE_MAX_ADDRESSES', 10000))
+
+    def _dir(self, address: str) -> str:
+        return os.path.join(self.root, address.lower())
+
+    @contextmanager
+    def _locked(self, address: str):
+        path = self._dir(address)
+        os.makedirs(path, exist_ok=True)
+        # flock is per open file, so this also serializes threads of one worker
+        with open(os.path.join(path, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_meta(path: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(path, 'meta.json'), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'low': None, 'high': None, 'rows': 0}
+
+    @staticmethod
+    def _write_meta(path: str, meta: Dict[str, Any]) -> None:
+        tmp_path = os.path.join(path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+    @staticmethod
+    def _read_senders(path: str) -> List[str]:
+        try:
+            with open(os.path.join(path, 'senders.txt'), 'r') as f:
+                return f.read().split()
+        except FileNotFoundError:
+            return []
+
+    def _append(self, path: str, meta: Dict[str, Any], rows: List[tuple], low: int, high: int) -> None:
+        """Append rows covering blocks [low, high] and widen the recorded range."""
+        # Drop the tail of an append that crashed before meta.json was written
+        for name, dtype in COLUMNS.items():
+            file_path = os.path.join(path, f'{name}.bin')
+            size = meta['rows'] * np.dtype(dtype).itemsize
+            if os.path.exists(file_path) and os.path.getsize(file_path) > size:
+                os.truncate(file_path, size)
+
+        if rows:
+            senders = self._read_senders(path)
+            sender_ids = {sender: i for i, sender in enumerate(senders)}
+            new_senders = []
+            ids = []
+            for row in rows:
+                sender_id = sender_ids.get(row[1])
+                if sender_id is None:
+                    sender_id = sender_ids[row[1]] = len(senders) + len(new_senders)
+                    new_senders.append(row[1])
+                ids.append(sender_id)
+
+            columns = {
+                'block': [row[0] for row in rows],
+                'sender': ids,
+                'value': [row[2] for row in rows],
+                'gas': [row[3] for row in rows],
+                'direction': [row[4] for row in rows],
+            }
+            # Sender table first: a crash can leave unused senders, never dangling ids
+            if new_senders:
+                with open(os.path.join(path, 'senders.txt'), 'a') as f:
+                    f.write(''.join(sender + '\n' for sender in new_senders))
+            for name, dtype in COLUMNS.items():
+                with open(os.path.join(path, f'{name}.bin'), 'ab') as f:
+                    np.asarray(columns[name], dtype=dtype).tofile(f)
+
+        meta['rows'] += len(rows)
+        meta['low'] = low if meta['low'] is None else min(meta['low'], low)
+        meta['high'] = high if meta['high'] is None else max(meta['high'], high)
+        self._write_meta(path, meta)
+
+    def update(self, address: str, head: int, get_blocks) -> Dict[str, Any]:
+        """Extend the history of one address; see `update_many`."""
+        return self.update_many([address], head, get_blocks)[address.lower()]
+
+    def update_many(self, addresses: List[str], head: int, get_blocks) -> Dict[str, Dict[str, Any]]:
+        """Extend the histories of `addresses` up to `head` and back toward the window start.
+
+        `get_blocks(numbers)` returns {number: full block}. The forward side
+        always catches up to `head`, so the stored window never lags; the
+        backward side grows `backfill_step` blocks per call, so deep histories
+        fill in over several calls. Every block any address needs is
+        downloaded once, `backfill_step` blocks per request, and matched
+        against all the addresses in one pass.
+        """
+        floor = max(head - self.window + 1, 0)
+        plans: Dict[str, List[range]] = {}
+        metas: Dict[str, Dict[str, Any]] = {}
+        for address in {address.lower() for address in addresses}:
+            if not os.path.exists(self._dir(address)):
+                self._evict()
+            with self._locked(address) as path:
+                meta = self._read_meta(path)
+                if meta['high'] is not None and head - meta['high'] > self.window:
+                    # Too stale to bridge; start over from the head
+                    self._reset(path)
+                    meta = self._read_meta(path)
+            start = max(head - self.backfill_step + 1, 0) if meta['high'] is None else meta['high'] + 1
+            low = start if meta['low'] is None else meta['low']
+            # Forward first: a fresh history's backward step starts where it ends
+            plans[address] = [range(start, head + 1), range(max(low - self.backfill_step, floor), low)]
+            metas[address] = meta
+
+        needed = sorted({number for ranges in plans.values() for numbers in ranges for number in numbers})
+        rows: Dict[str, List[tuple]] = {address: [] for address in plans}
+        for i in range(0, len(needed), self.backfill_step):
+            chunk = needed[i:i + self.backfill_step]
+            blocks = get_blocks(chunk)
+            for number in chunk:
+                for address, found in extract_rows(number, blocks[number], plans).items():
+                    rows[address].extend(found)
+
+        for address, ranges in plans.items():
+            if not any(ranges):
+                continue
+            with self._locked(address) as path:
+                meta = self._read_meta(path)
+                for numbers in ranges:
+                    if numbers:
+                        self._extend(path, meta, [row for row in rows[address] if row[0] in numbers],
+                                     numbers[0], numbers[-1])
+                metas[address] = meta
+        return metas
+
+    def _extend(self, path: str, meta: Dict[str, Any], rows: List[tuple], first: int, last: int) -> None:
+        """Append the part of blocks [first, last] that extends the stored range without a gap.
+
+        Another writer (the monitor, another worker) may have extended the
+        range since `rows` were collected; rows it already stored are skipped.
+        """
+        if meta['high'] is None:
+            self._append(path, meta, rows, first, last)
+        elif first <= meta['high'] + 1 <= last:
+            self._append(path, meta, [row for row in rows if row[0] > meta['high']], meta['high'] + 1, last)
+        elif first <= meta['low'] - 1 <= last:
+            self._append(path, meta, [row for row in rows if row[0] < meta['low']], first, meta['low'] - 1)
+
+    def covers(self, meta: Dict[str, Any], head: int) -> bool:
+        """True once the stored range spans the whole window ending at `head`."""
+        return meta['low'] is not None and meta['low'] <= max(head - self.window + 1, 0) \
+            and meta['high'] >= head
+
+    def record_blocks(self, matches: Dict[str, List[tuple]], first: int, last: int) -> None:
+        """Append freshly seen blocks [first, last] to histories they extend without a gap.
+
+        `matches` maps a lowercased address to (block number, transaction,
+        'in' or 'out') for each transaction touching it, as collected by one
+        pass over the blocks; only addresses with matches are touched.
+        """
+        for address, found in matches.items():
+            if not os.path.exists(os.path.join(self._dir(address), 'meta.json')):
+                continue
+            with self._locked(address) as path:
+                meta = self._read_meta(path)
+                if meta['high'] is None or not first <= meta['high'] + 1 <= last:
+                    continue
+                rows = [tx_row(number, tx, INFLOW if direction == 'in' else OUTFLOW)
+                        for number, tx, direction in found]
+                self._extend(path, meta, rows, first, last)
+
+    def _evict(self) -> None:
+        """Make room for one more history by removing the least recently updated."""
+        try:
+            entries = [entry for entry in os.scandir(self.root) if entry.is_dir()]
+        except FileNotFoundError:
+            return
+        excess = len(entries) + 1 - self.max_addresses
+        if excess <= 0:
+            return
+
+        def updated_at(entry):
+            try:
+                return os.stat(os.path.join(entry.path, 'meta.json')).st_mtime
+            except OSError:
+                return 0.0
+
+        for entry in sorted(entries, key=updated_at)[:excess]:
+            try:
+                with open(os.path.join(entry.path, '.lock'), 'w') as lock_file:
+                    # Skip a history another worker is writing right now
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def _reset(self, path: str) -> None:
+        for name in list(COLUMNS) + ['senders']:
+            for suffix in ('.bin', '.txt'):
+                file_path = os.path.join(path, name + suffix)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+        self._write_meta(path, {'low': None, 'high': None, 'rows': 0})
+
+    def load(self, address: str) -> Dict[str, Any]:
+        """Columns of the stored history, as NumPy arrays, plus its block range."""
+        path = self._dir(address)
+        meta = self._read_meta(path)
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            file_path = os.path.join(path, f'{name}.bin')
+            values = np.fromfile(file_path, dtype=dtype) if os.path.exists(file_path) else np.empty(0, dtype)
+            # Ignore rows a concurrent writer has appended but not yet recorded
+            columns[name] = values[:meta['rows']]
+        return dict(columns, low=meta['low'], high=meta['high'])
+
+    def forget(self, address: str) -> None:
+        shutil.rmtree(self._dir(address), ignore_errors=True)
+
+
+def gini(counts: np.ndarray) -> float:
+    """Gini coefficient of non-negative counts (0 = even, ~1 = one holder)."""
+    if counts.size == 0 or counts.sum() == 0:
+        return 0.0
+    ordered = np.sort(counts).astype(np.float64)
+    n = ordered.size
+    return float(2 * np.dot(np.arange(1, n + 1), ordered) / (n * ordered.sum()) - (n + 1) / n)
+
+
+def history_metrics(history: Dict[str, Any], window: int, burst_bucket: int = 10) -> Dict[str, Any]:
+    """Vectorized concentration, value, velocity and burst metrics over the last `window` blocks."""
+    if history['high'] is None:
+        return {'blocks_covered': 0, 'transaction_count': 0}
+
+    high = history['high']
+    start = max(history['low'], high - window + 1)
+    span = high - start + 1
+    mask = history['block'] >= start
+    blocks = history['block'][mask]
+    senders = history['sender'][mask]
+    values = history['value'][mask]
+    gas = history['gas'][mask]
+    inflow = history['direction'][mask] == INFLOW
+
+    # Sender concentration of incoming transactions
+    per_sender = np.bincount(senders[inflow])
+    per_sender = per_sender[per_sender > 0]
+    shares = per_sender / per_sender.sum() if per_sender.size else per_sender
+
+    # Value distribution in decades of ETH, zero-value calls counted apart
+    edges = 10.0 ** np.arange(-6, 5)
+    histogram, _ = np.histogram(values[values > 0], bins=np.concatenate(([0.0], edges, [np.inf])))
+    labels = ['<1e-6'] + [f'{low:g}-{high_edge:g}' for low, high_edge in zip(edges[:-1], edges[1:])] + ['>=1e4']
+
+    # Velocity: ETH per 1000 blocks, whole window vs its most recent tenth
+    recent_span = max(span // 10, 1)
+    recent = blocks > high - recent_span
+    inflow_rate = values[inflow].sum() / span * 1000
+    outflow_rate = values[~inflow].sum() / span * 1000
+    recent_inflow_rate = values[inflow & recent].sum() / recent_span * 1000
+
+    # Bursts: buckets of `burst_bucket` blocks far above the usual activity
+    per_bucket = np.bincount((blocks - start) // burst_bucket, minlength=(span + burst_bucket - 1) // burst_bucket)
+    threshold = per_bucket.mean() + 3 * per_bucket.std()
+    bursts = np.flatnonzero((per_bucket > threshold) & (per_bucket >= 5))
+
+    return {
+        'blocks_covered': int(span),
+        'from_block': int(start),
+        'to_block': int(high),
+        'transaction_count': int(blocks.size),
+        'unique_senders': int(per_sender.size),
+        'sender_hhi': float(np.square(shares).sum()),
+        'sender_gini': gini(per_sender),
+        'top_sender_share': float(shares.max()) if shares.size else 0.0,
+        'zero_value_transactions': int((values == 0).sum()),
+        'value_histogram_eth': dict(zip(labels, histogram.tolist())),
+        'inflow_eth_per_1k_blocks': float(inflow_rate),
+        'outflow_eth_per_1k_blocks': float(outflow_rate),
+        'recent_inflow_eth_per_1k_blocks': float(recent_inflow_rate),
+        'avg_gas': float(gas.mean()) if gas.size else 0.0,
+        'burst_count': int(bursts.size),
+        'max_transactions_per_bucket': int(per_bucket.max()) if per_bucket.size else 0,
+        'last_burst_block': int(start + bursts[-1] * burst_bucket) if bursts.size else None,
+    }
+
+
+class BackfillQueue:
+    """Extends stored histories on a daemon thread, off the request path.
+
+    Each address is queued at most once. When `max_pending` addresses are
+    waiting, further requests are dropped; the address's next analysis asks
+    again. Each round takes every queued address and extends them together
+    with `update_many`, so a block range is downloaded once per round however
+    many addresses need it. Addresses whose window is not filled yet are
+    queued again for the next round.
+    """
+
+    def __init__(self, store: TransactionStore, head: Callable[[], int], get_blocks,
+                 max_pending: Optional[int] = None):
+        self.store = store
+        self.head = head
+        self.get_blocks = get_blocks
+        self.max_pending = max_pending or int(os.getenv('TX_BACKFILL_QUEUE_SIZE', 1000))
+        self._queue: deque = deque()
+        self._pending = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def request(self, address: str) -> bool:
+        """Queue `address` for extension; False if it is already queued or the queue is full."""
+        address = address.lower()
+        with self._cond:
+            if address in self._pending or len(self._pending) >= self.max_pending:
+                return False
+            self._pending.add(address)
+            self._queue.append(address)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='tx-backfill', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                batch = list(self._queue)
+                self._queue.clear()
+            try:
+                head = self.head()
+                metas = self.store.update_many(batch, head, self.get_blocks)
+                unfinished = [address for address, meta in metas.items() if not self.store.covers(meta, head)]
+            except Exception as e:
+                print(f"Error extending transaction histories of {len(batch)} addresses: {e}")
+                unfinished = []
+            with self._cond:
+                self._pending.difference_update(batch)
+            for address in unfinished:
+                self.request(address)
+
+
+# Shared by every ContractAnalyzer in the process
+tx_store = TransactionStore()